@@ -0,0 +1,244 @@
+#!/usr/bin/env python3
+"""
+Librarian benchmark suite
+
+Runs the indexer and the query path against a deterministic synthetic
+library (synth_library.py) with the model-free stub embedding backend, so
+numbers measure our own plumbing (extraction, chunking, FAISS, JSON, MCP)
+rather than the model, and are stable enough to compare between commits.
+
+Benchmarks:
+    index       index_library.py --all --force, per-stage seconds from its
+                telemetry report (extract, chunk, embed, faiss_build,
+                faiss_write) plus wall time
+    query_cold  first research.query_library call in a fresh process
+    query_warm  median of repeated query_library calls
+    mcp_call    median tools/call round trip through mcp_server.handle_request
+                (request/response JSON encoding included)
+
+Each suite run writes a results JSON and compares it against
+baselines/<name>.json: a metric more than --tolerance slower than its
+baseline is a regression (exit code 1).
+
+Usage:
+    python bench.py                          # Run, compare with baselines/default.json
+    python bench.py --save-baseline          # Run and store as the baseline
+    python bench.py --topics 8 --books 10 --pages 40 --baseline large
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+import tempfile
+from pathlib import Path
+from typing import Dict, List
+
+BENCH_DIR = Path(__file__).parent
+SCRIPTS_DIR = BENCH_DIR.parent / "scripts"
+BASELINES_DIR = BENCH_DIR / "baselines"
+
+QUERIES = (
+    'history of the concept',
+    'relationship between structure and change',
+    'most important argument of the chapter',
+    'kalo mirusa tevo',
+)
+
+# Slower than baseline by more than this fraction counts as a regression
+DEFAULT_TOLERANCE = 0.2
+
+# Metrics below this many seconds are too noisy to compare
+MIN_COMPARABLE_SECONDS = 0.005
+
+
+def _env(library: Path) -> Dict[str, str]:
+    env = dict(os.environ)
+    env['LIBRARIAN_BOOKS_DIR'] = str(library)
+    env['LIBRARIAN_EMBED_BACKEND'] = 'stub'
+    return env
+
+
+def bench_index(library: Path, workers: int) -> Dict[str, float]:
+    """Full index build in a subprocess; stage timings from its telemetry report"""
+    with tempfile.TemporaryDirectory() as tmp:
+        report_path = Path(tmp) / 'report.json'
+        started = time.perf_counter()
+        subprocess.run(
+            [sys.executable, str(SCRIPTS_DIR / 'index_library.py'), '--all', '--force',
+             '--backend', 'stub', '--no-embed-cache', '--no-text-cache',
+             '--workers', str(workers), '--report', str(report_path)],
+            env=_env(library), check=True, stdout=subprocess.DEVNULL
+        )
+        wall = time.perf_counter() - started
+        with open(report_path, 'r') as f:
+            report = json.load(f)
+
+    totals = report['totals']
+    metrics = {f"index.{stage}": seconds for stage, seconds in totals['seconds'].items()}
+    metrics['index.wall'] = wall
+    metrics['index.chunks'] = totals['chunks_embedded']
+    return metrics
+
+
+def bench_queries(library: Path, repeats: int) -> Dict[str, float]:
+    """Query timings measured in a fresh process (so the first call is really cold)"""
+    result = subprocess.run(
+        [sys.executable, str(Path(__file__).resolve()), '_query-worker', '--repeats', str(repeats)],
+        env=_env(library), check=True, capture_output=True, text=True
+    )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def query_worker(repeats: int) -> Dict[str, float]:
+    """Runs inside the benchmark subprocess: time research.query_library and MCP tools/call"""
+    sys.path.insert(0, str(SCRIPTS_DIR))
+    # research/mcp_server print progress; keep stdout for the JSON result
+    stdout, sys.stdout = sys.stdout, sys.stderr
+    try:
+        import research
+        import mcp_server
+
+        started = time.perf_counter()
+        research.query_library(QUERIES[0], k=5)
+        cold = time.perf_counter() - started
+
+        warm = []
+        for n in range(repeats):
+            started = time.perf_counter()
+            research.query_library(QUERIES[n % len(QUERIES)], k=5)
+            warm.append(time.perf_counter() - started)
+
+        mcp_server.handle_request({'method': 'initialize'})
+        mcp = []
+        for n in range(repeats):
+            line = json.dumps({'jsonrpc': '2.0', 'id': n, 'method': 'tools/call', 'params': {
+                'name': 'query_library', 'arguments': {'query': QUERIES[n % len(QUERIES)], 'k': 5}
+            }})
+            started = time.perf_counter()
+            request = json.loads(line)
+            result = mcp_server.handle_request(request)
+            json.dumps({'jsonrpc': '2.0', 'id': request['id'], 'result': result})
+            mcp.append(time.perf_counter() - started)
+    finally:
+        sys.stdout = stdout
+
+    return {
+        'query_cold': cold,
+        'query_warm': statistics.median(warm),
+        'query_warm.p95': sorted(warm)[int(len(warm) * 0.95) - 1] if len(warm) >= 20 else max(warm),
+        'mcp_call': statistics.median(mcp)
+    }
+
+
+def compare(results: Dict[str, float], baseline: Dict[str, float], tolerance: float) -> List[str]:
+    """Print a results-vs-baseline table, return regressed metric names"""
+    regressions = []
+    print(f"\n{'Metric':<22} {'Baseline':>10} {'Current':>10} {'Change':>8}")
+    print('-' * 53)
+    for name, value in results.items():
+        base = baseline.get(name)
+        if base is None:
+            print(f"{name:<22} {'-':>10} {value:>10.4f} {'new':>8}")
+            continue
+        change = (value - base) / base if base else 0.0
+        flag = ''
+        # Counts (index.chunks) must match exactly; timings may drift within tolerance
+        if name == 'index.chunks':
+            if value != base:
+                flag = ' ❌'
+                regressions.append(name)
+        elif max(value, base) >= MIN_COMPARABLE_SECONDS and change > tolerance:
+            flag = ' ❌'
+            regressions.append(name)
+        print(f"{name:<22} {base:>10.4f} {value:>10.4f} {change:>+7.0%}{flag}")
+    return regressions
+
+
+def main():
+    if len(sys.argv) > 1 and sys.argv[1] == '_query-worker':
+        parser = argparse.ArgumentParser()
+        parser.add_argument('command')
+        parser.add_argument('--repeats', type=int, default=20)
+        args = parser.parse_args()
+        print(json.dumps(query_worker(args.repeats)))
+        return 0
+
+    parser = argparse.ArgumentParser(description='Benchmark indexing and search on a synthetic library')
+    parser.add_argument('--library', help='Synthetic library directory (default: a temporary directory)')
+    parser.add_argument('--topics', type=int, default=4, help='Topics in the synthetic library (default: 4)')
+    parser.add_argument('--books', type=int, default=6, help='Books per topic (default: 6)')
+    parser.add_argument('--pages', type=int, default=20, help='Pages per book (default: 20)')
+    parser.add_argument('--seed', type=int, default=1, help='Synthetic text seed (default: 1)')
+    parser.add_argument('--workers', type=int, default=2, help='Extraction workers for the index run (default: 2)')
+    parser.add_argument('--repeats', type=int, default=20, help='Warm query / MCP call repetitions (default: 20)')
+    parser.add_argument('--baseline', default='default', help='Baseline name in baselines/ (default: default)')
+    parser.add_argument('--save-baseline', action='store_true', help='Store this run as the baseline')
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help=f'Allowed slowdown vs baseline as a fraction (default: {DEFAULT_TOLERANCE})')
+    parser.add_argument('--output', help='Also write results JSON to this file')
+    args = parser.parse_args()
+
+    from synth_library import generate
+
+    tmp = None
+    if args.library:
+        library = Path(args.library)
+    else:
+        tmp = tempfile.TemporaryDirectory(prefix='librarian-bench-')
+        library = Path(tmp.name)
+
+    try:
+        spec = generate(library, args.topics, args.books, args.pages, args.seed)
+        print(f"📚 Synthetic library: {spec['files']} books in {spec['topics']} topics → {library}")
+
+        print("⚙️  Indexing (stub backend)...")
+        results = bench_index(library, args.workers)
+        print("🔍 Querying...")
+        results.update(bench_queries(library, args.repeats))
+    finally:
+        if tmp is not None:
+            tmp.cleanup()
+
+    record = {
+        'spec': {k: spec[k] for k in ('topics', 'books', 'pages', 'seed')},
+        'python': sys.version.split()[0],
+        'results': {name: round(value, 4) for name, value in results.items()}
+    }
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(record, f, indent=2)
+
+    baseline_path = BASELINES_DIR / f"{args.baseline}.json"
+    if args.save_baseline:
+        BASELINES_DIR.mkdir(parents=True, exist_ok=True)
+        with open(baseline_path, 'w') as f:
+            json.dump(record, f, indent=2)
+        compare(record['results'], {}, args.tolerance)
+        print(f"\n💾 Baseline saved: {baseline_path}")
+        return 0
+
+    if not baseline_path.exists():
+        compare(record['results'], {}, args.tolerance)
+        print(f"\n💡 No baseline at {baseline_path} (run with --save-baseline)")
+        return 0
+
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    if baseline.get('spec') != record['spec']:
+        print(f"⚠️  Baseline was recorded for {baseline.get('spec')}, not {record['spec']}")
+
+    regressions = compare(record['results'], baseline['results'], args.tolerance)
+    if regressions:
+        print(f"\n❌ {len(regressions)} regressions beyond {args.tolerance:.0%}: {', '.join(regressions)}")
+        return 1
+    print(f"\n✅ Within {args.tolerance:.0%} of baseline '{args.baseline}'")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
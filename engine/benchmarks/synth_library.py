@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Deterministic synthetic library for benchmarks
+
+Generates topics × books × pages of PDFs (PyMuPDF) and EPUBs (ebooklib)
+filled with seeded pseudo-prose. The same arguments always produce the same
+text, so index sizes and query results are comparable between runs.
+
+Layout:
+    <root>/synthetic/topic_NN/book_NNN.pdf|.epub
+    <root>/.synthetic.json      (generation parameters; reused if unchanged)
+
+Usage:
+    python synth_library.py /tmp/bench-books --topics 4 --books 6 --pages 20
+"""
+
+import sys
+import json
+import random
+import shutil
+import argparse
+from pathlib import Path
+from typing import Dict, List
+
+SPEC_FILE = '.synthetic.json'
+
+# Shared vocabulary plus per-topic words, so topics are separable by content
+COMMON_WORDS = (
+    'the of and to in a is that for it as with was on be by this are from at or an which '
+    'not have has but they their its were been one all more these can such also between '
+    'into than other only some would each when most however through both those'
+).split()
+
+SYLLABLES = ('ka', 'lo', 'mi', 'ne', 'ru', 'sa', 'te', 'vo', 'zi', 'ba', 'do', 'fu', 'gi', 'ha', 'pe', 'qui')
+
+WORDS_PER_PAGE = 350
+EPUB_SHARE = 0.25
+
+
+def _invent_words(rng: random.Random, count: int) -> List[str]:
+    return [''.join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))) for _ in range(count)]
+
+
+def _sentence(rng: random.Random, vocabulary: List[str]) -> str:
+    words = [rng.choice(vocabulary) for _ in range(rng.randint(8, 22))]
+    return ' '.join(words).capitalize() + '.'
+
+
+def _paragraphs(rng: random.Random, vocabulary: List[str], words: int) -> List[str]:
+    paragraphs, current, count = [], [], 0
+    while count < words:
+        sentence = _sentence(rng, vocabulary)
+        current.append(sentence)
+        count += sentence.count(' ') + 1
+        if len(current) >= rng.randint(3, 6):
+            paragraphs.append(' '.join(current))
+            current = []
+    if current:
+        paragraphs.append(' '.join(current))
+    return paragraphs
+
+
+def write_pdf(path: Path, title: str, pages: List[List[str]]) -> None:
+    import fitz
+
+    doc = fitz.open()
+    doc.set_metadata({'title': title, 'author': 'Synthetic Author'})
+    for paragraphs in pages:
+        page = doc.new_page()
+        rect = page.rect + (50, 50, -50, -50)
+        page.insert_textbox(rect, '\n\n'.join(paragraphs), fontsize=8)
+    doc.save(str(path))
+    doc.close()
+
+
+def write_epub(path: Path, title: str, pages: List[List[str]]) -> None:
+    from ebooklib import epub
+
+    book = epub.EpubBook()
+    book.set_identifier(path.stem)
+    book.set_title(title)
+    book.set_language('en')
+    book.add_author('Synthetic Author')
+
+    chapters = []
+    for n, paragraphs in enumerate(pages, start=1):
+        chapter = epub.EpubHtml(title=f"Chapter {n}", file_name=f"chapter_{n:03d}.xhtml", lang='en')
+        body = ''.join(f"<p>{p}</p>" for p in paragraphs)
+        chapter.content = f"<h1>Chapter {n}</h1>{body}"
+        book.add_item(chapter)
+        chapters.append(chapter)
+
+    book.toc = chapters
+    book.spine = ['nav'] + chapters
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+    epub.write_epub(str(path), book)
+
+
+def generate(root: Path, topics: int = 4, books: int = 6, pages: int = 20, seed: int = 1) -> Dict:
+    """
+    Create (or reuse) a synthetic library under root
+
+    Returns:
+        Generation spec with counts ({'topics', 'books', 'pages', 'seed', 'files'})
+    """
+    root = Path(root)
+    spec = {'topics': topics, 'books': books, 'pages': pages, 'seed': seed,
+            'words_per_page': WORDS_PER_PAGE, 'epub_share': EPUB_SHARE}
+
+    spec_path = root / SPEC_FILE
+    try:
+        with open(spec_path, 'r') as f:
+            stored = json.load(f)
+        if {k: stored.get(k) for k in spec} == spec:
+            return stored
+    except (OSError, ValueError):
+        pass
+
+    shutil.rmtree(root / 'synthetic', ignore_errors=True)
+    rng = random.Random(seed)
+    files = 0
+
+    for t in range(1, topics + 1):
+        topic_dir = root / 'synthetic' / f"topic_{t:02d}"
+        topic_dir.mkdir(parents=True, exist_ok=True)
+        vocabulary = COMMON_WORDS + _invent_words(rng, 200)
+
+        for b in range(1, books + 1):
+            title = f"Synthetic Topic {t} Book {b}"
+            book_pages = [_paragraphs(rng, vocabulary, WORDS_PER_PAGE) for _ in range(pages)]
+            if rng.random() < EPUB_SHARE:
+                write_epub(topic_dir / f"book_{b:03d}.epub", title, book_pages)
+            else:
+                write_pdf(topic_dir / f"book_{b:03d}.pdf", title, book_pages)
+            files += 1
+
+    spec['files'] = files
+    root.mkdir(parents=True, exist_ok=True)
+    with open(spec_path, 'w') as f:
+        json.dump(spec, f, indent=2)
+    return spec
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate a deterministic synthetic PDF/EPUB library')
+    parser.add_argument('root', help='Library directory (use as LIBRARIAN_BOOKS_DIR)')
+    parser.add_argument('--topics', type=int, default=4, help='Topic folders (default: 4)')
+    parser.add_argument('--books', type=int, default=6, help='Books per topic (default: 6)')
+    parser.add_argument('--pages', type=int, default=20, help='Pages per book (default: 20)')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed (default: 1)')
+    args = parser.parse_args()
+
+    spec = generate(Path(args.root), args.topics, args.books, args.pages, args.seed)
+    print(f"📚 {spec['files']} books in {spec['topics']} topics ({spec['pages']} pages each) → {args.root}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,311 @@
+#!/usr/bin/env python3
+"""
+Structured chunk filters compiled to row bitmaps
+
+Inverted/bitmap indexes over a topic's chunk store columns (see
+chunk_store.py), so query_library can restrict a vector search to chunks
+matching metadata before FAISS runs:
+
+    author    book_author, exact (case-insensitive), one value or a list (any)
+    tags      per-book tags from .topic-index.json, a tag or a list (any)
+    filetype  'pdf' / 'epub', one value or a list
+    chapter   EPUB chapter ID, one value or a list
+    page      PDF page, a number or an inclusive [first, last] range
+
+Fields combine with AND. A filter evaluates to a packed little-endian
+bitmap over chunk store rows (one bit per row), the layout FAISS
+IDSelectorBitmap takes as is.
+
+Per value, rows are kept as a posting list (CSR: row numbers grouped by
+column code) and, for values covering at least 1/DENSE_FRACTION of the
+topic, also as a precomputed bitmap; pages as rows sorted by page number
+with prefix bitmaps at PAGE_CHECKPOINTS points of that order.
+Indexes are built once per loaded topic from the memory-mapped columns, so
+evaluating a filter is a few slices, ORs and ANDs: sub-millisecond even
+on topics with a million chunks.
+
+Usage:
+    python chunk_filters.py TOPIC_ID --author "Jane Doe" --pages 10-40   # Matching chunk count + timing
+"""
+
+import sys
+import json
+import time
+import argparse
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from chunk_store import ChunkStore, CHUNK_STORE_NAME, INT_MISSING
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
+# Filter field → chunk store column
+FILTER_COLUMNS = {
+    'author': 'book_author',
+    'filetype': 'filetype',
+    'chapter': 'chapter',
+    'page': 'page',
+    'tags': 'book_id'
+}
+FILTER_FIELDS = tuple(FILTER_COLUMNS)
+
+# Values in at least 1/DENSE_FRACTION of rows also get a precomputed bitmap
+DENSE_FRACTION = 32
+
+# Page ranges: prefix bitmaps at this many points of the page order, so a
+# wide range costs two XORs plus at most half a step of rows per end
+PAGE_CHECKPOINTS = 16
+
+# Row sets under 1/SPARSE_FRACTION of the topic are set bit by bit, larger
+# ones through a full-size mask (numpy scatter-or is slow per element)
+SPARSE_FRACTION = 256
+
+
+def _as_list(value) -> List:
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def validate_filters(filters: Optional[Dict]) -> Dict:
+    """
+    Normalize a filter dict, dropping empty fields
+
+    Raises:
+        ValueError: Unknown field or malformed page range
+    """
+    normalized = {}
+    for field, value in (filters or {}).items():
+        if field not in FILTER_COLUMNS:
+            raise ValueError(f"Unknown filter: {field} (expected one of {', '.join(FILTER_FIELDS)})")
+        if value is None or value == [] or value == '':
+            continue
+        if field == 'page':
+            bounds = _as_list(value)
+            if len(bounds) == 1:
+                bounds = bounds * 2
+            if len(bounds) != 2:
+                raise ValueError(f"page filter takes a page or [first, last], got {value!r}")
+            normalized[field] = (None if bounds[0] is None else int(bounds[0]),
+                                 None if bounds[1] is None else int(bounds[1]))
+        else:
+            normalized[field] = [str(v) for v in _as_list(value)]
+    return normalized
+
+
+def matches(chunk: Dict, filters: Dict, book_tags: Dict[str, Sequence[str]]) -> bool:
+    """Evaluate normalized filters on one chunk record (legacy .chunks.json topics)"""
+    for field, value in filters.items():
+        if field == 'page':
+            page = chunk.get('page')
+            first, last = value
+            if not isinstance(page, int) or (first is not None and page < first) or (last is not None and page > last):
+                return False
+        elif field == 'tags':
+            if not set(value) & set(book_tags.get(chunk.get('book_id'), ())):
+                return False
+        else:
+            wanted = {v.lower() for v in value}
+            if str(chunk.get(FILTER_COLUMNS[field])).lower() not in wanted:
+                return False
+    return True
+
+
+class _Postings:
+    """Rows of every code of an interned column, grouped by code (CSR)"""
+
+    def __init__(self, codes: np.ndarray, values: List, count: int):
+        self.rows = np.argsort(codes, kind='stable').astype(np.int64)
+        self.starts = np.searchsorted(codes[self.rows], np.arange(len(values) + 1))
+        self.codes_of = {}
+        for code, value in enumerate(values):
+            if value is not None:
+                self.codes_of.setdefault(str(value).lower(), []).append(code)
+
+        # Frequent values (filetype, a prolific author) also as ready bitmaps
+        self.bitmaps = {}
+        for code in np.flatnonzero(np.diff(self.starts) * DENSE_FRACTION >= max(1, count)):
+            mask = np.zeros(count, dtype=bool)
+            mask[self.rows[self.starts[code]:self.starts[code + 1]]] = True
+            self.bitmaps[int(code)] = np.packbits(mask, bitorder='little')
+
+    def code_rows(self, code: int) -> np.ndarray:
+        return self.rows[self.starts[code]:self.starts[code + 1]]
+
+
+class ChunkFilterIndex:
+    """
+    Bitmap/inverted indexes over one topic's chunk store
+
+    Args:
+        store: The topic's ChunkStore
+        books: Book entries of .topic-index.json (for tags)
+    """
+
+    def __init__(self, store: ChunkStore, books: Sequence[Dict] = ()):
+        self.count = len(store)
+        self.nbytes = (self.count + 7) // 8
+        self._store = store
+        self._postings = {}
+        self._pages = None
+        self._book_tags = {}
+        for book in books:
+            for tag in book.get('tags', []):
+                self._book_tags.setdefault(str(tag).lower(), []).append(book['id'])
+
+    def _column_postings(self, column: str) -> Optional[_Postings]:
+        if column not in self._postings:
+            values = self._store.column_values(column) if column in self._store.fields else None
+            self._postings[column] = (_Postings(self._store.column(column), values, self.count)
+                                      if values is not None else None)
+        return self._postings[column]
+
+    def _empty(self) -> np.ndarray:
+        return np.zeros(self.nbytes, dtype=np.uint8)
+
+    def _set_rows(self, bits: np.ndarray, rows: np.ndarray, op=np.bitwise_or) -> None:
+        """Set (or with op=np.bitwise_xor, flip) the bits of distinct rows"""
+        if len(rows) * SPARSE_FRACTION < self.count:
+            op.at(bits, rows >> 3, (1 << (rows & 7)).astype(np.uint8))
+        else:
+            op(bits, bitmap_from_rows(rows, self.count), out=bits)
+
+    def _values_bitmap(self, column: str, values: Sequence[str]) -> np.ndarray:
+        bits = self._empty()
+        postings = self._column_postings(column)
+        if postings is None:
+            return bits
+        for value in values:
+            for code in postings.codes_of.get(value.lower(), ()):
+                if code in postings.bitmaps:
+                    bits |= postings.bitmaps[code]
+                else:
+                    self._set_rows(bits, postings.code_rows(code))
+        return bits
+
+    def _page_bitmap(self, first: Optional[int], last: Optional[int]) -> np.ndarray:
+        bits = self._empty()
+        if 'page' not in self._store.fields or self._store.column_values('page') is not None:
+            return bits
+        if self._pages is None:
+            pages = self._store.column('page')
+            order = np.argsort(pages, kind='stable').astype(np.int64)
+            # Bitmaps of the first i rows in page order, every `step` rows
+            step = max(1, -(-len(order) // PAGE_CHECKPOINTS))
+            prefixes, current = {0: self._empty()}, self._empty()
+            for position in range(step, len(order) + step, step):
+                position = min(position, len(order))
+                current = current.copy()
+                self._set_rows(current, order[position - min(step, position):position])
+                prefixes[position] = current
+            self._pages = (order, pages[order], step, prefixes)
+        order, sorted_pages, step, prefixes = self._pages
+
+        # Nulls/missing sort first (most negative int64) and are never in range
+        low = max(first if first is not None else INT_MISSING + 1, INT_MISSING + 1)
+        start = int(np.searchsorted(sorted_pages, low, side='left'))
+        end = int(np.searchsorted(sorted_pages, last, side='right')) if last is not None else len(sorted_pages)
+        if end - start <= step:
+            self._set_rows(bits, order[start:end])
+            return bits
+
+        # Wide range: prefix(end) ^ prefix(start), each from its nearest checkpoint
+        for position in (start, end):
+            checkpoint = min(round(position / step) * step, len(order))
+            bits ^= prefixes[checkpoint]
+            low_pos, high_pos = sorted((checkpoint, position))
+            self._set_rows(bits, order[low_pos:high_pos], np.bitwise_xor)
+        return bits
+
+    def bitmap(self, filters: Dict) -> np.ndarray:
+        """
+        Packed row bitmap of chunks matching all (normalized) filters
+
+        Returns:
+            uint8 array of ceil(rows / 8) bytes, bit r (little-endian) = row r
+        """
+        result = None
+        for field, value in filters.items():
+            if field == 'page':
+                bits = self._page_bitmap(*value)
+            elif field == 'tags':
+                book_ids = [book_id for tag in value for book_id in self._book_tags.get(tag.lower(), ())]
+                bits = self._values_bitmap('book_id', book_ids)
+            else:
+                bits = self._values_bitmap(FILTER_COLUMNS[field], value)
+            result = bits if result is None else np.bitwise_and(result, bits, out=result)
+        if result is None:
+            result = np.full(self.nbytes, 0xFF, dtype=np.uint8)
+        return result
+
+    def rows(self, bits: np.ndarray) -> np.ndarray:
+        """Row numbers set in a bitmap, ascending"""
+        return np.flatnonzero(np.unpackbits(bits, count=self.count, bitorder='little'))
+
+
+def bitmap_from_rows(rows: np.ndarray, count: int) -> np.ndarray:
+    """Packed bitmap with the given rows set (same layout as ChunkFilterIndex.bitmap)"""
+    mask = np.zeros(count, dtype=bool)
+    mask[rows] = True
+    return np.packbits(mask, bitorder='little')
+
+
+def parse_pages(text: str):
+    """'12' → (12, 12), '10-40' → (10, 40), '10-' → (10, None)"""
+    first, _, last = text.partition('-')
+    if not _:
+        return int(first), int(first)
+    return (int(first) if first else None), (int(last) if last else None)
+
+
+def add_filter_arguments(parser: argparse.ArgumentParser) -> None:
+    """Structured filter options shared by research.py and this CLI"""
+    parser.add_argument('--author', action='append', help='Only chunks by this author (repeatable, any)')
+    parser.add_argument('--tag', action='append', dest='tags', help='Only books with this tag (repeatable, any)')
+    parser.add_argument('--filetype', choices=['pdf', 'epub'], help='Only PDF or EPUB chunks')
+    parser.add_argument('--chapter', action='append', help='Only this EPUB chapter ID (repeatable, any)')
+    parser.add_argument('--pages', type=parse_pages, help='Only PDF pages in a range, e.g. 10-40 or 12')
+
+
+def filters_from_args(args) -> Dict:
+    filters = {'author': args.author, 'tags': args.tags, 'filetype': args.filetype,
+               'chapter': args.chapter, 'page': list(args.pages) if args.pages else None}
+    return {field: value for field, value in filters.items() if value}
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Count chunks matching structured filters in a topic')
+    parser.add_argument('topic', help='Topic ID')
+    add_filter_arguments(parser)
+    args = parser.parse_args()
+
+    with open(MAIN_METADATA, 'r') as f:
+        topic = next((t for t in json.load(f)['topics'] if t['id'] == args.topic), None)
+    if topic is None:
+        print(f"❌ Topic not found: {args.topic}")
+        return 1
+
+    topic_dir = LIBRARY_ROOT / topic['path']
+    try:
+        with open(topic_dir / ".topic-index.json", 'r') as f:
+            books = json.load(f).get('books', [])
+    except (OSError, ValueError):
+        books = []
+
+    store = ChunkStore(topic_dir / CHUNK_STORE_NAME)
+    filters = validate_filters(filters_from_args(args))
+
+    started = time.perf_counter()
+    index = ChunkFilterIndex(store, books)
+    index.bitmap(filters)
+    build = time.perf_counter() - started
+
+    started = time.perf_counter()
+    matched = len(index.rows(index.bitmap(filters)))
+    evaluate = time.perf_counter() - started
+
+    print(f"🔎 {args.topic}: {matched}/{len(store)} chunks match {filters}")
+    print(f"   Index build {build * 1000:.1f} ms, filter {evaluate * 1000:.3f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,486 @@
+#!/usr/bin/env python3
+"""
+Compact, memory-mapped chunk store (.chunks.bin) replacing .chunks.json
+
+.chunks.json repeats book_title/book_author/topic_id on every chunk and has
+to be parsed whole to read the five chunks a query returns. The chunk store
+keeps the same records column-wise in one file that is memory-mapped, so
+opening a topic costs a footer read regardless of its size and a chunk is
+read only when asked for:
+
+    magic
+    text blob           chunk_full of every chunk, UTF-8, concatenated
+    text offsets        uint64[count + 1] into the blob
+    int columns         int64[count] (chunk_id, chunk_index, page, ...)
+    interned columns    uint32[count] codes into a value table (book_title, ...)
+    footer              JSON: count, field order, column offsets, value tables
+    footer length, magic
+
+Columns are typed from the data: a field holding only integers is an int
+column, anything else is interned (each distinct value stored once). Rows
+are in FAISS add order; chunk IDs are increasing for stores written by
+index_library.py, so ID → row is a binary search.
+
+Usage:
+    python chunk_store.py convert --all             # .chunks.json → .chunks.bin
+    python chunk_store.py convert TOPIC_ID --keep-json
+    python chunk_store.py stats
+"""
+
+import os
+import sys
+import json
+import mmap
+import struct
+import argparse
+from array import array
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
+CHUNK_STORE_NAME = ".chunks.bin"
+LEGACY_CHUNKS_NAME = ".chunks.json"
+
+MAGIC = b'LIBCHK01'
+STORE_VERSION = 1
+TEXT_FIELD = 'chunk_full'
+
+# Int column sentinels (field None / field absent from the record)
+INT_NULL = -(1 << 63)
+INT_MISSING = INT_NULL + 1
+
+# Interned column sentinels
+CODE_NULL = 0xFFFFFFFF
+CODE_MISSING = 0xFFFFFFFE
+
+# Stable chunk IDs: (book index_key << CHUNK_ID_BITS) | chunk number in book.
+# Every (re)indexed book gets a fresh index_key, so IDs only ever grow.
+CHUNK_ID_BITS = 20
+
+# Bytes read per step while streaming a .chunks.json
+JSON_READ_SIZE = 1 << 20
+
+
+def book_id_range(index_key: int) -> Tuple[int, int]:
+    """Chunk ID range [start, end) reserved for one indexed book"""
+    return index_key << CHUNK_ID_BITS, (index_key + 1) << CHUNK_ID_BITS
+
+
+class _Column:
+    """One field while writing: int64 values until a non-integer shows up, then interned codes"""
+
+    def __init__(self, rows_before: int):
+        self.ints: Optional[array] = array('q', [INT_MISSING]) * rows_before
+        self.codes: Optional[array] = None
+        self.values: List[Any] = []
+        self._table: Dict[Any, int] = {}
+
+    def _intern(self, value: Any) -> int:
+        if value is None:
+            return CODE_NULL
+        key = value if type(value) is str else ('json', json.dumps(value, sort_keys=True))
+        code = self._table.get(key)
+        if code is None:
+            code = self._table[key] = len(self.values)
+            self.values.append(value)
+        return code
+
+    def _to_interned(self) -> None:
+        sentinels = {INT_NULL: CODE_NULL, INT_MISSING: CODE_MISSING}
+        self.codes = array('I', (sentinels[v] if v in sentinels else self._intern(v) for v in self.ints))
+        self.ints = None
+
+    def append(self, value: Any) -> None:
+        if self.ints is not None:
+            if value is None:
+                self.ints.append(INT_NULL)
+                return
+            if type(value) is int and INT_MISSING < value < (1 << 63):
+                self.ints.append(value)
+                return
+            self._to_interned()
+        self.codes.append(self._intern(value))
+
+    def append_missing(self) -> None:
+        if self.ints is not None:
+            self.ints.append(INT_MISSING)
+        else:
+            self.codes.append(CODE_MISSING)
+
+
+class ChunkStoreWriter:
+    """
+    Streams chunk records into a .chunks.bin file.
+
+    Texts go straight to disk; only per-chunk offsets and column codes
+    (a few bytes per field) are kept in memory until close().
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.count = 0
+        self._fields: Dict[str, _Column] = {}
+        self._offsets = array('Q', [0])
+        self._file = open(self.path, 'wb')
+        self._file.write(MAGIC)
+
+    def append(self, record: Dict) -> None:
+        text = record.get(TEXT_FIELD)
+        if not isinstance(text, str):
+            raise ValueError(f"Chunk {self.count} has no {TEXT_FIELD} text")
+        data = text.encode('utf-8')
+        self._file.write(data)
+        self._offsets.append(self._offsets[-1] + len(data))
+
+        for name, value in record.items():
+            if name == TEXT_FIELD:
+                continue
+            column = self._fields.get(name)
+            if column is None:
+                column = self._fields[name] = _Column(self.count)
+            column.append(value)
+        self.count += 1
+
+        # Fields this record lacks
+        if len(self._fields) + 1 > len(record):
+            for name, column in self._fields.items():
+                if name not in record:
+                    column.append_missing()
+
+    def _write_array(self, values: array) -> int:
+        position = self._file.tell()
+        padding = -position % 8
+        if padding:
+            self._file.write(b'\0' * padding)
+            position += padding
+        if sys.byteorder != 'little':
+            values = array(values.typecode, values)
+            values.byteswap()
+        values.tofile(self._file)
+        return position
+
+    def close(self) -> int:
+        """Write offsets, columns and footer; returns the number of chunks"""
+        footer = {
+            'version': STORE_VERSION,
+            'count': self.count,
+            'text_field': TEXT_FIELD,
+            'fields': [TEXT_FIELD] + list(self._fields),
+            'offsets': self._write_array(self._offsets),
+            'columns': {}
+        }
+        for name, column in self._fields.items():
+            if column.ints is not None:
+                footer['columns'][name] = {'kind': 'int', 'offset': self._write_array(column.ints)}
+            else:
+                footer['columns'][name] = {'kind': 'interned', 'offset': self._write_array(column.codes),
+                                           'values': column.values}
+
+        ids = self._fields.get('chunk_id')
+        footer['ids_sorted'] = bool(
+            ids is not None and ids.ints is not None
+            and all(a < b for a, b in zip(ids.ints, ids.ints[1:]))
+            and (not ids.ints or ids.ints[0] > INT_MISSING)
+        )
+
+        data = json.dumps(footer, ensure_ascii=False).encode('utf-8')
+        self._file.write(data)
+        self._file.write(struct.pack('<Q', len(data)))
+        self._file.write(MAGIC)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        return self.count
+
+    def abort(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+class ChunkStore:
+    """
+    Read-only, memory-mapped view of a .chunks.bin file.
+
+    store[row] returns the chunk record as written (same keys and values
+    as the .chunks.json record it replaces).
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            self._mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size = len(self._mm)
+        if size < 2 * len(MAGIC) + 8 or self._mm[:len(MAGIC)] != MAGIC or self._mm[-len(MAGIC):] != MAGIC:
+            self._mm.close()
+            raise ValueError(f"Not a chunk store (or truncated): {self.path}")
+
+        footer_end = size - len(MAGIC) - 8
+        (footer_len,) = struct.unpack('<Q', self._mm[footer_end:footer_end + 8])
+        footer = json.loads(self._mm[footer_end - footer_len:footer_end].decode('utf-8'))
+        if footer.get('version') != STORE_VERSION:
+            self._mm.close()
+            raise ValueError(f"Unsupported chunk store version {footer.get('version')}: {self.path}")
+
+        self.count = footer['count']
+        self.fields = footer['fields']
+        self.ids_sorted = footer['ids_sorted']
+        self._text_field = footer['text_field']
+        self._offsets = np.frombuffer(self._mm, dtype='<u8', count=self.count + 1, offset=footer['offsets'])
+        self._columns = {}
+        for name, column in footer['columns'].items():
+            if column['kind'] == 'int':
+                self._columns[name] = (np.frombuffer(self._mm, dtype='<i8', count=self.count,
+                                                     offset=column['offset']), None)
+            else:
+                self._columns[name] = (np.frombuffer(self._mm, dtype='<u4', count=self.count,
+                                                     offset=column['offset']), column['values'])
+        self._id_to_row = None
+
+    def __len__(self) -> int:
+        return self.count
+
+    def text(self, row: int) -> str:
+        start, end = int(self._offsets[row]), int(self._offsets[row + 1])
+        return self._mm[len(MAGIC) + start:len(MAGIC) + end].decode('utf-8')
+
+    def value(self, name: str, row: int) -> Any:
+        """One field of one chunk (None if null or absent)"""
+        if name == self._text_field:
+            return self.text(row)
+        column = self._columns.get(name)
+        if column is None:
+            return None
+        data, values = column
+        raw = int(data[row])
+        if values is None:
+            return None if raw <= INT_MISSING else raw
+        return None if raw >= CODE_MISSING else values[raw]
+
+    def __getitem__(self, row: int) -> Dict:
+        if not -self.count <= row < self.count:
+            raise IndexError(row)
+        row %= self.count
+        record = {}
+        for name in self.fields:
+            if name == self._text_field:
+                record[name] = self.text(row)
+                continue
+            data, values = self._columns[name]
+            raw = int(data[row])
+            if values is None:
+                if raw != INT_MISSING:
+                    record[name] = None if raw == INT_NULL else raw
+            elif raw != CODE_MISSING:
+                record[name] = None if raw == CODE_NULL else values[raw]
+        return record
+
+    def __iter__(self) -> Iterator[Dict]:
+        for row in range(self.count):
+            yield self[row]
+
+    def column(self, name: str) -> np.ndarray:
+        """Raw column array (int64 values or uint32 codes into column_values(name))"""
+        return self._columns[name][0]
+
+    def column_values(self, name: str) -> Optional[List]:
+        """Value table of an interned column (None for int columns)"""
+        return self._columns[name][1]
+
+    @property
+    def chunk_ids(self) -> Optional[np.ndarray]:
+        column = self._columns.get('chunk_id')
+        return column[0] if column is not None and column[1] is None else None
+
+    def row_of(self, chunk_id: int) -> int:
+        """Row of a chunk ID (FAISS search result), -1 if unknown"""
+        ids = self.chunk_ids
+        if ids is None:
+            return chunk_id if 0 <= chunk_id < self.count else -1
+        if self.ids_sorted:
+            row = int(np.searchsorted(ids, chunk_id))
+            return row if row < self.count and ids[row] == chunk_id else -1
+        if self._id_to_row is None:
+            self._id_to_row = {int(cid): row for row, cid in enumerate(ids)}
+        return self._id_to_row.get(int(chunk_id), -1)
+
+    def id_rows(self, start: int, stop: int) -> Optional[Tuple[int, int]]:
+        """
+        Rows holding the chunk IDs in [start, stop), e.g. one book's range
+        (without stored IDs, chunk IDs are row numbers)
+
+        Returns:
+            (first_row, end_row), or None if IDs are not stored in increasing order
+        """
+        ids = self.chunk_ids
+        if ids is None:
+            return min(max(start, 0), self.count), min(max(stop, 0), self.count)
+        if not self.ids_sorted:
+            return None
+        return int(np.searchsorted(ids, start)), int(np.searchsorted(ids, stop))
+
+    def close(self) -> None:
+        # numpy views must go before the map can close; arrays still held
+        # by callers keep it alive until they are collected
+        self._offsets = None
+        self._columns = {}
+        try:
+            self._mm.close()
+        except BufferError:
+            pass
+
+
+def iter_json_chunks(path: Path, read_size: int = JSON_READ_SIZE) -> Iterator[Dict]:
+    """Stream the records of a .chunks.json array without loading the whole file"""
+    decoder = json.JSONDecoder()
+    whitespace = ' \t\r\n'
+
+    with open(path, 'r', encoding='utf-8') as f:
+        buffer = f.read(read_size)
+        pos = 0
+        eof = not buffer
+
+        def skip(chars: str) -> None:
+            nonlocal pos
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+
+        skip(whitespace)
+        if buffer[pos:pos + 1] != '[':
+            raise ValueError(f"{path} is not a JSON array")
+        pos += 1
+
+        while True:
+            skip(whitespace + ',')
+            if pos < len(buffer) and buffer[pos] == ']':
+                return
+            try:
+                if pos >= len(buffer):
+                    raise json.JSONDecodeError('Need more data', buffer, pos)
+                record, end = decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                if eof:
+                    raise ValueError(f"Truncated or invalid JSON in {path} (at char {pos})")
+                more = f.read(max(read_size, len(buffer) - pos))
+                eof = not more
+                buffer = buffer[pos:] + more
+                pos = 0
+                continue
+            yield record
+            pos = end
+
+
+def chunks_file(topic_dir: Path) -> Optional[Path]:
+    """The topic's chunk store, else its legacy .chunks.json, else None"""
+    for name in (CHUNK_STORE_NAME, LEGACY_CHUNKS_NAME):
+        path = Path(topic_dir) / name
+        if path.exists():
+            return path
+    return None
+
+
+def iter_chunks(path: Path) -> Iterator[Dict]:
+    """Records of a chunk store or legacy .chunks.json, streamed"""
+    if Path(path).name == LEGACY_CHUNKS_NAME:
+        yield from iter_json_chunks(path)
+        return
+    store = ChunkStore(path)
+    try:
+        yield from store
+    finally:
+        store.close()
+
+
+def open_chunks(path: Path) -> Union[ChunkStore, List[Dict]]:
+    """Random-access chunks: memory-mapped store, or the parsed legacy JSON list"""
+    if Path(path).name == LEGACY_CHUNKS_NAME:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    return ChunkStore(path)
+
+
+def convert_json(json_path: Path, store_path: Optional[Path] = None) -> int:
+    """
+    Convert a .chunks.json to a chunk store (streaming, atomic)
+
+    Returns:
+        Number of chunks converted
+    """
+    json_path = Path(json_path)
+    store_path = Path(store_path) if store_path else json_path.with_name(CHUNK_STORE_NAME)
+    tmp = store_path.with_name(store_path.name + '.tmp')
+
+    writer = ChunkStoreWriter(tmp)
+    try:
+        for record in iter_json_chunks(json_path):
+            writer.append(record)
+        count = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    os.replace(tmp, store_path)
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert and inspect topic chunk stores')
+    parser.add_argument('command', choices=['convert', 'stats'])
+    parser.add_argument('topics', nargs='*', help='Topic IDs (default with --all: every topic)')
+    parser.add_argument('--all', action='store_true', help='All topics in the library index')
+    parser.add_argument('--keep-json', action='store_true', help='Keep .chunks.json after converting')
+    args = parser.parse_args()
+
+    with open(MAIN_METADATA, 'r') as f:
+        registry = json.load(f)
+    topics = registry.get('topics', [])
+    if args.topics:
+        topics = [t for t in topics if t['id'] in args.topics]
+    elif args.command == 'convert' and not args.all:
+        parser.error('give topic IDs or --all')
+
+    if args.command == 'convert':
+        converted = 0
+        for topic in topics:
+            topic_dir = LIBRARY_ROOT / topic['path']
+            json_path = topic_dir / LEGACY_CHUNKS_NAME
+            if not json_path.exists():
+                continue
+            before = json_path.stat().st_size
+            try:
+                count = convert_json(json_path)
+            except (OSError, ValueError) as e:
+                print(f"   ❌ {topic['id']}: {e}")
+                continue
+            after = (topic_dir / CHUNK_STORE_NAME).stat().st_size
+            if not args.keep_json:
+                json_path.unlink()
+            converted += 1
+            print(f"   ✓ {topic['id']}: {count} chunks, {before / 1024 / 1024:.1f} MB → {after / 1024 / 1024:.1f} MB")
+        print(f"📦 Converted {converted} topics")
+
+    elif args.command == 'stats':
+        stores = legacy = size = chunks = 0
+        for topic in topics:
+            path = chunks_file(LIBRARY_ROOT / topic['path'])
+            if path is None:
+                continue
+            size += path.stat().st_size
+            if path.name == LEGACY_CHUNKS_NAME:
+                legacy += 1
+                continue
+            store = ChunkStore(path)
+            stores += 1
+            chunks += len(store)
+            store.close()
+        print(f"📦 Chunk stores: {stores} topics, {chunks} chunks ({size / 1024 / 1024:.1f} MB incl. legacy)")
+        if legacy:
+            print(f"   💡 {legacy} topics still on .chunks.json (python chunk_store.py convert --all)")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
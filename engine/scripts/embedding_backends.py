@@ -0,0 +1,381 @@
+#!/usr/bin/env python3
+"""
+Pluggable embedding backends: PyTorch (default) or ONNX Runtime (fp32 / int8)
+
+Indexing and query latency are dominated by running the embedding model in
+fp32 PyTorch on CPU. The ONNX backends export the model once into
+engine/models/onnx/<model>/ (optionally dynamically quantized to int8) and
+run it with ONNX Runtime. Every export runs a parity check against PyTorch
+and records the cosine agreement; loading an export whose agreement is
+below PARITY_THRESHOLD prints a warning instead of silently degrading
+retrieval.
+
+The stub backend needs no model at all: it hashes words into fixed random
+directions, so benchmarks can measure indexing/search plumbing without
+model cost. Its vectors carry no meaning beyond word overlap.
+
+Usage:
+    python embedding_backends.py export             # fp32 + int8 export, parity check
+    python embedding_backends.py parity --backend onnx-int8
+"""
+
+import os
+import sys
+import json
+import time
+import zlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional
+
+import numpy as np
+
+# Paths
+MODELS_DIR = Path(__file__).parent.parent / "models"
+ONNX_DIR = MODELS_DIR / "onnx"
+
+DEFAULT_MODEL = "BAAI/bge-small-en-v1.5"
+BACKENDS = ('torch', 'onnx', 'onnx-int8', 'stub')
+
+# Minimum mean cosine agreement with PyTorch for an export to be trusted
+PARITY_THRESHOLD = 0.99
+
+# Texts used for the parity check (mix of lengths and registers)
+PARITY_TEXTS = [
+    "What is mutual aid?",
+    "Chapter 3",
+    "Debt: The First 5,000 Years argues that credit systems preceded coinage.",
+    "Seeing Like a State examines how high-modernist schemes to improve the human "
+    "condition have failed, focusing on legibility, simplification and the erasure "
+    "of local practical knowledge (mētis).",
+    "Threat modeling starts by enumerating assets, adversaries and attack surfaces.",
+    "Temporary Autonomous Zone",
+    "Knead the dough for ten minutes, then let it rest covered at room temperature "
+    "until doubled in size, about an hour.",
+    "Table of Contents  1  Introduction  7  2  Background  19",
+]
+
+
+def export_dir(model_name: str) -> Path:
+    return ONNX_DIR / model_name.replace('/', '__')
+
+
+def onnx_file(model_name: str, backend: str) -> Path:
+    return export_dir(model_name) / ('model.int8.onnx' if backend == 'onnx-int8' else 'model.onnx')
+
+
+def load_export_info(model_name: str) -> Dict:
+    info_file = export_dir(model_name) / 'export.json'
+    if not info_file.exists():
+        return {}
+    with open(info_file, 'r') as f:
+        return json.load(f)
+
+
+class OnnxEmbedder:
+    """
+    ONNX Runtime encoder exposing the subset of the SentenceTransformer API
+    used by the indexer and research.py (encode, tokenizer, max_seq_length,
+    get_sentence_embedding_dimension).
+    """
+
+    def __init__(self, model_name: str, backend: str = 'onnx', threads: Optional[int] = None,
+                 warn_parity: bool = True):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer, AutoConfig
+
+        path = onnx_file(model_name, backend)
+        if not path.exists():
+            raise FileNotFoundError(
+                f"{path} missing - run: python engine/scripts/embedding_backends.py export"
+            )
+
+        info = load_export_info(model_name)
+        self.model_name = model_name
+        self.backend = backend
+        self.pooling = info.get('pooling', 'cls')
+        self.normalize = info.get('normalize', True)
+        self.max_seq_length = info.get('max_seq_length', 512)
+        self.tokenizer = AutoTokenizer.from_pretrained(str(export_dir(model_name)))
+        self.config = AutoConfig.from_pretrained(str(export_dir(model_name)))
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(path), options, providers=['CPUExecutionProvider'])
+        self.input_names = {i.name for i in self.session.get_inputs()}
+
+        # Off for parity_check itself, which loads the export before any result is recorded
+        if warn_parity:
+            parity = info.get('parity', {}).get(backend)
+            if parity is None:
+                print(f"⚠️  No parity check recorded for {backend} export of {model_name}", file=sys.stderr)
+            elif parity['mean_cosine'] < PARITY_THRESHOLD:
+                print(f"⚠️  {backend} export of {model_name} agrees with PyTorch at only "
+                      f"{parity['mean_cosine']:.4f} mean cosine (threshold {PARITY_THRESHOLD})", file=sys.stderr)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config.hidden_size
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        outputs = []
+        for start in range(0, len(texts), batch_size):
+            batch = self.tokenizer(
+                texts[start:start + batch_size], padding=True, truncation=True,
+                max_length=self.max_seq_length, return_tensors='np'
+            )
+            feeds = {name: batch[name].astype(np.int64) for name in batch if name in self.input_names}
+            hidden = self.session.run(['last_hidden_state'], feeds)[0]
+
+            if self.pooling == 'mean':
+                mask = batch['attention_mask'][..., None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+            else:
+                pooled = hidden[:, 0]
+
+            if self.normalize:
+                pooled = pooled / np.clip(np.linalg.norm(pooled, axis=1, keepdims=True), 1e-12, None)
+            outputs.append(pooled.astype(np.float32))
+
+        embeddings = np.concatenate(outputs) if outputs else np.empty((0, self.get_sentence_embedding_dimension()), np.float32)
+        return embeddings[0] if single else embeddings
+
+
+class StubEmbedder:
+    """
+    Deterministic model-free encoder (benchmarks): L2-normalized hashed
+    bag of words, same dimension and API subset as the real model.
+    """
+
+    def __init__(self, dim: int = 384, max_seq_length: int = 512):
+        self.dim = dim
+        self.max_seq_length = max_seq_length
+        self.config = None
+        self._buckets = {}
+
+    def _token_ids(self, text: str) -> List[int]:
+        ids = []
+        for word in text.lower().split():
+            bucket = self._buckets.get(word)
+            if bucket is None:
+                bucket = self._buckets[word] = zlib.crc32(word.encode('utf-8'))
+            ids.append(bucket)
+        return ids
+
+    def tokenizer(self, texts, add_special_tokens: bool = True, truncation: bool = True,
+                  max_length: Optional[int] = None, **kwargs) -> Dict:
+        limit = max_length or self.max_seq_length
+        extra = 2 if add_special_tokens else 0
+        return {'input_ids': [self._token_ids(t)[:limit - extra] + [0] * extra for t in texts]}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, texts, batch_size: int = 32, show_progress_bar: bool = False,
+               convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        single = isinstance(texts, str)
+        if single:
+            texts = [texts]
+
+        embeddings = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            ids = np.array(self._token_ids(text)[:self.max_seq_length] or [0], dtype=np.uint32)
+            signs = np.where(ids & 1, 1.0, -1.0).astype(np.float32)
+            np.add.at(embeddings[row], (ids >> 1) % self.dim, signs)
+
+        embeddings /= np.clip(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12, None)
+        return embeddings[0] if single else embeddings
+
+
+class TokenizerOnly:
+    """
+    Model stand-in for planning batches (see embedding_batcher.BucketedEncoder):
+    tokenizer, max_seq_length, config and dimension, no weights. With an
+    embedding pool the models live in the workers; the indexer itself only
+    sorts texts by token length.
+    """
+
+    def __init__(self, tokenizer, config, max_seq_length: int):
+        self.tokenizer = tokenizer
+        self.config = config
+        self.max_seq_length = max_seq_length
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.config.hidden_size
+
+
+def load_tokenizer(model_name: str = DEFAULT_MODEL, backend: str = 'torch'):
+    """TokenizerOnly for the requested backend (the stub embedder has no weights to spare)"""
+    if backend == 'stub':
+        return StubEmbedder()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown embedding backend: {backend} (choose from {', '.join(BACKENDS)})")
+
+    from transformers import AutoTokenizer, AutoConfig
+
+    if backend == 'torch':
+        tokenizer = AutoTokenizer.from_pretrained(model_name, cache_dir=str(MODELS_DIR))
+        config = AutoConfig.from_pretrained(model_name, cache_dir=str(MODELS_DIR))
+        max_seq_length = min(tokenizer.model_max_length, config.max_position_embeddings)
+    else:
+        tokenizer = AutoTokenizer.from_pretrained(str(export_dir(model_name)))
+        config = AutoConfig.from_pretrained(str(export_dir(model_name)))
+        max_seq_length = load_export_info(model_name).get('max_seq_length', 512)
+    return TokenizerOnly(tokenizer, config, max_seq_length)
+
+
+def load_embedder(model_name: str = DEFAULT_MODEL, backend: str = 'torch', threads: Optional[int] = None):
+    """SentenceTransformer (torch), OnnxEmbedder or StubEmbedder for the requested backend"""
+    if backend == 'torch':
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(model_name, cache_folder=str(MODELS_DIR), device='cpu')
+    if backend in ('onnx', 'onnx-int8'):
+        return OnnxEmbedder(model_name, backend, threads)
+    if backend == 'stub':
+        return StubEmbedder()
+    raise ValueError(f"Unknown embedding backend: {backend} (choose from {', '.join(BACKENDS)})")
+
+
+def parity_check(model_name: str, backend: str, texts: List[str] = PARITY_TEXTS) -> Dict:
+    """
+    Compare a backend against PyTorch on the same texts
+
+    Returns:
+        {'mean_cosine', 'min_cosine', 'torch_ms', 'backend_ms'}
+    """
+    reference = load_embedder(model_name, 'torch')
+    candidate = OnnxEmbedder(model_name, backend, warn_parity=False)
+
+    started = time.perf_counter()
+    expected = np.asarray(reference.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    torch_ms = (time.perf_counter() - started) * 1000
+
+    started = time.perf_counter()
+    actual = np.asarray(candidate.encode(texts, convert_to_numpy=True), dtype=np.float32)
+    backend_ms = (time.perf_counter() - started) * 1000
+
+    expected /= np.linalg.norm(expected, axis=1, keepdims=True)
+    actual /= np.linalg.norm(actual, axis=1, keepdims=True)
+    cosines = (expected * actual).sum(axis=1)
+
+    return {
+        'mean_cosine': float(cosines.mean()),
+        'min_cosine': float(cosines.min()),
+        'torch_ms': round(torch_ms, 1),
+        'backend_ms': round(backend_ms, 1)
+    }
+
+
+def export_onnx(model_name: str = DEFAULT_MODEL, quantize: bool = True) -> Path:
+    """Export model to ONNX (and int8), then record pooling config and parity"""
+    import torch
+    from sentence_transformers import SentenceTransformer
+
+    st = SentenceTransformer(model_name, cache_folder=str(MODELS_DIR), device='cpu')
+    transformer = st[0].auto_model
+    tokenizer = st.tokenizer
+    out_dir = export_dir(model_name)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    pooling_module = next((m for m in st if type(m).__name__ == 'Pooling'), None)
+    pooling = 'mean' if pooling_module is not None and pooling_module.pooling_mode_mean_tokens else 'cls'
+    normalize = any(type(m).__name__ == 'Normalize' for m in st)
+
+    dummy = tokenizer(["librarian export"], return_tensors='pt')
+    input_names = [name for name in ('input_ids', 'attention_mask', 'token_type_ids') if name in dummy]
+    dynamic_axes = {name: {0: 'batch', 1: 'sequence'} for name in input_names}
+    dynamic_axes['last_hidden_state'] = {0: 'batch', 1: 'sequence'}
+
+    transformer.eval()
+    with torch.no_grad():
+        torch.onnx.export(
+            transformer,
+            tuple(dummy[name] for name in input_names),
+            str(out_dir / 'model.onnx'),
+            input_names=input_names,
+            output_names=['last_hidden_state'],
+            dynamic_axes=dynamic_axes,
+            opset_version=14
+        )
+    tokenizer.save_pretrained(str(out_dir))
+    transformer.config.save_pretrained(str(out_dir))
+    print(f"   ✓ {out_dir / 'model.onnx'}")
+
+    backends = ['onnx']
+    if quantize:
+        from onnxruntime.quantization import quantize_dynamic, QuantType
+        quantize_dynamic(str(out_dir / 'model.onnx'), str(out_dir / 'model.int8.onnx'), weight_type=QuantType.QInt8)
+        backends.append('onnx-int8')
+        print(f"   ✓ {out_dir / 'model.int8.onnx'}")
+
+    info = {
+        'model_name': model_name,
+        'pooling': pooling,
+        'normalize': normalize,
+        'max_seq_length': st.max_seq_length,
+        'exported_at': time.time(),
+        'parity': {}
+    }
+    with open(out_dir / 'export.json', 'w') as f:
+        json.dump(info, f, indent=2)
+
+    # Parity check (recorded, so loading a bad export warns)
+    for backend in backends:
+        info['parity'][backend] = parity_check(model_name, backend)
+    with open(out_dir / 'export.json', 'w') as f:
+        json.dump(info, f, indent=2)
+
+    return out_dir
+
+
+def print_parity(backend: str, result: Dict) -> None:
+    status = '✅' if result['mean_cosine'] >= PARITY_THRESHOLD else '❌'
+    speedup = result['torch_ms'] / result['backend_ms'] if result['backend_ms'] else 0
+    print(f"   {status} {backend}: mean cosine {result['mean_cosine']:.5f}, min {result['min_cosine']:.5f} "
+          f"({result['backend_ms']:.0f} ms vs torch {result['torch_ms']:.0f} ms, {speedup:.1f}x)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export/check ONNX embedding backends')
+    parser.add_argument('command', choices=['export', 'parity'])
+    parser.add_argument('--model', default=DEFAULT_MODEL, help=f'Model name (default: {DEFAULT_MODEL})')
+    parser.add_argument('--backend', choices=['onnx', 'onnx-int8'], help='Backend to check (default: all exported)')
+    parser.add_argument('--no-quantize', action='store_true', help='Skip int8 export')
+    args = parser.parse_args()
+
+    os.environ.setdefault('TOKENIZERS_PARALLELISM', 'false')
+
+    if args.command == 'export':
+        print(f"📦 Exporting {args.model} to ONNX...")
+        export_onnx(args.model, quantize=not args.no_quantize)
+        print("\n🔍 Parity vs PyTorch:")
+        for backend, result in load_export_info(args.model)['parity'].items():
+            print_parity(backend, result)
+        print("\n💡 Use with: index_library.py --backend onnx-int8 / LIBRARIAN_EMBED_BACKEND=onnx-int8")
+        return 0
+
+    backends = [args.backend] if args.backend else [
+        b for b in ('onnx', 'onnx-int8') if onnx_file(args.model, b).exists()
+    ]
+    if not backends:
+        print(f"❌ No ONNX export found for {args.model} - run: embedding_backends.py export")
+        return 1
+
+    print(f"🔍 Parity vs PyTorch ({len(PARITY_TEXTS)} texts):")
+    failed = False
+    for backend in backends:
+        result = parity_check(args.model, backend)
+        print_parity(backend, result)
+        failed = failed or result['mean_cosine'] < PARITY_THRESHOLD
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,172 @@
+#!/usr/bin/env python3
+"""
+Length-bucketed, self-tuning embedding batches
+
+A transformer pads every sequence in a batch to the longest one, so mixing
+page headers with full 1024-char chunks wastes most of the compute on
+padding. Texts are sorted by token length, grouped into length buckets,
+and each bucket is encoded with a batch size derived from a token budget:
+short buckets get big batches, long buckets small ones. The budget is
+tuned from measured tokens/sec and capped by an activation-memory
+ceiling. Vectors are returned in the caller's original order.
+"""
+
+import time
+from typing import List, Tuple
+
+import numpy as np
+
+# Padded sequence lengths used as buckets (tokens)
+LENGTH_BUCKETS = (16, 32, 64, 128, 256, 512)
+
+# Token budget per encode call: starting point and upper bound for tuning
+START_TOKEN_BUDGET = 4096
+MAX_TOKEN_BUDGET = 262144
+
+# Calls measured per budget before comparing throughput
+CALLS_PER_TRIAL = 3
+
+# Minimum throughput gain to keep growing the budget
+MIN_GAIN = 1.05
+
+
+def bucket_for(length: int) -> int:
+    """Smallest bucket that fits a sequence of `length` tokens"""
+    for bucket in LENGTH_BUCKETS:
+        if length <= bucket:
+            return bucket
+    return LENGTH_BUCKETS[-1]
+
+
+def activation_bytes(batch: int, seq_len: int, hidden: int, heads: int) -> int:
+    """Rough peak activation memory of one encoder forward pass (fp32)"""
+    # Hidden states + FFN intermediate (~10x hidden per token) + attention scores
+    return 4 * batch * seq_len * (10 * hidden + 2 * heads * seq_len)
+
+
+class BatchTuner:
+    """
+    Hill-climbs the token budget per encode call: doubles it while
+    tokens/sec improves by at least MIN_GAIN, then settles on the best.
+    Shared across topics so tuning happens once per run.
+    """
+
+    def __init__(self, memory_ceiling_mb: int = 1024):
+        self.memory_ceiling = memory_ceiling_mb * 1024 * 1024
+        self.budget = START_TOKEN_BUDGET
+        self.best_budget = START_TOKEN_BUDGET
+        self.best_rate = 0.0
+        self.settled = False
+        self._trial_tokens = 0
+        self._trial_seconds = 0.0
+        self._trial_calls = 0
+
+    def batch_size(self, seq_len: int, hidden: int, heads: int) -> int:
+        by_budget = self.budget // seq_len
+        by_memory = self.memory_ceiling // activation_bytes(1, seq_len, hidden, heads)
+        return max(1, min(by_budget, by_memory))
+
+    def record(self, tokens: int, seconds: float) -> None:
+        """Feed one measured encode call"""
+        if self.settled:
+            return
+
+        self._trial_tokens += tokens
+        self._trial_seconds += seconds
+        self._trial_calls += 1
+        if self._trial_calls < CALLS_PER_TRIAL or self._trial_seconds <= 0:
+            return
+
+        rate = self._trial_tokens / self._trial_seconds
+        self._trial_tokens, self._trial_seconds, self._trial_calls = 0, 0.0, 0
+
+        if rate >= self.best_rate * MIN_GAIN:
+            self.best_rate, self.best_budget = rate, self.budget
+            if self.budget * 2 <= MAX_TOKEN_BUDGET:
+                self.budget *= 2
+                return
+
+        self.budget = self.best_budget
+        self.settled = True
+
+    def describe(self) -> str:
+        state = 'tuned' if self.settled else 'tuning'
+        return f"{self.budget} tokens/batch ({state}, {self.best_rate:.0f} tokens/s)"
+
+
+class BucketedEncoder:
+    """Wraps a SentenceTransformer with length-bucketed, tuned batching"""
+
+    def __init__(self, model, tuner: BatchTuner):
+        self.model = model
+        self.tuner = tuner
+        self.dim = model.get_sentence_embedding_dimension()
+        self.max_seq_length = model.max_seq_length or LENGTH_BUCKETS[-1]
+
+        # SentenceTransformer keeps the HF config on its first module, ONNX on itself
+        try:
+            config = model[0].auto_model.config
+        except (TypeError, AttributeError, IndexError, KeyError):
+            config = getattr(model, 'config', None)
+        self.hidden = getattr(config, 'hidden_size', self.dim)
+        self.heads = getattr(config, 'num_attention_heads', 12)
+
+    def token_lengths(self, texts: List[str]) -> np.ndarray:
+        encoded = self.model.tokenizer(
+            texts, add_special_tokens=True, truncation=True, max_length=self.max_seq_length
+        )
+        return np.array([len(ids) for ids in encoded['input_ids']], dtype=np.int32)
+
+    def plan(self, texts: List[str]) -> Tuple[np.ndarray, List[np.ndarray]]:
+        """
+        Split texts into length-homogeneous batches sized by the tuner
+
+        Returns:
+            (token_lengths, batches) - each batch is an array of text positions
+        """
+        lengths = self.token_lengths(texts)
+        order = np.argsort(lengths, kind='stable')
+        buckets = np.array([bucket_for(int(length)) for length in lengths[order]])
+
+        batches = []
+        start = 0
+        while start < len(order):
+            seq_len = int(buckets[start])
+            batch_size = self.tuner.batch_size(seq_len, self.hidden, self.heads)
+
+            end = start + 1
+            while end < len(order) and end - start < batch_size and buckets[end] == seq_len:
+                end += 1
+
+            batches.append(order[start:end])
+            start = end
+
+        return lengths, batches
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts bucket by bucket
+
+        Returns:
+            float32 array (len(texts), dim), in input order
+        """
+        embeddings = np.empty((len(texts), self.dim), dtype=np.float32)
+        if not texts:
+            return embeddings
+
+        lengths, batches = self.plan(texts)
+
+        for rows in batches:
+            started = time.perf_counter()
+            vectors = self.model.encode(
+                [texts[i] for i in rows],
+                batch_size=len(rows),
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+            elapsed = time.perf_counter() - started
+
+            self.tuner.record(int(lengths[rows].max()) * len(rows), elapsed)
+            embeddings[rows] = vectors
+
+        return embeddings
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+Content-addressed embedding cache shared across topics and runs
+
+The same chunk text is embedded again on forced reindexes, when a book
+lives in two topic folders, and when chunk boundaries survive a small
+edit. Vectors are stored in SQLite keyed by (model name, hash of the
+normalized chunk text), looked up in bulk before calling the model, and
+evicted least-recently-used once the cache exceeds its size cap.
+
+Stored in books/.cache/embeddings.sqlite
+
+Usage:
+    python embedding_cache.py stats        # Entries, size, lifetime hit rate
+    python embedding_cache.py evict --max-mb 500
+    python embedding_cache.py clear
+"""
+
+import os
+import sys
+import time
+import sqlite3
+import hashlib
+import argparse
+import unicodedata
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+import numpy as np
+
+from library_paths import LIBRARY_ROOT
+
+# Paths
+CACHE_PATH = LIBRARY_ROOT / ".cache" / "embeddings.sqlite"
+
+# Size cap (override with LIBRARIAN_EMBED_CACHE_MB)
+DEFAULT_MAX_BYTES = int(os.environ.get('LIBRARIAN_EMBED_CACHE_MB', 1024)) * 1024 * 1024
+
+# SQLite host parameter limit is 999 on older builds
+LOOKUP_BATCH = 900
+
+
+def normalize_text(text: str) -> str:
+    """Unicode NFC + collapsed whitespace, so cosmetic differences still hit"""
+    return ' '.join(unicodedata.normalize('NFC', text).split())
+
+
+def text_key(model_name: str, text: str) -> bytes:
+    """Cache key for one chunk under one model"""
+    return hashlib.sha256(f"{model_name}\n{normalize_text(text)}".encode('utf-8')).digest()
+
+
+class EmbeddingCache:
+    """On-disk (model, text) → float32 vector cache with hit-rate stats"""
+
+    def __init__(self, model_name: str, path: Path = CACHE_PATH, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.model_name = model_name
+        self.path = Path(path)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                key BLOB PRIMARY KEY,
+                model TEXT NOT NULL,
+                dim INTEGER NOT NULL,
+                vector BLOB NOT NULL,
+                last_used REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS embeddings_last_used ON embeddings(last_used);
+            CREATE TABLE IF NOT EXISTS stats (
+                model TEXT PRIMARY KEY,
+                hits INTEGER NOT NULL DEFAULT 0,
+                misses INTEGER NOT NULL DEFAULT 0
+            );
+        """)
+
+    def get_many(self, texts: List[str]) -> Tuple[Dict[int, np.ndarray], List[int]]:
+        """
+        Bulk lookup
+
+        Returns:
+            (found, missing) - found maps text position -> vector,
+            missing lists positions that need embedding
+        """
+        keys = [text_key(self.model_name, t) for t in texts]
+        rows = {}
+
+        for start in range(0, len(keys), LOOKUP_BATCH):
+            batch = keys[start:start + LOOKUP_BATCH]
+            placeholders = ','.join('?' * len(batch))
+            for key, vector in self.conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", batch
+            ):
+                rows[key] = vector
+
+        found = {}
+        missing = []
+        for i, key in enumerate(keys):
+            vector = rows.get(key)
+            if vector is None:
+                missing.append(i)
+            else:
+                found[i] = np.frombuffer(vector, dtype=np.float32)
+
+        if rows:
+            now = time.time()
+            self.conn.executemany(
+                "UPDATE embeddings SET last_used = ? WHERE key = ?",
+                [(now, key) for key in rows]
+            )
+
+        self.hits += len(found)
+        self.misses += len(missing)
+        return found, missing
+
+    def put_many(self, texts: List[str], vectors: np.ndarray) -> None:
+        """Store vectors for texts (same order)"""
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        now = time.time()
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO embeddings (key, model, dim, vector, last_used) VALUES (?, ?, ?, ?, ?)",
+            [
+                (text_key(self.model_name, text), self.model_name, vector.shape[0], vector.tobytes(), now)
+                for text, vector in zip(texts, vectors)
+            ]
+        )
+        self.conn.commit()
+
+    def size_bytes(self) -> int:
+        return self.conn.execute("SELECT COALESCE(SUM(LENGTH(vector)) + COUNT(*) * 64, 0) FROM embeddings").fetchone()[0]
+
+    def evict(self, max_bytes: Optional[int] = None) -> int:
+        """
+        Drop least-recently-used vectors until the cache fits max_bytes
+
+        Returns:
+            Number of entries removed
+        """
+        max_bytes = self.max_bytes if max_bytes is None else max_bytes
+        excess = self.size_bytes() - max_bytes
+        if excess <= 0:
+            return 0
+
+        removed = 0
+        rows = self.conn.execute("SELECT key, LENGTH(vector) + 64 FROM embeddings ORDER BY last_used")
+        doomed = []
+        for key, size in rows:
+            if excess <= 0:
+                break
+            doomed.append((key,))
+            excess -= size
+            removed += 1
+
+        self.conn.executemany("DELETE FROM embeddings WHERE key = ?", doomed)
+        self.conn.commit()
+        return removed
+
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def close(self) -> None:
+        """Persist this run's hit/miss counters and close the database"""
+        if self.hits or self.misses:
+            self.conn.execute(
+                "INSERT INTO stats (model, hits, misses) VALUES (?, ?, ?) "
+                "ON CONFLICT(model) DO UPDATE SET hits = hits + excluded.hits, misses = misses + excluded.misses",
+                (self.model_name, self.hits, self.misses)
+            )
+            self.conn.commit()
+        self.conn.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect the embedding cache')
+    parser.add_argument('command', choices=['stats', 'evict', 'clear'])
+    parser.add_argument('--max-mb', type=int, help='Size cap for evict (default: LIBRARIAN_EMBED_CACHE_MB or 1024)')
+    args = parser.parse_args()
+
+    if not CACHE_PATH.exists():
+        print(f"📦 No embedding cache at {CACHE_PATH}")
+        return 0
+
+    cache = EmbeddingCache(model_name='')
+
+    if args.command == 'stats':
+        print(f"📦 Embedding cache: {CACHE_PATH}")
+        print(f"   Size: {cache.size_bytes() / 1024 / 1024:.1f} MB / {cache.max_bytes / 1024 / 1024:.0f} MB")
+        for model, count, dim in cache.conn.execute(
+            "SELECT model, COUNT(*), MAX(dim) FROM embeddings GROUP BY model"
+        ):
+            print(f"   {model}: {count} vectors ({dim}-dim)")
+        for model, hits, misses in cache.conn.execute("SELECT model, hits, misses FROM stats"):
+            total = hits + misses
+            rate = hits / total * 100 if total else 0
+            print(f"   {model}: {hits}/{total} lookups hit ({rate:.1f}%)")
+
+    elif args.command == 'evict':
+        max_bytes = args.max_mb * 1024 * 1024 if args.max_mb is not None else None
+        print(f"🧹 Evicted {cache.evict(max_bytes)} entries")
+
+    elif args.command == 'clear':
+        removed = cache.conn.execute("DELETE FROM embeddings").rowcount
+        cache.conn.execute("DELETE FROM stats")
+        cache.conn.commit()
+        cache.conn.execute("VACUUM")
+        print(f"🧹 Removed {removed} entries")
+
+    cache.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
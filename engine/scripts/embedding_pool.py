@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Multi-process CPU embedding pool
+
+One SentenceTransformer.encode call does not saturate a many-core CPU for
+small models like bge-small. The pool starts N worker processes, each with
+its own model copy and a pinned torch thread count (cores / N), and shards
+the length-bucketed batches planned by BucketedEncoder across them.
+
+Workers write vectors straight into a shared-memory float32 buffer at their
+rows, so results come back as one contiguous array with no pickling of
+vectors and no gather/concatenate copy.
+"""
+
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+from multiprocessing.shared_memory import SharedMemory
+from typing import List, Optional
+
+import numpy as np
+
+from embedding_batcher import BucketedEncoder
+
+# Model loaded once per worker process (see _init_worker)
+_worker_model = None
+
+
+def _init_worker(model_name: str, backend: str, threads: int) -> None:
+    """Pin thread count, then load the model (runs once per worker)"""
+    global _worker_model
+
+    for var in ('OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS'):
+        os.environ[var] = str(threads)
+    os.environ['TOKENIZERS_PARALLELISM'] = 'false'
+
+    if backend == 'torch':
+        import torch
+        torch.set_num_threads(threads)
+        torch.set_num_interop_threads(1)
+
+    from embedding_backends import load_embedder
+    _worker_model = load_embedder(model_name, backend, threads)
+
+
+def _attach(name: str) -> SharedMemory:
+    shm = SharedMemory(name=name)
+    # Only the parent owns the segment; keep the resource tracker from
+    # unlinking it when a worker exits (Python < 3.13)
+    try:
+        from multiprocessing import resource_tracker
+        resource_tracker.unregister(shm._name, 'shared_memory')
+    except Exception:
+        pass
+    return shm
+
+
+def _encode_shard(shm_name: str, shape: tuple, rows: np.ndarray, texts: List[str]) -> float:
+    """
+    Encode one batch and write it into the shared output buffer
+
+    Returns:
+        Seconds spent in encode (feeds the batch tuner)
+    """
+    shm = _attach(shm_name)
+    try:
+        out = np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+        started = time.perf_counter()
+        vectors = _worker_model.encode(texts, batch_size=len(texts), show_progress_bar=False, convert_to_numpy=True)
+        elapsed = time.perf_counter() - started
+        out[rows] = vectors
+        del out
+        return elapsed
+    finally:
+        shm.close()
+
+
+class EmbeddingPool:
+    """Worker processes holding one model copy each, shared for the whole run"""
+
+    def __init__(self, model_name: str, backend: str, workers: int, threads_per_worker: Optional[int] = None):
+        self.workers = workers
+        self.threads = threads_per_worker or max(1, (os.cpu_count() or 1) // workers)
+        self._executor = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=get_context('spawn'),  # fork + torch threads deadlocks
+            initializer=_init_worker,
+            initargs=(model_name, backend, self.threads)
+        )
+        self._shm = None
+
+    def _buffer(self, nbytes: int) -> SharedMemory:
+        """Output buffer, grown (never shrunk) as batches get bigger"""
+        if self._shm is None or self._shm.size < nbytes:
+            self._release()
+            self._shm = SharedMemory(create=True, size=max(nbytes, 1))
+        return self._shm
+
+    def encode(self, planner: BucketedEncoder, texts: List[str]) -> np.ndarray:
+        """
+        Embed texts across workers
+
+        Returns:
+            float32 array (len(texts), dim) in input order. It is a view on
+            the pool's shared buffer: valid until the next encode() call.
+        """
+        shape = (len(texts), planner.dim)
+        if not texts:
+            return np.empty(shape, dtype=np.float32)
+
+        shm = self._buffer(shape[0] * shape[1] * 4)
+        lengths, batches = planner.plan(texts)
+
+        futures = [
+            (rows, self._executor.submit(_encode_shard, shm.name, shape, rows, [texts[i] for i in rows]))
+            for rows in batches
+        ]
+        for rows, future in futures:
+            elapsed = future.result()
+            planner.tuner.record(int(lengths[rows].max()) * len(rows), elapsed)
+
+        return np.ndarray(shape, dtype=np.float32, buffer=shm.buf)
+
+    def _release(self) -> None:
+        if self._shm is not None:
+            try:
+                self._shm.close()
+            except BufferError:
+                pass  # A caller still holds a view; memory is freed with it
+            self._shm.unlink()
+            self._shm = None
+
+    def close(self) -> None:
+        self._executor.shutdown(wait=True)
+        self._release()
+
+
+class PooledEncoder:
+    """BucketedEncoder-compatible encoder that runs batches on an EmbeddingPool"""
+
+    def __init__(self, planner: BucketedEncoder, pool: EmbeddingPool):
+        self.planner = planner
+        self.pool = pool
+        self.dim = planner.dim
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        return self.pool.encode(self.planner, texts)
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+"""
+Process-wide embedding service shared by the indexer, research CLI and MCP server
+
+One object describes how text becomes vectors in this process: model name,
+dimension, backend (torch / onnx / onnx-int8), CPU threads and whether
+output is L2-normalized. The model is loaded lazily on first use and only
+once per process, no matter how many topics are indexed or queries served.
+
+    service = get_embedding_service()            # defaults / first caller's config
+    vectors = service.encode(texts)              # (n, dim) float32, bucketed batches
+    vector = service.embed_query("mutual aid")   # (dim,) float32
+"""
+
+import os
+import threading
+from typing import List, Optional
+
+import numpy as np
+
+from embedding_backends import DEFAULT_MODEL, load_embedder, load_tokenizer
+from embedding_batcher import BatchTuner, BucketedEncoder
+
+# Known models (dim is checked against the loaded model)
+EMBEDDING_MODELS = {
+    "bge": {
+        "name": DEFAULT_MODEL,
+        "dim": 384,
+        "desc": "Default embedding model (384-dim)"
+    }
+}
+
+# The one service of this process (see get_embedding_service)
+_service = None
+_service_lock = threading.Lock()
+
+
+class EmbeddingService:
+    """Lazily-loaded embedding model plus batching state"""
+
+    def __init__(self, model_name: str = DEFAULT_MODEL, dim: int = 384, backend: str = 'torch',
+                 threads: Optional[int] = None, normalize: bool = False, memory_ceiling_mb: int = 1024):
+        self.model_name = model_name
+        self.dim = dim
+        self.backend = backend
+        self.threads = threads
+        self.normalize = normalize
+        self.tuner = BatchTuner(memory_ceiling_mb=memory_ceiling_mb)
+        self._model = None
+        self._encoder = None
+        self._planner = None
+        self._load_lock = threading.Lock()
+
+    @property
+    def short_name(self) -> str:
+        """Model name as recorded in library/topic metadata"""
+        return self.model_name.split('/')[-1]
+
+    @property
+    def cache_name(self) -> str:
+        """Embedding cache namespace (backends differ slightly numerically)"""
+        return self.model_name if self.backend == 'torch' else f"{self.model_name}@{self.backend}"
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._load_lock:
+                if self._model is None:
+                    if self.threads and self.backend == 'torch':
+                        import torch
+                        torch.set_num_threads(self.threads)
+                    model = load_embedder(self.model_name, self.backend, self.threads)
+                    loaded_dim = model.get_sentence_embedding_dimension()
+                    if loaded_dim != self.dim:
+                        raise ValueError(f"{self.model_name} produces {loaded_dim}-dim vectors, expected {self.dim}")
+                    self._model = model
+        return self._model
+
+    @property
+    def encoder(self) -> BucketedEncoder:
+        """Length-bucketed encoder over the shared model"""
+        if self._encoder is None:
+            self._encoder = BucketedEncoder(self.model, self.tuner)
+        return self._encoder
+
+    @property
+    def planner(self) -> BucketedEncoder:
+        """
+        Batch planner over the tokenizer only, for embedding pools (their
+        workers hold the models; loading one here too would be wasted)
+        """
+        if self._planner is None:
+            with self._load_lock:
+                if self._planner is None:
+                    planner = BucketedEncoder(load_tokenizer(self.model_name, self.backend), self.tuner)
+                    if planner.dim != self.dim:
+                        raise ValueError(f"{self.model_name} produces {planner.dim}-dim vectors, expected {self.dim}")
+                    self._planner = planner
+        return self._planner
+
+    def _finish(self, vectors: np.ndarray) -> np.ndarray:
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if self.normalize:
+            norms = np.linalg.norm(vectors, axis=-1, keepdims=True)
+            vectors = vectors / np.clip(norms, 1e-12, None)
+        return vectors
+
+    def encode(self, texts: List[str]) -> np.ndarray:
+        """Embed many texts (indexing path) → (n, dim) float32"""
+        return self._finish(self.encoder.encode(texts))
+
+    def embed_query(self, text: str) -> np.ndarray:
+        """Embed one query (search path) → (dim,) float32"""
+        return self._finish(self.model.encode(text, convert_to_numpy=True))
+
+    def describe(self) -> str:
+        threads = f", {self.threads} threads" if self.threads else ''
+        norm = ', normalized' if self.normalize else ''
+        return f"{self.model_name} ({self.dim}-dim, {self.backend}{threads}{norm})"
+
+
+def get_embedding_service(model_name: Optional[str] = None, dim: Optional[int] = None,
+                          backend: Optional[str] = None, threads: Optional[int] = None,
+                          normalize: Optional[bool] = None, memory_ceiling_mb: Optional[int] = None) -> EmbeddingService:
+    """
+    Return this process's embedding service, creating it on first call.
+
+    Arguments only apply on creation; later callers get the same instance
+    (a conflicting model/backend request raises instead of loading a second copy).
+    Backend defaults to LIBRARIAN_EMBED_BACKEND, then torch.
+    """
+    global _service
+
+    with _service_lock:
+        if _service is None:
+            _service = EmbeddingService(
+                model_name=model_name or DEFAULT_MODEL,
+                dim=dim or EMBEDDING_MODELS['bge']['dim'],
+                backend=backend or os.environ.get('LIBRARIAN_EMBED_BACKEND', 'torch'),
+                threads=threads,
+                normalize=bool(normalize),
+                memory_ceiling_mb=memory_ceiling_mb or 1024
+            )
+            return _service
+
+    if model_name and model_name != _service.model_name:
+        raise ValueError(f"Embedding service already running {_service.model_name}, not {model_name}")
+    if backend and backend != _service.backend:
+        raise ValueError(f"Embedding service already using {_service.backend} backend, not {backend}")
+    return _service
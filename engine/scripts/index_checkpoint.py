@@ -0,0 +1,181 @@
+#!/usr/bin/env python3
+"""
+Crash-resumable indexing: per-topic checkpoints of embedded batches
+
+Embedding a large topic can take hours, and topic metadata (content_hash,
+index_key...) is only written once the whole topic is done. While a topic
+embeds, every flushed batch is saved to a work directory: its vectors
+(.npy), its chunk records and the bookkeeping of the books completed so
+far. `index_library.py --resume` replays those batches instead of
+re-embedding them, then continues with the remaining books.
+
+A checkpoint is only reused when its plan fingerprint (books to embed with
+their size/mtime, embedding model, chunk settings, extractor version, base
+index files) matches the current run exactly; otherwise it is discarded.
+
+Stored in books/.cache/work/<topic>/, removed once the topic is committed.
+
+Usage:
+    python index_checkpoint.py list        # Interrupted topics and progress
+    python index_checkpoint.py clear       # Drop all checkpoints
+"""
+
+import os
+import sys
+import json
+import shutil
+import argparse
+from pathlib import Path
+from typing import List, Dict, Iterator, Optional, Tuple
+
+import numpy as np
+
+from library_paths import LIBRARY_ROOT
+
+# Paths
+WORK_DIR = LIBRARY_ROOT / ".cache" / "work"
+
+PLAN_FILE = 'plan.json'
+
+
+def file_signature(path: Path) -> Optional[List]:
+    """[size, mtime] of a file, None if missing"""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return [stat.st_size, stat.st_mtime]
+
+
+def _write_atomic(path: Path, write) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        write(f)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp, path)
+
+
+class TopicCheckpoint:
+    """
+    Work directory of one topic's in-progress indexing run.
+
+    Batch N is complete once batch-N.json exists (written after its .npy),
+    so a crash mid-write only loses that batch.
+    """
+
+    def __init__(self, topic_id: str, fingerprint: Dict, work_dir: Path = WORK_DIR):
+        self.topic_id = topic_id
+        self.fingerprint = fingerprint
+        self.path = Path(work_dir) / topic_id.replace('/', '__')
+        self.batches_saved = 0
+
+    def _batch_files(self, n: int) -> Tuple[Path, Path]:
+        return self.path / f"batch-{n:06d}.npy", self.path / f"batch-{n:06d}.json"
+
+    def _stored_plan(self) -> Optional[Dict]:
+        try:
+            with open(self.path / PLAN_FILE, 'r') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return None
+
+    def _count_batches(self) -> int:
+        n = 0
+        while self._batch_files(n + 1)[1].exists():
+            n += 1
+        return n
+
+    def resume(self) -> Optional[Dict]:
+        """
+        Reopen a matching checkpoint
+
+        Returns:
+            State of the last saved batch ({'books', 'next_key'}),
+            or None if there is nothing (valid) to resume
+        """
+        plan = self._stored_plan()
+        if plan is None or plan.get('fingerprint') != self.fingerprint:
+            return None
+
+        self.batches_saved = self._count_batches()
+        if not self.batches_saved:
+            return None
+
+        with open(self._batch_files(self.batches_saved)[1], 'r', encoding='utf-8') as f:
+            return json.load(f)['state']
+
+    def has_stale(self) -> bool:
+        """A checkpoint exists but was made for different inputs"""
+        plan = self._stored_plan()
+        return plan is not None and plan.get('fingerprint') != self.fingerprint
+
+    def start(self) -> None:
+        """Begin a fresh checkpoint (drops any previous one)"""
+        self.clear()
+        self.path.mkdir(parents=True, exist_ok=True)
+        plan = json.dumps({'topic_id': self.topic_id, 'fingerprint': self.fingerprint}, indent=2)
+        _write_atomic(self.path / PLAN_FILE, lambda f: f.write(plan.encode('utf-8')))
+
+    def save_batch(self, chunks: List[Dict], embeddings: np.ndarray, state: Dict) -> None:
+        """
+        Persist one embedded batch
+
+        Args:
+            chunks: Chunk records written to the chunk store (same order as embeddings)
+            embeddings: float32 vectors of the batch
+            state: Progress after this batch ({'books': {filename: entry}, 'next_key'})
+        """
+        n = self.batches_saved + 1
+        npy_path, json_path = self._batch_files(n)
+
+        _write_atomic(npy_path, lambda f: np.save(f, np.ascontiguousarray(embeddings, dtype=np.float32)))
+        record = json.dumps({'chunks': chunks, 'state': state}, ensure_ascii=False)
+        _write_atomic(json_path, lambda f: f.write(record.encode('utf-8')))
+
+        self.batches_saved = n
+
+    def batches(self) -> Iterator[Tuple[List[Dict], np.ndarray]]:
+        """Saved batches in order: (chunk records, embeddings)"""
+        for n in range(1, self.batches_saved + 1):
+            npy_path, json_path = self._batch_files(n)
+            with open(json_path, 'r', encoding='utf-8') as f:
+                chunks = json.load(f)['chunks']
+            yield chunks, np.load(npy_path)
+
+    def clear(self) -> None:
+        shutil.rmtree(self.path, ignore_errors=True)
+        self.batches_saved = 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect interrupted indexing checkpoints')
+    parser.add_argument('command', choices=['list', 'clear'])
+    args = parser.parse_args()
+
+    work_dirs = sorted(p for p in WORK_DIR.iterdir() if p.is_dir()) if WORK_DIR.exists() else []
+
+    if args.command == 'list':
+        if not work_dirs:
+            print(f"📦 No checkpoints in {WORK_DIR}")
+            return 0
+        print(f"📦 Checkpoints: {WORK_DIR}")
+        for work_dir in work_dirs:
+            batches = sorted(work_dir.glob('batch-*.json'))
+            size = sum(f.stat().st_size for f in work_dir.iterdir())
+            books = 0
+            if batches:
+                with open(batches[-1], 'r', encoding='utf-8') as f:
+                    books = len(json.load(f)['state']['books'])
+            print(f"   {work_dir.name}: {len(batches)} batches, {books} books done ({size / 1024 / 1024:.1f} MB)")
+
+    elif args.command == 'clear':
+        for work_dir in work_dirs:
+            shutil.rmtree(work_dir, ignore_errors=True)
+        print(f"🧹 Removed {len(work_dirs)} checkpoints")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,14 @@ Usage:
     python indexer.py [topic_id]           # Index one topic
     python indexer.py --all                # Index all topics
     python indexer.py --topics cooking ai_policy  # Index specific topics
+    python indexer.py --all --workers 8    # Parallel book extraction (8 processes)
+    python indexer.py --all --no-text-cache  # Re-parse every book (skip extracted-text cache)
+    python indexer.py --all --no-embed-cache # Re-embed every chunk (skip embedding cache)
+    python indexer.py --all --embed-workers 4  # Embed on 4 processes (cores/4 torch threads each)
+    python indexer.py --all --backend onnx-int8 # Quantized ONNX Runtime (see embedding_backends.py)
+    python indexer.py --all --resume       # Continue an interrupted run from its checkpoints
+    python indexer.py --all --force --plan # Estimate time/disk/memory without indexing
+    python indexer.py --all --report-md    # Also write per-stage timings to MGMT/REPORT.md
 """
 
 import os
@@ -15,14 +23,38 @@ import json
 import time
 import hashlib
 import argparse
+import itertools
+from array import array
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional, Tuple
+from typing import Iterable, List, Dict, Optional, Tuple, Union
 
 from llama_index.core import VectorStoreIndex, SimpleDirectoryReader, StorageContext, Settings, Document
 from llama_index.core.node_parser import SentenceSplitter
-from llama_index.embeddings.huggingface import HuggingFaceEmbedding
 from llama_index.readers.file import EpubReader, PyMuPDFReader
 
+import numpy as np
+
+import text_cache
+import index_plan
+from index_telemetry import RunReport, TopicStats, peak_rss_bytes, render_markdown, MARKDOWN_REPORT
+from index_checkpoint import TopicCheckpoint, file_signature
+from chunk_store import (ChunkStoreWriter, CHUNK_STORE_NAME, CHUNK_ID_BITS, LEGACY_CHUNKS_NAME, book_id_range,
+                         chunks_file, iter_chunks)
+from topic_vectors import (VectorWriter, VECTORS_NAME, VECTOR_DTYPES, DEFAULT_FACTORY, INDEX_FAMILIES,
+                           METRICS, DEFAULT_METRIC, DEFAULT_INDEX_MEMORY_MB, build_index, load_vectors, reconstruct, resolve_spec,
+                           spec_metadata, topic_spec, write_index_atomic)
+from topic_router import ROUTER_NAME, build_signature, write_signature
+from lexical_index import LEXICAL_NAME, LexicalIndexWriter
+from library_state import LibraryState, scan_topic, print_changes
+from library_discovery import discover_topics
+from embedding_cache import EmbeddingCache
+from embedding_pool import EmbeddingPool, PooledEncoder
+from embedding_backends import BACKENDS
+from embedding_service import EMBEDDING_MODELS, EmbeddingService, get_embedding_service
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
 # PDF/EPUB processing
 try:
     from PyPDF2 import PdfReader
@@ -45,29 +77,374 @@ except ImportError:
 # Setup local embeddings
 MODELS_DIR = Path(__file__).parent.parent / "models"
 
-# Available models
-EMBEDDING_MODELS = {
-    "bge": {
-        "name": "BAAI/bge-small-en-v1.5",
-        "dim": 384,
-        "desc": "Default embedding model (384-dim)"
-    }
-}
+# Process-wide embedding service: model loaded once, shared by all topics (set in main)
+embed_service: Optional[EmbeddingService] = None
+
+# Embedding cache shared by all topics in this run (set in main, see --no-embed-cache)
+embed_cache = None
+
+# Multi-process embedding pool (set in main when --embed-workers > 1)
+embed_pool = None
+
+# Manifest of indexed files, updated as topics commit (set in main)
+library_state: Optional[LibraryState] = None
+
+# Storage type of .vectors.npy (set in main, see --vectors)
+vectors_dtype = 'float32'
+
+# FAISS index family and per-topic memory budget (set in main, see --index)
+index_family = 'auto'
+index_memory_budget = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024
 
-# Default model (will be set in main)
-embed_model = None
+# Metric override (set in main, see --metric); None keeps each topic's metric
+index_metric: Optional[str] = None
 
 # Node parser for chunking raw documents
 node_parser = SentenceSplitter(chunk_size=1024, chunk_overlap=200)
 
-# Paths
-LIBRARY_ROOT = Path(__file__).parent.parent.parent / "books"
-MAIN_METADATA = LIBRARY_ROOT / ".library-index.json"
-
 # Readers
 epub_reader = EpubReader()
 pdf_reader = PyMuPDFReader()
 
+# Extraction workers (one process per book, see --workers)
+DEFAULT_WORKERS = os.cpu_count() or 1
+SUPPORTED_EXTENSIONS = ('.epub', '.pdf')
+
+# Bump when extraction output changes (invalidates books/.cache/text)
+EXTRACTOR_VERSION = f"1:{type(epub_reader).__name__}:{type(pdf_reader).__name__}"
+
+# Chunks embedded and appended to FAISS per step (bounds peak memory,
+# large enough for length bucketing to group similar chunks)
+EMBED_STREAM_BATCH = 1024
+
+# Stable chunk IDs: see chunk_store.book_id_range
+INDEX_FORMAT = "idmap-v1"
+
+
+def new_book_entry(book_path: Path) -> Dict:
+    """topic-index.json entry for a book found on disk (not indexed yet)"""
+    return {
+        'id': book_path.stem.lower().replace(' ', '_'),
+        'title': book_path.stem,
+        'filename': book_path.name,
+        'author': 'Unknown',
+        'tags': [],
+        'last_modified': os.path.getmtime(book_path)
+    }
+
+
+def book_doc_metadata(book: Dict, topic_data: Dict) -> Dict:
+    """Metadata attached to every raw document of a book (counts toward chunk size)"""
+    return {
+        'book_id': book['id'],
+        'book_title': book['title'],
+        'book_author': book.get('author', 'Unknown'),
+        'topic_id': topic_data['id'],
+        'topic_folder': topic_data['path'],
+        'tags': ','.join(book.get('tags', []))
+    }
+
+
+# Location fields are stored per chunk but left out of chunk sizing
+LOCATION_KEYS = ['filename', 'filetype', 'page', 'chapter']
+
+
+def doc_location(book: Dict, reader_metadata: Dict) -> Dict:
+    """
+    Location fields of one raw document, kept on its chunks for citations and
+    structured filters (see chunk_filters.py). PyMuPDFReader yields one
+    document per page, its 1-based number in 'source'; EpubReader one per book.
+    """
+    filetype = Path(book['filename']).suffix.lower().lstrip('.')
+    page = str(reader_metadata.get('source', ''))
+    return {
+        'filename': book['filename'],
+        'filetype': filetype,
+        'page': int(page) if filetype == 'pdf' and page.isdigit() else None,
+        'chapter': None
+    }
+
+
+def extract_book(book_path: str, use_cache: bool = True) -> Tuple[List[Document], Optional[str], bool, float]:
+    """
+    Load raw documents for a single book, from the text cache when possible.
+    Runs inside an extraction worker process, so errors are returned, not raised.
+
+    Returns:
+        (documents, error, cached, seconds) tuple - error is None on success
+    """
+    started = time.perf_counter()
+    try:
+        key = text_cache.cache_key(Path(book_path), EXTRACTOR_VERSION) if use_cache else None
+
+        if key:
+            pages = text_cache.get(key)
+            if pages is not None:
+                docs = [Document(text=p['text'], metadata=p['metadata']) for p in pages]
+                return docs, None, True, time.perf_counter() - started
+
+        if book_path.lower().endswith('.epub'):
+            docs = epub_reader.load_data(book_path)
+        else:
+            docs = pdf_reader.load_data(book_path)
+
+        if key:
+            try:
+                text_cache.put(key, [{'text': d.text, 'metadata': d.metadata} for d in docs], source=book_path)
+            except OSError as e:
+                print(f"      ⚠️  Text cache write failed: {e}")
+
+        return docs, None, False, time.perf_counter() - started
+    except Exception as e:
+        return [], str(e), False, time.perf_counter() - started
+
+
+class ExtractionStream:
+    """
+    Ordered, bounded extraction of a list of books.
+
+    Results are yielded in input order regardless of which worker finishes
+    first, so chunk_index values are stable between runs. At most 2 books
+    per worker are in flight, so extracted text never piles up in memory.
+    The first window is submitted on construction: a stream created for the
+    next topic starts extracting in the background while the current topic
+    is still embedding.
+    """
+
+    def __init__(self, book_paths: List[Path], pool: Optional[ProcessPoolExecutor] = None,
+                 use_cache: bool = True, window: int = DEFAULT_WORKERS * 2):
+        self.book_paths = list(book_paths)
+        self.pool = pool if len(self.book_paths) > 1 else None
+        self.use_cache = use_cache
+        self._remaining = iter(self.book_paths)
+        self._pending = deque()
+
+        if self.pool is not None:
+            for _ in range(window):
+                if not self._submit_next():
+                    break
+
+    def _submit_next(self) -> bool:
+        for book_path in itertools.islice(self._remaining, 1):
+            self._pending.append((book_path, self.pool.submit(extract_book, str(book_path), self.use_cache)))
+            return True
+        return False
+
+    def __iter__(self):
+        """
+        Yields:
+            (book_path, documents, error, cached, seconds) tuples
+        """
+        if self.pool is None:
+            for book_path in self._remaining:
+                yield (book_path, *extract_book(str(book_path), self.use_cache))
+            return
+
+        while self._pending:
+            book_path, future = self._pending.popleft()
+            try:
+                docs, error, cached, seconds = future.result()
+            except Exception as e:
+                # Worker crashed (segfault in a parser, OOM kill...)
+                docs, error, cached, seconds = [], f"Extraction worker failed: {e}", False, 0.0
+
+            # Keep the window full before handing results downstream
+            self._submit_next()
+
+            yield book_path, docs, error, cached, seconds
+
+    def cancel(self) -> None:
+        """Drop books not started yet (topic failed before consuming them)"""
+        for _, future in self._pending:
+            future.cancel()
+        self._pending.clear()
+
+
+def embed_texts(encoder, texts: List[str]) -> np.ndarray:
+    """
+    Embed chunk texts, serving repeats from the embedding cache.
+    Only cache misses are sent to the model.
+
+    Returns:
+        float32 array (len(texts), dim), in input order
+    """
+    if embed_cache is None:
+        return encoder.encode(texts)
+
+    found, missing = embed_cache.get_many(texts)
+
+    encoded = None
+    if missing:
+        miss_texts = [texts[i] for i in missing]
+        encoded = encoder.encode(miss_texts)
+        embed_cache.put_many(miss_texts, encoded)
+
+    dim = encoded.shape[1] if encoded is not None else next(iter(found.values())).shape[0]
+    embeddings = np.empty((len(texts), dim), dtype=np.float32)
+    for i, vector in found.items():
+        embeddings[i] = vector
+    if missing:
+        embeddings[missing] = encoded
+
+    return embeddings
+
+
+class TopicIndexWriter:
+    """
+    Incrementally builds a topic's chunk store, raw vectors and FAISS index.
+
+    Embedded batches are streamed to a temp chunk store (see chunk_store.py)
+    and a temp .vectors.npy (see topic_vectors.py), so nothing proportional
+    to the whole topic is held in Python lists. The FAISS index is built
+    from the stored vectors on commit(): the given index choice ('auto',
+    a family, or a pinned spec) is resolved once the chunk count is known,
+    and the topic's routing signature (see topic_router.py) is computed
+    from the same vectors. Chunk texts also feed the topic's BM25 index
+    (see lexical_index.py) as they are written.
+    Artifacts replace the old ones only on commit(), a failed run leaves
+    the previous index intact. Each file is swapped atomically, but not all
+    of them at once (see commit).
+
+    Chunks are keyed by stable chunk IDs (see book_id_range): on an
+    incremental update the existing chunks and vectors are passed in as
+    base_chunks/base_vectors and carried over, except those of the books
+    in removed_keys. Topics indexed before vectors were stored pass their
+    flat base_index instead, and vectors are recovered from it.
+    """
+
+    def __init__(self, topic_path: Path, base_chunks: Optional[Iterable[Dict]] = None,
+                 base_vectors: Optional[np.ndarray] = None, base_index=None,
+                 removed_keys: Optional[set] = None, index: Union[str, Dict] = 'auto',
+                 metric: str = DEFAULT_METRIC, dtype: str = 'float32', memory_budget: Optional[int] = None):
+        self.faiss_path = topic_path / ".faiss.index"
+        self.chunks_path = topic_path / CHUNK_STORE_NAME
+        self.chunks_tmp = topic_path / (CHUNK_STORE_NAME + ".tmp")
+        self.vectors_path = topic_path / VECTORS_NAME
+        self.vectors_tmp = topic_path / (VECTORS_NAME + ".tmp")
+        self.router_path = topic_path / ROUTER_NAME
+        self.lexical_path = topic_path / LEXICAL_NAME
+        self.lexical_tmp = topic_path / (LEXICAL_NAME + ".tmp")
+        self.index = index
+        self.metric = metric
+        self.memory_budget = memory_budget or DEFAULT_INDEX_MEMORY_MB * 1024 * 1024
+        self.spec = None
+        self.faiss_index = None
+        self.count = 0
+        self.added = 0
+        self.build_seconds = 0.0
+        self._ids = array('q')
+        self._store = ChunkStoreWriter(self.chunks_tmp)
+        self._vectors = VectorWriter(self.vectors_tmp, dtype)
+        self._lexical = LexicalIndexWriter(self.lexical_tmp)
+
+        removed_keys = removed_keys or set()
+
+        # Carry over chunks and vectors of unchanged books (keeps both aligned)
+        rows, kept = [], []
+        base_rows = 0
+        for row, chunk in enumerate(base_chunks or []):
+            base_rows = row + 1
+            if chunk['chunk_id'] >> CHUNK_ID_BITS in removed_keys:
+                continue
+            rows.append(row)
+            kept.append(chunk)
+            if len(kept) >= EMBED_STREAM_BATCH:
+                self._carry(kept, rows, base_vectors, base_index)
+                rows, kept = [], []
+        if kept:
+            self._carry(kept, rows, base_vectors, base_index)
+
+        if base_vectors is not None and base_rows != len(base_vectors):
+            self.abort()
+            raise ValueError(f"{VECTORS_NAME} has {len(base_vectors)} rows, chunk store {base_rows}")
+
+    def _carry(self, chunks: List[Dict], rows: List[int], base_vectors, base_index) -> None:
+        if base_vectors is not None:
+            embeddings = base_vectors[rows]
+        else:
+            embeddings = reconstruct(base_index, [chunk['chunk_id'] for chunk in chunks])
+        self._append(chunks, embeddings)
+
+    def _append(self, chunks: List[Dict], embeddings) -> None:
+        self._vectors.append(embeddings)
+        for chunk in chunks:
+            chunk['chunk_index'] = self.count
+            self._store.append(chunk)
+            self._lexical.add(chunk['chunk_full'])
+            self._ids.append(chunk['chunk_id'])
+            self.count += 1
+
+    def add(self, nodes: List, embeddings, chunk_ids: List[int]) -> List[Dict]:
+        """
+        Append one embedded batch (nodes, vectors and chunk IDs, same order)
+
+        Returns:
+            The chunk records written (for checkpointing)
+        """
+        chunks = [
+            {
+                'chunk_full': node.text,
+                'chunk_id': chunk_id,
+                'book_id': node.metadata.get('book_id'),
+                'book_title': node.metadata.get('book_title'),
+                'book_author': node.metadata.get('book_author'),
+                'topic_id': node.metadata.get('topic_id'),
+                'topic_folder': node.metadata.get('topic_folder'),
+                **{key: node.metadata.get(key) for key in LOCATION_KEYS}
+            }
+            for node, chunk_id in zip(nodes, chunk_ids)
+        ]
+        self.add_records(chunks, embeddings)
+        return chunks
+
+    def add_records(self, chunks: List[Dict], embeddings) -> None:
+        """Append chunk records with their vectors (e.g. replayed from a checkpoint)"""
+        if not chunks:
+            return
+        self._append(chunks, embeddings)
+        self.added += len(chunks)
+
+    def commit(self) -> None:
+        """
+        Build the FAISS index from the stored vectors and swap in the artifacts
+
+        The files replace their old versions one after the other, each
+        atomically: FAISS index, routing signature, vectors, BM25 index and
+        the chunk store last. A crash in between leaves a new index next to
+        the old chunks: research.py refuses to load such a topic (see
+        check_index) until it is reindexed.
+        """
+        self._store.close()
+        self._vectors.close()
+        self._lexical.close()
+
+        vectors = load_vectors(self.vectors_tmp)
+        self.spec = resolve_spec(self.index, self.count, vectors.shape[1], self.metric, self.memory_budget)
+
+        started = time.perf_counter()
+        self.faiss_index = build_index(vectors, np.frombuffer(self._ids, dtype=np.int64), self.spec)
+        signature = build_signature(vectors) if self.count else None
+        self.build_seconds += time.perf_counter() - started
+        del vectors
+
+        write_index_atomic(self.faiss_index, self.faiss_path)
+        if signature is not None:
+            write_signature(signature, self.router_path)
+        else:
+            self.router_path.unlink(missing_ok=True)
+        os.replace(self.vectors_tmp, self.vectors_path)
+        os.replace(self.lexical_tmp, self.lexical_path)
+        os.replace(self.chunks_tmp, self.chunks_path)
+
+        # Superseded by the chunk store
+        (self.chunks_path.parent / LEGACY_CHUNKS_NAME).unlink(missing_ok=True)
+
+    def abort(self) -> None:
+        """Drop partial output, keeping the previous index untouched"""
+        self._store.abort()
+        self._vectors.abort()
+        self._lexical.abort()
+
 
 def extract_pdf_paragraphs(pdf_path: Path) -> List[Tuple[str, int, int]]:
     """
@@ -169,7 +546,7 @@ def load_book_with_metadata(book_path: Path, book_meta: Dict, topic_id: str, top
             }
             documents.append(doc)
 
-            # Store for chunks.json
+            # Store for the chunk store
             chunks_metadata.append({
                 'chunk_full': text,
                 'book_id': book_meta['id'],
@@ -204,7 +581,7 @@ def load_book_with_metadata(book_path: Path, book_meta: Dict, topic_id: str, top
             }
             documents.append(doc)
 
-            # Store for chunks.json
+            # Store for the chunk store
             chunks_metadata.append({
                 'chunk_full': text,
                 'book_id': book_meta['id'],
@@ -223,18 +600,14 @@ def load_book_with_metadata(book_path: Path, book_meta: Dict, topic_id: str, top
     return documents, chunks_metadata
 
 
-def compute_content_hash(topic_path: Path) -> str:
-    """Hash folder contents: filenames + mtimes"""
-    files = sorted([
-        f for f in os.listdir(topic_path)
-        if f.endswith(('.pdf', '.epub'))
-    ])
+def compute_content_hash(topic_path: Path, files: Optional[Dict[str, os.stat_result]] = None) -> str:
+    """Hash folder contents: filenames + mtimes (pass scan_topic output to skip the rescan)"""
+    if files is None:
+        files = scan_topic(topic_path)
 
     hash_input = []
-    for filename in files:
-        filepath = topic_path / filename
-        mtime = os.path.getmtime(filepath)
-        hash_input.append(f"{filename}:{mtime}")
+    for filename in sorted(files):
+        hash_input.append(f"{filename}:{files[filename].st_mtime}")
 
     combined = '|'.join(hash_input)
     return hashlib.sha256(combined.encode()).hexdigest()
@@ -245,44 +618,8 @@ def scan_library_folders() -> List[Dict]:
     Scan books/ directory and discover all topic folders.
     Returns list of topic dictionaries with id and path.
     """
-    import re
-
-    def slugify(text: str) -> str:
-        """Convert text to lowercase slug."""
-        return re.sub(r'[^\w\s-]', '', text.lower()).strip().replace(' ', '_')
-
-    topics = []
-
-    def scan_directory(base_path: Path, relative_path: str = ""):
-        """Recursively scan directory for topics."""
-        for item in sorted(base_path.iterdir()):
-            # Skip hidden files, system files, and metadata
-            if item.name.startswith('.') or item.name == '__pycache__':
-                continue
-
-            if item.is_dir():
-                # Build relative path
-                current_rel = f"{relative_path}/{item.name}" if relative_path else item.name
-
-                # Check if this directory has any books
-                has_books = any(
-                    f.suffix.lower() in ['.epub', '.pdf']
-                    for f in item.iterdir()
-                    if f.is_file()
-                )
-
-                if has_books:
-                    # This is a topic folder
-                    topic_id = slugify(current_rel.replace('/', '_'))
-                    topics.append({
-                        'id': topic_id,
-                        'path': current_rel
-                    })
-
-                # Recursively scan subdirectories
-                scan_directory(item, current_rel)
-
-    scan_directory(LIBRARY_ROOT)
+    topics, scanner = discover_topics(LIBRARY_ROOT)
+    print(f"   📂 {scanner.listed} directories listed, {scanner.reused} unchanged since last scan")
     return topics
 
 
@@ -318,11 +655,14 @@ def update_library_index(discovered_topics: List[Dict]) -> Dict:
             new_count += 1
 
     # Sort topics by id for consistency
-    registry['topics'] = sorted(registry['topics'], key=lambda t: t['id'])
+    sorted_topics = sorted(registry['topics'], key=lambda t: t['id'])
+    changed = new_count > 0 or sorted_topics != registry['topics'] or not MAIN_METADATA.exists()
+    registry['topics'] = sorted_topics
 
-    # Save
-    with open(MAIN_METADATA, 'w') as f:
-        json.dump(registry, f, indent=2)
+    # Save (only when something changed: keeps mtime stable for watchers)
+    if changed:
+        with open(MAIN_METADATA, 'w') as f:
+            json.dump(registry, f, indent=2)
 
     return registry, new_count
 
@@ -349,7 +689,7 @@ def bootstrap_topic_metadata(topic_data: Dict) -> bool:
     for ext in ['*.epub', '*.pdf']:
         for book_path in topic_path.glob(ext):
             # Skip metadata files
-            if book_path.name in ['.chunks.json', '.topic-index.json', '.faiss.index']:
+            if book_path.name in [CHUNK_STORE_NAME, LEGACY_CHUNKS_NAME, VECTORS_NAME, '.topic-index.json', '.faiss.index']:
                 continue
 
             book_id = book_path.stem.lower().replace(' ', '_')
@@ -388,7 +728,7 @@ def bootstrap_topic_metadata(topic_data: Dict) -> bool:
 
 def detect_file_changes(library_root: Path, registry: Dict) -> set:
     """
-    Detect which topics have new/modified files
+    Detect which topics have new/modified/deleted files
     Returns set of topic paths that need reindexing
 
     More granular than hash-based detection:
@@ -442,60 +782,92 @@ def detect_file_changes(library_root: Path, registry: Dict) -> set:
             if has_changes:
                 break
 
+        # Deleted file (indexed but no longer on disk)
+        if not has_changes:
+            has_changes = any(not (topic_dir / filename).exists() for filename in indexed_files)
+
         if has_changes:
             affected_topics.add(topic_path_str)
 
     return affected_topics
 
 
-def index_topic(topic_data: Dict, registry: Dict, force: bool = False) -> bool:
+class TopicJob:
+    """
+    One topic's indexing plan (books to embed, chunks to drop) plus its
+    already-started book extraction. Messages are buffered so a job
+    prepared ahead of time prints in order when its turn comes.
     """
-    Index a single topic
 
-    Args:
-        topic_data: Topic entry from registry
-        registry: Main metadata.json content
-        force: If True, skip delta detection and always reindex
+    def __init__(self, topic_data: Dict):
+        self.topic_data = topic_data
+        self.topic_id = topic_data['id']
+        self.topic_path = LIBRARY_ROOT / topic_data['path']
+        self.metadata_file = self.topic_path / ".topic-index.json"
+        self.faiss_path = self.topic_path / ".faiss.index"
+        # Chunk store, or the legacy .chunks.json of a not yet converted topic
+        self.chunks_path = chunks_file(self.topic_path) or self.topic_path / CHUNK_STORE_NAME
+        self.vectors_path = self.topic_path / VECTORS_NAME
+
+        self.topic_meta = None
+        self.incremental = False
+        self.removed_keys = set()
+        self.books_to_load = {}
+        self.failed_books = []
+        self.extraction = None
+        self.next_key = 0
+
+        # Interrupted-run checkpoint (see index_checkpoint.py)
+        self.checkpoint = None
+        self.resumed_books = {}
+
+        # Stage timings for the run report (see index_telemetry.py)
+        self.stats = TopicStats(self.topic_id)
+
+        # Set when the job ends before embedding: True = nothing to do, False = failed
+        self.status = None
+        self.messages = []
+
+    def log(self, message: str) -> None:
+        self.messages.append(message)
+
+    def print_messages(self) -> None:
+        print(f"\n{'='*60}")
+        print(f"📖 Indexing: {self.topic_id}")
+        print(f"   Path: {self.topic_path.relative_to(LIBRARY_ROOT.parent)}")
+        print(f"{'='*60}")
+        for message in self.messages:
+            print(message)
+        self.messages = []
 
-    Returns:
-        True if successful, False if failed
-    """
-    topic_id = topic_data['id']
-    topic_path = LIBRARY_ROOT / topic_data['path']
-    metadata_file = topic_path / ".topic-index.json"
 
-    print(f"\n{'='*60}")
-    print(f"📖 Indexing: {topic_id}")
-    print(f"   Path: {topic_path.relative_to(LIBRARY_ROOT.parent)}")
-    print(f"{'='*60}")
+def prepare_topic(topic_data: Dict, force: bool = False, use_text_cache: bool = True,
+                  pool: Optional[ProcessPoolExecutor] = None, workers: int = DEFAULT_WORKERS,
+                  resume: bool = False) -> TopicJob:
+    """
+    Plan a topic and start extracting its books (cheap, no model needed)
 
-    # 1. Load or create per-topic metadata
-    if not metadata_file.exists():
-        # Scan for books in directory
-        books = []
-        for ext in ['*.epub', '*.pdf']:
-            for book_path in topic_path.glob(ext):
-                # Skip metadata files
-                if book_path.name.startswith('.'):
-                    continue
+    Only new/modified books are scheduled: their chunks will be added to the
+    existing ID-mapped FAISS index and chunk store, and chunks of
+    modified/deleted books removed. Legacy (non ID-mapped) indexes and
+    --force schedule a full rebuild. With resume, books completed by an
+    interrupted run of the same plan are taken from its checkpoint.
+    """
+    job = TopicJob(topic_data)
+    topic_path = job.topic_path
 
-                book_id = book_path.stem.lower().replace(' ', '_')
-                mtime = os.path.getmtime(book_path)
+    files = scan_topic(topic_path)
+    books_on_disk = {name: topic_path / name for name in files}
 
-                books.append({
-                    'id': book_id,
-                    'title': book_path.stem,
-                    'filename': book_path.name,
-                    'author': 'Unknown',
-                    'tags': [],
-                    'last_modified': mtime
-                })
+    # 1. Load or create per-topic metadata
+    if not job.metadata_file.exists():
+        books = [new_book_entry(book_path) for book_path in books_on_disk.values()]
 
         # Create minimal topic-index.json for force mode
         topic_meta = {
             "schema_version": "2.0",
-            "topic_id": topic_id,
-            "embedding_model": embed_model.model_name.split('/')[-1],
+            "topic_id": job.topic_id,
+            "embedding_model": embed_service.short_name,
             "chunk_settings": {
                 "size": Settings.chunk_size,
                 "overlap": Settings.chunk_overlap
@@ -504,170 +876,609 @@ def index_topic(topic_data: Dict, registry: Dict, force: bool = False) -> bool:
             "content_hash": None,
             "books": books
         }
-        print(f"   💡 Creating new topic-index.json with {len(books)} books")
+        job.log(f"   💡 Creating new topic-index.json with {len(books)} books")
     else:
-        with open(metadata_file, 'r') as f:
+        with open(job.metadata_file, 'r') as f:
             topic_meta = json.load(f)
 
-    books_count = len(topic_meta['books'])
-    print(f"   📚 Books: {books_count}")
+    job.topic_meta = topic_meta
+    job.log(f"   📚 Books: {len(topic_meta['books'])}")
 
     # 2. Delta detection (skip if --force)
     if not force:
-        current_hash = compute_content_hash(topic_path)
+        current_hash = compute_content_hash(topic_path, files)
         stored_hash = topic_meta.get('content_hash')
 
         if current_hash == stored_hash and stored_hash is not None:
-            print(f"   ⏭️  No changes detected (hash match)")
-            print(f"   💡 Use --force to reindex anyway")
-            return True
+            job.log(f"   ⏭️  No changes detected (hash match)")
+            job.log(f"   💡 Use --force to reindex anyway")
+            job.status = True
+            return job
 
         if stored_hash:
-            print(f"   🔄 Changes detected (hash mismatch)")
+            job.log(f"   🔄 Changes detected (hash mismatch)")
         else:
-            print(f"   🆕 First indexing (no hash stored)")
+            job.log(f"   🆕 First indexing (no hash stored)")
+
+    # 3. Per-book plan: sync book list with folder, find dirty books
+    known_files = {book['filename'] for book in topic_meta['books']}
+    deleted_books = [b for b in topic_meta['books'] if b['filename'] not in books_on_disk]
+    added_books = [new_book_entry(p) for name, p in books_on_disk.items() if name not in known_files]
+
+    topic_meta['books'] = [b for b in topic_meta['books'] if b['filename'] in books_on_disk] + added_books
+
+    job.incremental = (
+        not force
+        and topic_meta.get('index_format') == INDEX_FORMAT
+        and job.faiss_path.exists()
+        and job.chunks_path.exists()
+        # Vectors of unchanged books come from .vectors.npy, or from a flat index
+        and (job.vectors_path.exists() or topic_meta.get('index_factory', DEFAULT_FACTORY) == DEFAULT_FACTORY)
+    )
 
-    # 2. Load all raw documents
-    raw_documents = []
-    failed_books = []
+    if job.incremental:
+        dirty_books = [
+            b for b in topic_meta['books']
+            if b.get('index_key') is None
+            or os.path.getmtime(books_on_disk[b['filename']]) != b.get('last_modified')
+        ]
+    else:
+        dirty_books = list(topic_meta['books'])
+        if not force and topic_meta.get('index_format') != INDEX_FORMAT and job.faiss_path.exists():
+            job.log(f"   ♻️  Legacy index format, rebuilding topic")
 
-    for book in topic_meta['books']:
-        book_path = topic_path / book['filename']
+    job.removed_keys = {
+        b['index_key'] for b in dirty_books + deleted_books
+        if b.get('index_key') is not None
+    }
 
-        if not book_path.exists():
-            print(f"      ⚠️  Not found: {book['filename']}")
-            failed_books.append({
-                'filename': book['filename'],
-                'error': 'File not found'
-            })
+    unchanged = len(topic_meta['books']) - len(dirty_books)
+    job.log(f"   🧮 Books: +{len(added_books)} new, ~{len(dirty_books) - len(added_books)} changed, "
+            f"-{len(deleted_books)} deleted, ={unchanged} unchanged")
+
+    for book in dirty_books:
+        book_path = books_on_disk[book['filename']]
+
+        # Old chunks are gone from the index; reset until re-embedded
+        book['index_key'] = None
+        book['chunk_count'] = 0
+
+        file_ext = book_path.suffix.lower()
+        if file_ext not in SUPPORTED_EXTENSIONS:
+            job.log(f"      ⚠️  Unsupported: {book['filename']}")
             continue
 
-        print(f"      Loading: {book['title']}")
+        job.books_to_load[book_path] = book
+
+    job.next_key = topic_meta.get('next_index_key', 0)
+
+    # 4. Checkpoint: same plan + same inputs = resumable
+    job.checkpoint = TopicCheckpoint(job.topic_id, {
+        'embedding_model': embed_service.cache_name,
+        'chunk_settings': [Settings.chunk_size, Settings.chunk_overlap],
+        'extractor_version': EXTRACTOR_VERSION,
+        'index_format': INDEX_FORMAT,
+        'base': [file_signature(job.faiss_path), file_signature(job.chunks_path),
+                 file_signature(job.vectors_path)] if job.incremental else None,
+        'removed_keys': sorted(job.removed_keys),
+        'next_index_key': job.next_key,
+        'books': {book_path.name: file_signature(book_path) for book_path in job.books_to_load}
+    })
+
+    if resume:
+        state = job.checkpoint.resume()
+        if state:
+            books_by_name = {book['filename']: book for book in topic_meta['books']}
+            for filename, entry in state['books'].items():
+                books_by_name[filename].update(entry)
+            job.resumed_books = state['books']
+            job.next_key = state['next_key']
+            job.log(f"   ⏯️  Resuming: {len(job.resumed_books)} books "
+                    f"({job.checkpoint.batches_saved} batches) from checkpoint")
+        elif job.checkpoint.has_stale():
+            job.log(f"   ⚠️  Checkpoint was made for different inputs, starting topic over")
+    elif job.checkpoint.resume():
+        job.log(f"   💡 Interrupted run found ({job.checkpoint.batches_saved} batches), "
+                f"use --resume to continue it")
+
+    # 5. Start extraction now (runs in the pool while earlier topics embed)
+    to_extract = [p for p in job.books_to_load if p.name not in job.resumed_books]
+    job.extraction = ExtractionStream(to_extract, pool, use_text_cache, window=workers * 2)
+    if to_extract:
+        job.log(f"\n   🔨 Streaming {len(to_extract)} books "
+                f"({min(workers, len(to_extract))} workers, {EMBED_STREAM_BATCH} chunks/batch)...")
+
+    return job
+
+
+def embed_topic(job: TopicJob) -> Optional[TopicIndexWriter]:
+    """
+    Consume a job's extraction: chunk → embed → append to FAISS (CPU-bound stage)
 
+    Returns:
+        Writer holding the updated index, or None if failed
+    """
+    import faiss
+
+    topic_meta = job.topic_meta
+
+    # 6. Load embedding model (only if something needs embedding)
+    encoder = None
+    if job.extraction.book_paths:
         try:
-            # Detect file type and load
-            file_ext = book_path.suffix.lower()
+            # Shared service: model is loaded on the first topic only; with a
+            # pool only the tokenizer is, the workers hold the models
+            if embed_pool:
+                encoder = PooledEncoder(embed_service.planner, embed_pool)
+            else:
+                embed_service.model
+                encoder = embed_service
+        except Exception as e:
+            print(f"      ❌ Failed to load embedding model: {e}")
+            job.extraction.cancel()
+            return None
 
-            if file_ext == '.epub':
-                docs = epub_reader.load_data(str(book_path))
-            elif file_ext == '.pdf':
-                docs = pdf_reader.load_data(str(book_path))
+    # 7. Open index: existing one (incremental) or empty (rebuild)
+    # (existing chunks and vectors are streamed into the new files, never loaded whole)
+    try:
+        base_chunks = base_vectors = base_index = None
+        if job.incremental:
+            base_chunks = iter_chunks(job.chunks_path)
+            if job.vectors_path.exists():
+                base_vectors = load_vectors(job.vectors_path)
             else:
-                print(f"         ⚠️  Unsupported: {file_ext}")
+                # Indexed before vectors were stored: recover them from the flat index
+                base_index = faiss.read_index(str(job.faiss_path))
+        # Variant pinned with topic_vectors.py rebuild-index --factory survives reindexing;
+        # the index is rebuilt from vectors anyway, so unrecorded (legacy) topics move to cosine
+        recorded = topic_spec(topic_meta)
+        metric = index_metric or (recorded['metric'] if recorded else DEFAULT_METRIC)
+        pinned = dict(recorded, metric=metric) if recorded and recorded['pinned'] and index_family == 'auto' else None
+        writer = TopicIndexWriter(
+            job.topic_path, base_chunks, base_vectors, base_index, job.removed_keys,
+            index=pinned or index_family,
+            metric=metric,
+            dtype=vectors_dtype,
+            memory_budget=index_memory_budget
+        )
+        del base_vectors, base_index
+    except Exception as e:
+        print(f"      ❌ Failed to load existing index: {e}")
+        job.extraction.cancel()
+        return None
+
+    # Replay checkpointed batches (chunks of books unfinished at the crash are dropped)
+    done_books = dict(job.resumed_books)
+    if done_books:
+        resumed_keys = {entry['index_key'] for entry in done_books.values()}
+        for chunks, embeddings in job.checkpoint.batches():
+            keep = [i for i, chunk in enumerate(chunks) if chunk['chunk_id'] >> CHUNK_ID_BITS in resumed_keys]
+            writer.add_records([chunks[i] for i in keep], embeddings[keep])
+        resumed_chunks = writer.added
+        print(f"   ⏯️  {resumed_chunks} chunks restored from checkpoint")
+    else:
+        resumed_chunks = 0
+        if job.books_to_load:
+            job.checkpoint.start()
+
+    # 8. Stream dirty books: extract → chunk → embed → append to FAISS
+    pending_nodes = []
+    pending_ids = []
+    open_books = deque()  # (end position in stream, book) until fully embedded
+    queued = 0
+    cache_hits_before = embed_cache.hits if embed_cache else 0
+    stats = job.stats
+
+    def flush(count: int) -> None:
+        batch, ids = pending_nodes[:count], pending_ids[:count]
+        del pending_nodes[:count], pending_ids[:count]
+        with stats.time('embed'):
+            embeddings = embed_texts(encoder, [n.text for n in batch])
+        chunks = writer.add(batch, embeddings, ids)
+
+        # Checkpoint the batch with every book whose chunks are all embedded
+        while open_books and open_books[0][0] <= writer.added - resumed_chunks:
+            _, done = open_books.popleft()
+            done_books[done['filename']] = {
+                key: done[key] for key in ('index_key', 'chunk_count', 'last_modified')
+            }
+        job.checkpoint.save_batch(chunks, embeddings, {'books': done_books, 'next_key': job.next_key})
+
+    try:
+        for book_path, docs, error, cached, extract_seconds in job.extraction:
+            book = job.books_to_load[book_path]
+
+            if error:
+                stats.add_book(book['filename'], 0, extract_seconds, error=error)
+                print(f"      ❌ {book['title']}: {error}")
+                job.failed_books.append({
+                    'filename': book['filename'],
+                    'error': error
+                })
                 continue
 
             # Add metadata to raw documents
             for doc in docs:
-                doc.metadata = {
-                    'book_id': book['id'],
-                    'book_title': book['title'],
-                    'book_author': book.get('author', 'Unknown'),
-                    'topic_id': topic_id,
-                    'topic_folder': topic_data['path'],
-                    'tags': ','.join(book.get('tags', []))
-                }
-
-            raw_documents.extend(docs)
-            print(f"         ✓ {len(docs)} raw docs")
-
-        except Exception as e:
-            print(f"         ❌ Error: {e}")
-            failed_books.append({
-                'filename': book['filename'],
-                'error': str(e)
-            })
+                location = doc_location(book, doc.metadata)
+                doc.metadata = book_doc_metadata(book, job.topic_data)
+                doc.metadata.update(location)
+                doc.excluded_embed_metadata_keys = list(LOCATION_KEYS)
+                doc.excluded_llm_metadata_keys = list(LOCATION_KEYS)
+
+            chunk_started = time.perf_counter()
+            nodes = node_parser.get_nodes_from_documents(docs)
+            chunk_seconds = time.perf_counter() - chunk_started
+            pages = len(docs)
+            del docs
+
+            if len(nodes) >= 1 << CHUNK_ID_BITS:
+                stats.add_book(book['filename'], pages, extract_seconds, len(nodes), chunk_seconds, cached,
+                               error='Too many chunks')
+                print(f"      ❌ {book['title']}: {len(nodes)} chunks exceeds per-book ID range")
+                job.failed_books.append({
+                    'filename': book['filename'],
+                    'error': f'Too many chunks ({len(nodes)})'
+                })
+                continue
 
-    if not raw_documents:
-        print(f"   ❌ No documents loaded")
-        return False
+            id_start, _ = book_id_range(job.next_key)
+            book['index_key'] = job.next_key
+            book['chunk_count'] = len(nodes)
+            book['last_modified'] = os.path.getmtime(book_path)
+            job.next_key += 1
 
-    # 3. Apply chunking to raw documents
-    print(f"\n   ✂️  Chunking {len(raw_documents)} raw docs...")
-    nodes = node_parser.get_nodes_from_documents(raw_documents)
-    print(f"   📝 Generated {len(nodes)} chunks")
+            pending_nodes.extend(nodes)
+            pending_ids.extend(range(id_start, id_start + len(nodes)))
+            queued += len(nodes)
+            open_books.append((queued, book))
+            stats.add_book(book['filename'], pages, extract_seconds, len(nodes), chunk_seconds, cached)
+            print(f"      ✓ {book['title']}: {len(nodes)} chunks{' (cached text)' if cached else ''}")
+            del nodes
 
-    if not nodes:
-        print(f"   ❌ No chunks generated")
-        return False
+            while len(pending_nodes) >= EMBED_STREAM_BATCH:
+                flush(EMBED_STREAM_BATCH)
+                print(f"         🔨 {writer.added} chunks embedded")
 
-    # 4. Build embeddings manually (no VectorStoreIndex needed)
-    print(f"\n   🔨 Generating embeddings...")
+        if pending_nodes:
+            flush(len(pending_nodes))
 
-    try:
-        import numpy as np
-        import faiss
-        from sentence_transformers import SentenceTransformer
-
-        # Use configured embedding model from Settings
-        model_name = Settings.embed_model.model_name
-        model = SentenceTransformer(model_name, cache_folder=str(MODELS_DIR))
-
-        texts = [node.text for node in nodes]
-        embeddings_list = model.encode(texts, show_progress_bar=True, batch_size=32)
-        print(f"      ✓ Embeddings generated")
     except Exception as e:
+        writer.abort()
+        job.extraction.cancel()
         print(f"      ❌ Indexing failed: {e}")
-        return False
+        return None
 
-    # 5. Save to topic folder
-    print(f"\n   💾 Saving...")
+    if not writer.count:
+        writer.abort()
+        print(f"   ❌ No chunks generated")
+        return None
 
-    # Build and save FAISS index
-    faiss_path = topic_path / ".faiss.index"
-    try:
-        embeddings_array = np.array(embeddings_list, dtype=np.float32)
-        dimension = embeddings_array.shape[1]
+    stats.chunks_embedded = writer.added - resumed_chunks
+    stats.chunks_resumed = resumed_chunks
+    stats.chunks_total = writer.count
+    print(f"   📝 {writer.added - resumed_chunks} chunks embedded, {writer.count} chunks in topic")
+    if encoder:
+        print(f"   ⚙️  Batching: {embed_service.tuner.describe()}")
+    if embed_cache and writer.added > resumed_chunks:
+        print(f"   ♻️  Embedding cache: {embed_cache.hits - cache_hits_before}/{writer.added - resumed_chunks} chunks reused")
 
-        faiss_index = faiss.IndexFlatL2(dimension)
-        faiss_index.add(embeddings_array)
+    return writer
 
-        faiss.write_index(faiss_index, str(faiss_path))
-        print(f"      ✓ {faiss_path.name}")
-    except Exception as e:
-        print(f"      ❌ Failed to save index: {e}")
-        return False
 
-    # Save chunks.json
-    chunks_file = topic_path / ".chunks.json"
-    chunks_list = []
-    for i, node in enumerate(nodes):
-        chunks_list.append({
-            'chunk_full': node.text,
-            'book_id': node.metadata.get('book_id'),
-            'book_title': node.metadata.get('book_title'),
-            'book_author': node.metadata.get('book_author'),
-            'topic_id': node.metadata.get('topic_id'),
-            'topic_folder': node.metadata.get('topic_folder'),
-            'chunk_index': i
-        })
+def finalize_topic(job: TopicJob, writer: TopicIndexWriter) -> bool:
+    """
+    Write FAISS/chunks artifacts and topic metadata (I/O stage, may run
+    on a background thread while the next topic embeds)
+
+    Returns:
+        True if successful, False if failed
+    """
+    topic_meta = job.topic_meta
+
+    stats = job.stats
 
+    # 9. Save to topic folder (FAISS index is built from the stored vectors here)
     try:
-        with open(chunks_file, 'w', encoding='utf-8') as f:
-            json.dump(chunks_list, f, ensure_ascii=False, indent=2)
-        print(f"      ✓ {chunks_file.name} ({len(chunks_list)} chunks)")
+        with stats.time('faiss_write'):
+            writer.commit()
+        stats.seconds['faiss_build'] = writer.build_seconds
+        stats.seconds['faiss_write'] -= writer.build_seconds
+        print(f"   💾 {job.topic_id}: {writer.faiss_path.name} ({writer.spec['factory']}), "
+              f"{writer.chunks_path.name}, {writer.vectors_path.name} ({writer.count} chunks)")
     except Exception as e:
-        print(f"      ❌ Failed to save chunks: {e}")
+        writer.abort()
+        stats.finish('failed')
+        print(f"   ❌ {job.topic_id}: Failed to save index: {e}")
         return False
 
-    # 5. Update topic metadata
+    # 10. Update topic metadata
+    topic_meta['index_format'] = INDEX_FORMAT
+    topic_meta.update(spec_metadata(writer.spec))
+    topic_meta['vectors_dtype'] = vectors_dtype
+    topic_meta['next_index_key'] = job.next_key
+    # Failed books stay out of the content hash and the manifest: smart mode
+    # reports them as new and the hash mismatch lets the topic retry them
+    failed = {book['filename'] for book in job.failed_books}
+    indexed = {name: stat for name, stat in scan_topic(job.topic_path).items() if name not in failed}
     topic_meta['last_indexed_at'] = time.time()
-    topic_meta['content_hash'] = compute_content_hash(topic_path)
+    topic_meta['content_hash'] = compute_content_hash(job.topic_path, indexed)
 
-    with open(metadata_file, 'w') as f:
+    with open(job.metadata_file, 'w') as f:
         json.dump(topic_meta, f, indent=2)
 
-    print(f"      ✓ {metadata_file.name} updated")
+    if library_state:
+        library_state.record_topic(job.topic_data['path'], indexed)
+
+    # Topic is durable now, its checkpoint is no longer needed
+    job.checkpoint.clear()
 
-    # 6. Report failures
-    if failed_books:
-        print(f"\n   ⚠️  {len(failed_books)} book(s) failed:")
-        for book in failed_books:
+    # 11. Report failures
+    if job.failed_books:
+        print(f"   ⚠️  {job.topic_id}: {len(job.failed_books)} book(s) failed:")
+        for book in job.failed_books:
             print(f"      • {book['filename']}: {book['error']}")
 
-    print(f"\n   ✅ Topic indexed successfully")
+    stats.finish('success')
+    print(f"   ✅ {job.topic_id}: indexed successfully")
     return True
 
 
+def index_topic(topic_data: Dict, registry: Dict, force: bool = False, workers: int = DEFAULT_WORKERS,
+                use_text_cache: bool = True, resume: bool = False, report: Optional[RunReport] = None) -> bool:
+    """
+    Index a single topic, book by book (prepare → embed → finalize, inline)
+
+    Args:
+        topic_data: Topic entry from registry
+        registry: Main metadata.json content
+        force: If True, skip delta detection and rebuild the whole topic
+        workers: Number of processes used to extract books
+        use_text_cache: Reuse extracted text of unchanged books (books/.cache/text)
+        resume: Continue from the checkpoint of an interrupted run (books/.cache/work)
+        report: Run report collecting this topic's stage timings
+
+    Returns:
+        True if successful, False if failed
+    """
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        job = prepare_topic(topic_data, force, use_text_cache, pool, workers, resume)
+        if report:
+            report.add(job.stats)
+        job.print_messages()
+        if job.status is not None:
+            job.stats.finish('unchanged' if job.status else 'failed')
+            return job.status
+
+        writer = embed_topic(job)
+        if writer is None:
+            job.stats.finish('failed')
+            return False
+        return finalize_topic(job, writer)
+    finally:
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+
+def index_topics(topics: List[Dict], force: bool = False, workers: int = DEFAULT_WORKERS,
+                 use_text_cache: bool = True, resume: bool = False,
+                 report: Optional[RunReport] = None) -> Dict[str, List[str]]:
+    """
+    Index many topics as a pipeline:
+
+        extract (process pool)  →  embed (this process)  →  write (background thread)
+
+    While topic N embeds, topic N+1 is already planned and its books are
+    extracting in the pool; topic N's artifacts are written while N+1
+    embeds. Wall-clock approaches max(extract, embed) instead of the sum.
+    At most one topic waits for its write, bounding memory.
+
+    Returns:
+        {'success': [topic_id...], 'failed': [topic_id...]}
+    """
+    results = {
+        'success': [],
+        'failed': []
+    }
+
+    def record(topic_id: str, success: bool) -> None:
+        results['success' if success else 'failed'].append(topic_id)
+
+    if not topics:
+        return results
+
+    pool = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    writer_pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix='index-writer')
+    pending_write = None
+
+    def prepare(topic_data: Dict) -> TopicJob:
+        try:
+            return prepare_topic(topic_data, force, use_text_cache, pool, workers, resume)
+        except Exception as e:
+            job = TopicJob(topic_data)
+            job.log(f"   ❌ Failed to plan topic: {e}")
+            job.status = False
+            return job
+
+    try:
+        next_job = prepare(topics[0])
+
+        for i in range(len(topics)):
+            job = next_job
+
+            # Start planning + extracting the next topic before embedding this one
+            next_job = prepare(topics[i + 1]) if i + 1 < len(topics) else None
+
+            if report:
+                report.add(job.stats)
+            job.print_messages()
+            if job.status is not None:
+                job.stats.finish('unchanged' if job.status else 'failed')
+                record(job.topic_id, job.status)
+                continue
+
+            writer = embed_topic(job)
+            if writer is None:
+                job.stats.finish('failed')
+                record(job.topic_id, False)
+                continue
+
+            # Bound memory: wait for the previous write before queueing this one
+            if pending_write:
+                record(pending_write[0], pending_write[1].result())
+            pending_write = (job.topic_id, writer_pool.submit(finalize_topic, job, writer))
+
+        if pending_write:
+            record(pending_write[0], pending_write[1].result())
+    finally:
+        writer_pool.shutdown(wait=True)
+        if pool:
+            pool.shutdown(wait=True, cancel_futures=True)
+
+    return results
+
+
+def sample_book(book_path: Path, book: Dict, topic_data: Dict, use_cache: bool) -> Tuple[Dict, List]:
+    """
+    Extract a few evenly spaced pages of a book and chunk them with the real splitter
+
+    Returns:
+        (sample for index_plan.estimate_book, sampled chunk nodes)
+    """
+    started = time.perf_counter()
+    cached = False
+    texts = None
+
+    if use_cache:
+        pages = text_cache.get(text_cache.cache_key(book_path, EXTRACTOR_VERSION))
+        if pages is not None:
+            total = len(pages)
+            texts = [pages[i]['text'] for i in index_plan.evenly_spaced(total, index_plan.SAMPLE_PAGES)]
+            cached = True
+
+    if texts is None:
+        if book_path.suffix.lower() == '.pdf':
+            total, texts = index_plan.sample_pdf_pages(str(book_path))
+        else:
+            # EPUBs are small zipped HTML: read fully, sample documents
+            docs = epub_reader.load_data(str(book_path))
+            total = len(docs)
+            texts = [docs[i].text for i in index_plan.evenly_spaced(total, index_plan.SAMPLE_PAGES)]
+
+    seconds = time.perf_counter() - started
+
+    metadata = book_doc_metadata(book, topic_data)
+    nodes = node_parser.get_nodes_from_documents([Document(text=t, metadata=dict(metadata)) for t in texts])
+
+    return {
+        'pages': total,
+        'sampled_pages': len(texts),
+        'sample_chunks': len(nodes),
+        'sample_chars': sum(len(t) for t in texts),
+        'sample_seconds': seconds,
+        'cached': cached
+    }, nodes
+
+
+def plan_topics(topics: List[Dict], force: bool = False, workers: int = DEFAULT_WORKERS,
+                use_text_cache: bool = True, resume: bool = False) -> Dict:
+    """
+    Estimate an indexing run without indexing anything (--plan); the only
+    write is the LRU touch of text cache entries read for samples
+
+    Plans each topic exactly like prepare_topic, samples its pending books,
+    then measures model load and embedding throughput on the sampled chunks.
+
+    Returns:
+        Plan dict (see index_plan.estimate_run)
+    """
+    pending = []
+    sampled_nodes = []
+    sampled_pages = 0
+
+    for topic_data in topics:
+        job = prepare_topic(topic_data, force, use_text_cache, None, workers, resume)
+        if job.status is not None:
+            continue
+
+        books = []
+        for book_path in job.extraction.book_paths:
+            try:
+                sample, nodes = sample_book(book_path, job.books_to_load[book_path], topic_data, use_text_cache)
+            except Exception as e:
+                print(f"   ⚠️  {job.topic_id}/{book_path.name}: sampling failed: {e}")
+                continue
+            books.append(index_plan.estimate_book(sample))
+            sampled_nodes.extend(nodes)
+            sampled_pages += sample['sampled_pages']
+
+        # Unchanged (and resumed) books keep their index_key, dirty ones were reset
+        kept_chunks = sum(b.get('chunk_count') or 0 for b in job.topic_meta['books'] if b.get('index_key') is not None)
+        pending.append((job.topic_id, books, kept_chunks))
+        print(f"   📐 {job.topic_id}: {len(books)} books sampled")
+
+    # Measure model load and embedding throughput on real chunks (with a
+    # pool this process loads only the tokenizer, workers load on warm-up)
+    started = time.perf_counter()
+    if embed_pool:
+        encoder = PooledEncoder(embed_service.planner, embed_pool)
+    else:
+        embed_service.model
+        encoder = embed_service
+    load_seconds = time.perf_counter() - started
+    model_bytes = peak_rss_bytes()
+
+    sample_texts = [sampled_nodes[i].text for i in index_plan.evenly_spaced(len(sampled_nodes), index_plan.EMBED_SAMPLE)]
+    chunks_per_second = 0.0
+    if sample_texts:
+        started = time.perf_counter()
+        encoder.encode(sample_texts[:16])  # warm-up
+        if embed_pool:
+            load_seconds += time.perf_counter() - started
+        started = time.perf_counter()
+        encoder.encode(sample_texts)
+        chunks_per_second = len(sample_texts) / max(time.perf_counter() - started, 1e-9)
+
+    # Average chunk store size per chunk (text + fixed-width columns)
+    record_sizes = [
+        len(node.text.encode('utf-8')) + index_plan.CHUNK_STORE_OVERHEAD
+        for node in sampled_nodes[:1000]
+    ]
+    bytes_per_chunk = sum(record_sizes) / len(record_sizes) if record_sizes else 1500
+    avg_chunk_chars = sum(len(n.text) for n in sampled_nodes) / len(sampled_nodes) if sampled_nodes else 1024
+
+    estimates = [
+        index_plan.estimate_topic(topic_id, books, kept, workers, chunks_per_second,
+                                  embed_service.dim, bytes_per_chunk, np.dtype(vectors_dtype).itemsize,
+                                  index_family, index_memory_budget)
+        for topic_id, books, kept in pending
+    ]
+
+    all_books = [b for _, books, _ in pending for b in books]
+    avg_book_chars = sum(b['chars'] for b in all_books) / len(all_books) if all_books else 0
+
+    return index_plan.estimate_run(
+        estimates,
+        model_bytes=model_bytes,
+        model_load_seconds=load_seconds,
+        batch_bytes=int(EMBED_STREAM_BATCH * (embed_service.dim * 4 + avg_chunk_chars * 2)),
+        activation_ceiling=embed_service.tuner.memory_ceiling,
+        extraction_window_bytes=int(min(workers, max(1, len(all_books))) * 2 * avg_book_chars * 2),
+        measurements={
+            'embedding': embed_service.describe(),
+            'embed_workers': embed_pool.workers if embed_pool else 1,
+            'extract_workers': workers,
+            'model_load_seconds': round(load_seconds, 2),
+            'model_rss_bytes': model_bytes,
+            'chunks_per_second': round(chunks_per_second, 1),
+            'embed_sample_chunks': len(sample_texts),
+            'sampled_pages': sampled_pages,
+            'bytes_per_chunk': round(bytes_per_chunk),
+            'measured_at': time.time()
+        }
+    )
+
+
 def main():
     parser = argparse.ArgumentParser(description='Index books with v2.0 metadata')
     parser.add_argument('topics', nargs='*', help='Topic IDs to index')
@@ -679,26 +1490,68 @@ def main():
     parser.add_argument('--topics', dest='topic_list', nargs='+', help='List of topic IDs')
     parser.add_argument('--model', choices=['bge'], default='bge',
                         help='Embedding model: bge (BAAI/bge-small-en-v1.5, 384-dim)')
+    parser.add_argument('--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f'Processes used to extract books in parallel (default: {DEFAULT_WORKERS})')
+    parser.add_argument('--no-text-cache', action='store_true',
+                        help='Re-parse every book instead of reusing books/.cache/text (see text_cache.py)')
+    parser.add_argument('--backend', choices=BACKENDS, default='torch',
+                        help='Embedding backend: torch, onnx or onnx-int8 (export first with embedding_backends.py), stub (benchmarks, no model)')
+    parser.add_argument('--embed-workers', type=int, default=1,
+                        help='Processes used to embed chunks, each with cores/N torch threads (default: 1, in-process)')
+    parser.add_argument('--embed-threads', type=int,
+                        help='CPU threads for in-process embedding (default: backend decides)')
+    parser.add_argument('--embed-mem-mb', type=int, default=1024,
+                        help='Activation memory ceiling per embedding batch, caps auto-tuned batch size (default: 1024)')
+    parser.add_argument('--resume', action='store_true',
+                        help='Continue interrupted topics from their checkpoints if inputs are unchanged (see index_checkpoint.py)')
+    parser.add_argument('--plan', action='store_true',
+                        help='Estimate time, disk and peak memory of the run (samples pages, measures embedding) and exit '
+                             'without indexing (new topic folders are still registered)')
+    parser.add_argument('--plan-json', metavar='FILE',
+                        help='With --plan, also write the estimate as JSON (- for stdout)')
+    parser.add_argument('--report', metavar='FILE',
+                        help='Telemetry JSON path (default: books/.reports/index-<timestamp>.json)')
+    parser.add_argument('--report-md', metavar='FILE', nargs='?', const=str(MARKDOWN_REPORT),
+                        help=f'Also render the telemetry report as Markdown (default: {MARKDOWN_REPORT.name} in MGMT/)')
+    parser.add_argument('--no-embed-cache', action='store_true',
+                        help='Re-embed every chunk instead of reusing books/.cache/embeddings.sqlite (see embedding_cache.py)')
+    parser.add_argument('--vectors', choices=VECTOR_DTYPES, default='float32',
+                        help='Storage type of raw vectors kept for model-free rebuilds (see topic_vectors.py, default: float32)')
+    parser.add_argument('--index', choices=INDEX_FAMILIES, default='auto',
+                        help='FAISS index family: auto picks flat/hnsw/ivfpq by topic size and --index-mem-mb (default: auto)')
+    parser.add_argument('--index-mem-mb', type=int, default=DEFAULT_INDEX_MEMORY_MB,
+                        help=f'Memory budget per topic index for --index auto (default: {DEFAULT_INDEX_MEMORY_MB})')
+    parser.add_argument('--metric', choices=METRICS,
+                        help=f'Index metric (default: keep each topic\'s, {DEFAULT_METRIC} for new topics)')
 
     args = parser.parse_args()
 
     # Setup embedding model
-    global embed_model
+    global embed_service, embed_cache, embed_pool, vectors_dtype, index_family, index_memory_budget, index_metric
+    index_metric = args.metric
+    vectors_dtype = args.vectors
+    index_family = args.index
+    index_memory_budget = args.index_mem_mb * 1024 * 1024
     model_config = EMBEDDING_MODELS[args.model]
-    embed_model = HuggingFaceEmbedding(
+    embed_service = get_embedding_service(
         model_name=model_config["name"],
-        cache_folder=str(MODELS_DIR)
+        dim=model_config["dim"],
+        backend=args.backend,
+        threads=args.embed_threads,
+        memory_ceiling_mb=args.embed_mem_mb
     )
-    Settings.embed_model = embed_model
+    if not args.no_embed_cache:
+        embed_cache = EmbeddingCache(embed_service.cache_name)
     Settings.chunk_size = 1024
     Settings.chunk_overlap = 200
 
     print("🚀 Librarian Indexer v2.0")
     print("=" * 60)
     print(f"✓ Model: {args.model} - {model_config['desc']}")
-    print(f"✓ Embedding: {model_config['name']} ({model_config['dim']}-dim)")
+    print(f"✓ Embedding: {embed_service.describe()}")
     print("✓ Chunking: 1024 chars, 200 overlap")
     print("✓ Schema: chunks.json v2.0 (page/paragraph metadata)")
+    print(f"✓ Extraction: {args.workers} worker(s)")
 
     # Scan for new folders and update library-index.json
     print(f"\n🔍 Scanning for new topic folders...")
@@ -744,14 +1597,39 @@ def main():
         args.smart = True
         print(f"\n💡 No mode specified, defaulting to --smart")
 
+    global library_state
+    library_state = LibraryState()
+
     # Determine which topics to index
     if args.smart:
-        # Smart mode: detect file-level changes
+        # Smart mode: diff the folders against the manifest (one scandir per topic)
         print(f"\n🧠 Smart mode: Detecting file changes...")
-        affected_topic_paths = detect_file_changes(LIBRARY_ROOT, registry)
+        known = library_state.known_topics()
+        tracked = [t['path'] for t in registry['topics'] if t['path'] in known]
+        changes = library_state.diff(tracked)
+        affected_topic_paths = changes.topics()
+
+        if changes:
+            print(f"   📄 {changes.summary()}")
+            print_changes(changes, indent='      ')
+
+        # Topics indexed before the manifest existed: compare with their
+        # topic-index.json once, then track the unchanged ones (not in
+        # --plan, which leaves that to the real run)
+        untracked = [t for t in registry['topics'] if t['path'] not in known]
+        if untracked:
+            legacy_affected = detect_file_changes(LIBRARY_ROOT, {'topics': untracked})
+            affected_topic_paths |= legacy_affected
+            if not args.plan:
+                for topic in untracked:
+                    if topic['path'] not in legacy_affected:
+                        topic_dir = LIBRARY_ROOT / topic['path']
+                        library_state.record_topic(topic['path'], scan_topic(topic_dir), with_digests=False)
+                print(f"   🗂️  {len(untracked)} topics added to library state manifest")
 
         if not affected_topic_paths:
             print(f"\n✅ No changes detected - nothing to reindex!")
+            library_state.close()
             return 0
 
         topics_to_index = [t for t in registry['topics'] if t['path'] in affected_topic_paths]
@@ -760,8 +1638,7 @@ def main():
         for topic in topics_to_index:
             print(f"   • {topic['path']}")
 
-        # Force reindex affected topics
-        args.force = True
+        # Affected topics are updated book by book (no forced rebuild)
 
     elif args.all:
         topics_to_index = registry['topics']
@@ -790,22 +1667,77 @@ def main():
         print(f"   python indexer_v2.py cooking ai_policy           # Index multiple topics")
         return 1
 
-    # Index topics
-    results = {
-        'success': [],
-        'failed': []
-    }
+    # Start embedding workers (model loads once per worker, reused by all topics)
+    if args.embed_workers > 1:
+        embed_pool = EmbeddingPool(embed_service.model_name, embed_service.backend, args.embed_workers)
+        print(f"\n⚙️  Embedding pool: {embed_pool.workers} workers × {embed_pool.threads} threads")
+
+    # Plan mode: estimate only. No index, chunk, vector, topic metadata or
+    # manifest entry is written; what the startup above persists stays:
+    # new topic folders in .library-index.json, the state manifest and
+    # embedding cache databases (created if missing), LRU touches of
+    # sampled books' text cache entries
+    if args.plan:
+        print(f"\n📐 Planning {len(topics_to_index)} topics (sampling {index_plan.SAMPLE_PAGES} pages per book)...")
+        plan = plan_topics(topics_to_index, force=args.force, workers=args.workers,
+                           use_text_cache=not args.no_text_cache, resume=args.resume)
+        print(f"\n{index_plan.render_table(plan)}")
+        print(f"   Embedding: {plan['measurements']['chunks_per_second']:.0f} chunks/s measured "
+              f"({plan['measurements']['embedding']}), embedding cache hits not counted")
+        if args.plan_json:
+            index_plan.write_json(plan, args.plan_json)
+        if embed_pool:
+            embed_pool.close()
+        if embed_cache:
+            embed_cache.close()
+        library_state.close()
+        return 0
 
-    for topic in topics_to_index:
-        success = index_topic(topic, registry, force=args.force)  # Use --force flag
-        if success:
-            results['success'].append(topic['id'])
-        else:
-            results['failed'].append(topic['id'])
+    generation = library_state.begin_generation()
+    print(f"\n🗂️  Library state generation {generation}")
+
+    # Index topics (extraction of topic N+1 and writing of topic N overlap embedding)
+    report = RunReport({
+        'argv': sys.argv[1:],
+        'embedding': embed_service.describe(),
+        'extract_workers': args.workers,
+        'embed_workers': args.embed_workers,
+        'generation': generation
+    })
+    results = index_topics(topics_to_index, force=args.force, workers=args.workers,
+                           use_text_cache=not args.no_text_cache, resume=args.resume, report=report)
+
+    # Telemetry report (JSON always, Markdown on request)
+    report_path = report.write(args.report)
+    print(f"\n📊 Report: {report_path}")
+    if args.report_md:
+        Path(args.report_md).write_text(render_markdown(report.to_dict()), encoding='utf-8')
+        print(f"📊 Markdown report: {args.report_md}")
+
+    # Keep extracted-text cache under its size cap
+    if not args.no_text_cache:
+        evicted = text_cache.evict()
+        if evicted:
+            print(f"\n🧹 Text cache: evicted {evicted} least-recently-used entries")
+
+    if embed_pool:
+        embed_pool.close()
+
+    # Report and trim embedding cache
+    if embed_cache:
+        if embed_cache.hits or embed_cache.misses:
+            print(f"\n♻️  Embedding cache: {embed_cache.hit_rate() * 100:.1f}% hit rate "
+                  f"({embed_cache.hits} hits, {embed_cache.misses} misses)")
+        evicted = embed_cache.evict()
+        if evicted:
+            print(f"🧹 Embedding cache: evicted {evicted} least-recently-used vectors")
+        embed_cache.close()
+
+    library_state.close()
 
     # Update library-index.json with embedding model
     if not args.bootstrap and results['success']:
-        registry['embedding_model'] = embed_model.model_name.split('/')[-1]
+        registry['embedding_model'] = embed_service.short_name
         with open(MAIN_METADATA, 'w') as f:
             json.dump(registry, f, indent=2)
         print(f"\n📝 Updated library-index.json with model: {registry['embedding_model']}")
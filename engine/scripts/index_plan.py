@@ -0,0 +1,184 @@
+#!/usr/bin/env python3
+"""
+Indexing cost model for index_library.py --plan
+
+The indexer samples a few pages of every pending book, chunks them with the
+real splitter and embeds a sample of the resulting chunks on this machine.
+This module turns those measurements into per-topic and total predictions:
+
+    wall time   model load + per topic max(extract / workers, embed)
+                (extraction of a topic overlaps embedding, see index_topics)
+    disk        .faiss.index (flat / HNSW / IVF-PQ as chosen for the topic's size,
+                see topic_vectors.choose_index) + .chunks.bin
+                + .vectors.npy (dim * 4 or 2 bytes per chunk)
+    peak memory model + largest topic index + embedding batch + activation
+                ceiling + extraction window (the existing chunk store is
+                streamed during incremental updates, never loaded)
+
+Estimates ignore embedding cache hits, so they are an upper bound for
+re-indexing runs.
+"""
+
+import json
+from typing import List, Dict, Optional, Tuple
+
+from topic_vectors import DEFAULT_INDEX_MEMORY_MB, index_bytes, resolve_spec
+
+# Pages sampled per PDF (evenly spaced)
+SAMPLE_PAGES = 8
+
+# Chunks embedded to measure throughput
+EMBED_SAMPLE = 256
+
+# Chunk store bytes per chunk besides its text: text offset, chunk_id and
+# chunk_index int64s, five interned uint32 codes (see chunk_store.py)
+CHUNK_STORE_OVERHEAD = 8 + 2 * 8 + 5 * 4
+
+
+def evenly_spaced(total: int, count: int) -> List[int]:
+    """Up to count positions spread over range(total)"""
+    if total <= count:
+        return list(range(total))
+    step = total / count
+    return sorted({int(i * step + step / 2) for i in range(count)})
+
+
+def sample_pdf_pages(book_path: str, max_pages: int = SAMPLE_PAGES) -> Tuple[int, List[str]]:
+    """
+    Read evenly spaced pages of a PDF without parsing the whole file
+
+    Returns:
+        (total page count, texts of the sampled pages)
+    """
+    import fitz
+
+    with fitz.open(book_path) as doc:
+        total = doc.page_count
+        return total, [doc[i].get_text() for i in evenly_spaced(total, max_pages)]
+
+
+def faiss_bytes(chunks: int, dim: int, index: str = 'auto',
+                memory_budget: int = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024) -> int:
+    return index_bytes(resolve_spec(index, chunks, dim, 'l2', memory_budget), chunks, dim)
+
+
+def vectors_bytes(chunks: int, dim: int, itemsize: int = 4) -> int:
+    return chunks * dim * itemsize
+
+
+def chunk_store_bytes(chunks: int, bytes_per_chunk: float) -> int:
+    return int(chunks * bytes_per_chunk)
+
+
+def estimate_book(sample: Dict) -> Dict:
+    """
+    Scale one book's sample to the whole book
+
+    Args:
+        sample: {'pages', 'sampled_pages', 'sample_chunks', 'sample_chars', 'sample_seconds', 'cached'}
+    """
+    ratio = sample['pages'] / sample['sampled_pages'] if sample['sampled_pages'] else 0
+    return {
+        'pages': sample['pages'],
+        'chunks': int(round(sample['sample_chunks'] * ratio)),
+        'chars': int(sample['sample_chars'] * ratio),
+        'extract_seconds': 0.0 if sample['cached'] else sample['sample_seconds'] * ratio,
+        'cached_text': sample['cached']
+    }
+
+
+def estimate_topic(topic_id: str, books: List[Dict], kept_chunks: int, workers: int,
+                   chunks_per_second: float, dim: int, bytes_per_chunk: float, vector_itemsize: int = 4,
+                   index: str = 'auto', index_memory_budget: int = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024) -> Dict:
+    """
+    Predict one topic's cost from its book estimates
+
+    Args:
+        kept_chunks: Chunks of unchanged books carried over (incremental update)
+        vector_itemsize: Bytes per stored vector component (float32: 4, float16: 2)
+        index: Index family or 'auto' (see topic_vectors.choose_index)
+    """
+    new_chunks = sum(b['chunks'] for b in books)
+    total_chunks = kept_chunks + new_chunks
+    extract_seconds = sum(b['extract_seconds'] for b in books)
+    parallel_extract = extract_seconds / max(1, min(workers, len(books)))
+    embed_seconds = new_chunks / chunks_per_second if chunks_per_second else 0.0
+
+    return {
+        'topic_id': topic_id,
+        'books': len(books),
+        'pages': sum(b['pages'] for b in books),
+        'new_chunks': new_chunks,
+        'total_chunks': total_chunks,
+        'extract_seconds': round(extract_seconds, 1),
+        'embed_seconds': round(embed_seconds, 1),
+        'wall_seconds': round(max(parallel_extract, embed_seconds), 1),
+        'faiss_bytes': faiss_bytes(total_chunks, dim, index, index_memory_budget),
+        'chunk_store_bytes': chunk_store_bytes(total_chunks, bytes_per_chunk),
+        'vectors_bytes': vectors_bytes(total_chunks, dim, vector_itemsize)
+    }
+
+
+def estimate_run(topics: List[Dict], model_bytes: int, model_load_seconds: float,
+                 batch_bytes: int, activation_ceiling: int, extraction_window_bytes: int,
+                 measurements: Dict) -> Dict:
+    """Totals over all topics, including peak memory of the whole run"""
+    working_set = max((t['faiss_bytes'] for t in topics), default=0)
+    return {
+        'topics': topics,
+        'totals': {
+            'topics': len(topics),
+            'books': sum(t['books'] for t in topics),
+            'pages': sum(t['pages'] for t in topics),
+            'new_chunks': sum(t['new_chunks'] for t in topics),
+            'wall_seconds': round(model_load_seconds + sum(t['wall_seconds'] for t in topics), 1),
+            'disk_bytes': sum(t['faiss_bytes'] + t['chunk_store_bytes'] + t['vectors_bytes'] for t in topics),
+            'peak_memory_bytes': model_bytes + working_set + batch_bytes + activation_ceiling + extraction_window_bytes
+        },
+        'measurements': measurements
+    }
+
+
+def format_seconds(seconds: float) -> str:
+    if seconds < 60:
+        return f"{seconds:.0f}s"
+    if seconds < 3600:
+        return f"{seconds / 60:.1f}m"
+    return f"{seconds / 3600:.1f}h"
+
+
+def format_bytes(size: int) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if size < 1024 or unit == 'GB':
+            return f"{size:.0f} {unit}" if unit == 'B' else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def render_table(plan: Dict) -> str:
+    """Plain-text table of a plan (per topic + total)"""
+    header = f"{'Topic':<32} {'Books':>5} {'Pages':>7} {'Chunks':>8} {'Extract':>8} {'Embed':>8} {'Wall':>8} {'Disk':>10}"
+    lines = [header, '-' * len(header)]
+    for t in plan['topics']:
+        lines.append(
+            f"{t['topic_id'][:32]:<32} {t['books']:>5} {t['pages']:>7} {t['new_chunks']:>8} "
+            f"{format_seconds(t['extract_seconds']):>8} {format_seconds(t['embed_seconds']):>8} "
+            f"{format_seconds(t['wall_seconds']):>8} {format_bytes(t['faiss_bytes'] + t['chunk_store_bytes'] + t['vectors_bytes']):>10}"
+        )
+    totals = plan['totals']
+    lines.append('-' * len(header))
+    lines.append(
+        f"{'TOTAL':<32} {totals['books']:>5} {totals['pages']:>7} {totals['new_chunks']:>8} "
+        f"{'':>8} {'':>8} {format_seconds(totals['wall_seconds']):>8} {format_bytes(totals['disk_bytes']):>10}"
+    )
+    lines.append(f"Peak memory: ~{format_bytes(totals['peak_memory_bytes'])}")
+    return '\n'.join(lines)
+
+
+def write_json(plan: Dict, path: Optional[str]) -> None:
+    """Write plan JSON to a file, or stdout for '-'"""
+    data = json.dumps(plan, indent=2)
+    if path == '-':
+        print(data)
+    else:
+        with open(path, 'w') as f:
+            f.write(data + '\n')
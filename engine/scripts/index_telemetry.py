@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Per-stage indexing telemetry
+
+Every indexer run records, per topic and per book, how long each stage took
+and how much it produced, so runs can be compared and pathological books
+spotted:
+
+    book    pages, extract s, pages/s, chunks, chunk s, cached text, error
+    topic   extract s (sum over workers), chunk s, embed s, chunks/s,
+            FAISS build s, FAISS/chunks write s, wall s, peak RSS
+
+The report is written as JSON (books/.reports/index-<timestamp>.json) and
+optionally rendered as Markdown (MGMT/REPORT.md, see ROADMAP v1.5
+"FAILED to REPORT").
+
+Usage:
+    python index_telemetry.py                      # Render latest report as Markdown
+    python index_telemetry.py REPORT.json -o out.md
+"""
+
+import sys
+import json
+import time
+import argparse
+from contextlib import contextmanager
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from library_paths import LIBRARY_ROOT
+
+# Paths
+REPORTS_DIR = LIBRARY_ROOT / ".reports"
+MARKDOWN_REPORT = Path(__file__).parent.parent.parent / "MGMT" / "REPORT.md"
+
+STAGES = ('extract', 'chunk', 'embed', 'faiss_build', 'faiss_write')
+
+# Books listed in the Markdown "slowest" table
+SLOWEST_BOOKS = 10
+
+
+def peak_rss_bytes() -> int:
+    """Peak resident set size of this process so far"""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KB, macOS bytes
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def _rate(amount: float, seconds: float) -> Optional[float]:
+    return round(amount / seconds, 1) if seconds > 0 else None
+
+
+class TopicStats:
+    """Stage timings and counts of one topic"""
+
+    def __init__(self, topic_id: str):
+        self.topic_id = topic_id
+        self.status = 'pending'
+        self.seconds = {stage: 0.0 for stage in STAGES}
+        self.books: List[Dict] = []
+        self.chunks_embedded = 0
+        self.chunks_resumed = 0
+        self.chunks_total = 0
+        self.wall_seconds = None
+        self.peak_rss_bytes = None
+        self._started = time.perf_counter()
+
+    @contextmanager
+    def time(self, stage: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.seconds[stage] += time.perf_counter() - started
+
+    def add_book(self, filename: str, pages: int, extract_seconds: float, chunks: int = 0,
+                 chunk_seconds: float = 0.0, cached: bool = False, error: Optional[str] = None) -> None:
+        self.seconds['extract'] += extract_seconds
+        self.seconds['chunk'] += chunk_seconds
+        self.books.append({
+            'filename': filename,
+            'pages': pages,
+            'extract_seconds': round(extract_seconds, 3),
+            'pages_per_second': _rate(pages, extract_seconds),
+            'chunks': chunks,
+            'chunk_seconds': round(chunk_seconds, 3),
+            'cached_text': cached,
+            'error': error
+        })
+
+    def finish(self, status: str) -> None:
+        self.status = status
+        self.wall_seconds = time.perf_counter() - self._started
+        self.peak_rss_bytes = peak_rss_bytes()
+
+    def to_dict(self) -> Dict:
+        return {
+            'topic_id': self.topic_id,
+            'status': self.status,
+            'books': len(self.books),
+            'pages': sum(b['pages'] for b in self.books),
+            'chunks_embedded': self.chunks_embedded,
+            'chunks_resumed': self.chunks_resumed,
+            'chunks_total': self.chunks_total,
+            'seconds': {stage: round(value, 3) for stage, value in self.seconds.items()},
+            'pages_per_second': _rate(sum(b['pages'] for b in self.books), self.seconds['extract']),
+            'chunks_per_second': _rate(self.chunks_embedded, self.seconds['embed']),
+            'wall_seconds': round(self.wall_seconds, 3) if self.wall_seconds is not None else None,
+            'peak_rss_bytes': self.peak_rss_bytes,
+            'book_stats': self.books
+        }
+
+
+class RunReport:
+    """All topics of one indexer run"""
+
+    def __init__(self, settings: Dict):
+        self.settings = settings
+        self.started_at = time.time()
+        self._started = time.perf_counter()
+        self.topics: List[TopicStats] = []
+
+    def add(self, stats: TopicStats) -> None:
+        self.topics.append(stats)
+
+    def to_dict(self) -> Dict:
+        topics = [t.to_dict() for t in self.topics]
+        seconds = {stage: sum(t.seconds[stage] for t in self.topics) for stage in STAGES}
+        embedded = sum(t['chunks_embedded'] for t in topics)
+        return {
+            'started_at': self.started_at,
+            'settings': self.settings,
+            'totals': {
+                'topics': len(topics),
+                'succeeded': sum(t['status'] == 'success' for t in topics),
+                'failed': sum(t['status'] == 'failed' for t in topics),
+                'unchanged': sum(t['status'] == 'unchanged' for t in topics),
+                'books': sum(t['books'] for t in topics),
+                'pages': sum(t['pages'] for t in topics),
+                'chunks_embedded': embedded,
+                'seconds': {stage: round(value, 3) for stage, value in seconds.items()},
+                'chunks_per_second': _rate(embedded, seconds['embed']),
+                'wall_seconds': round(time.perf_counter() - self._started, 3),
+                'peak_rss_bytes': peak_rss_bytes()
+            },
+            'topics': topics
+        }
+
+    def write(self, path: Optional[Path] = None) -> Path:
+        """Write JSON report (default: books/.reports/index-<timestamp>.json)"""
+        if path is None:
+            stamp = time.strftime('%Y%m%d-%H%M%S', time.localtime(self.started_at))
+            path = REPORTS_DIR / f"index-{stamp}.json"
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with open(path, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+
+def _mb(size: Optional[int]) -> str:
+    return f"{size / 1024 / 1024:.0f} MB" if size else '-'
+
+
+def _num(value: Optional[float]) -> str:
+    return f"{value:.1f}" if value is not None else '-'
+
+
+def render_markdown(report: Dict) -> str:
+    """Markdown rendering of a JSON report"""
+    totals = report['totals']
+    started = time.strftime('%Y-%m-%d %H:%M', time.localtime(report['started_at']))
+    lines = [
+        '# Indexing Report',
+        '',
+        f"**Run:** {started} · {totals['wall_seconds']:.0f}s wall · peak RSS {_mb(totals['peak_rss_bytes'])}",
+        '',
+        f"**Topics:** {totals['succeeded']} indexed, {totals['failed']} failed, {totals['unchanged']} unchanged "
+        f"· {totals['books']} books · {totals['pages']} pages · {totals['chunks_embedded']} chunks embedded "
+        f"({_num(totals['chunks_per_second'])} chunks/s)",
+        '',
+        '## Topics',
+        '',
+        '| Topic | Status | Books | Pages | Chunks | Extract s | Pages/s | Chunk s | Embed s | Chunks/s | FAISS build s | Write s | Wall s | Peak RSS |',
+        '|---|---|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|---:|',
+    ]
+    for t in report['topics']:
+        s = t['seconds']
+        lines.append(
+            f"| {t['topic_id']} | {t['status']} | {t['books']} | {t['pages']} | {t['chunks_embedded']} "
+            f"| {s['extract']:.1f} | {_num(t['pages_per_second'])} | {s['chunk']:.1f} | {s['embed']:.1f} "
+            f"| {_num(t['chunks_per_second'])} | {s['faiss_build']:.2f} | {s['faiss_write']:.2f} "
+            f"| {_num(t['wall_seconds'])} | {_mb(t['peak_rss_bytes'])} |"
+        )
+
+    books = [(t['topic_id'], b) for t in report['topics'] for b in t['book_stats'] if not b['error']]
+    slowest = sorted(books, key=lambda item: item[1]['extract_seconds'] + item[1]['chunk_seconds'], reverse=True)
+    if slowest:
+        lines += [
+            '',
+            '## ⚠️ Slowest books',
+            '',
+            '| Topic | Book | Pages | Extract s | Pages/s | Chunks | Chunk s | Cached |',
+            '|---|---|---:|---:|---:|---:|---:|---|',
+        ]
+        for topic_id, b in slowest[:SLOWEST_BOOKS]:
+            lines.append(
+                f"| {topic_id} | {b['filename']} | {b['pages']} | {b['extract_seconds']:.1f} "
+                f"| {_num(b['pages_per_second'])} | {b['chunks']} | {b['chunk_seconds']:.1f} "
+                f"| {'yes' if b['cached_text'] else 'no'} |"
+            )
+
+    failed = [(t['topic_id'], b) for t in report['topics'] for b in t['book_stats'] if b['error']]
+    if failed:
+        lines += ['', '## ❌ Failed books', '']
+        for topic_id, b in failed:
+            lines.append(f"- `{topic_id}/{b['filename']}`: {b['error']}")
+
+    return '\n'.join(lines) + '\n'
+
+
+def latest_report() -> Optional[Path]:
+    reports = sorted(REPORTS_DIR.glob('index-*.json')) if REPORTS_DIR.exists() else []
+    return reports[-1] if reports else None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Render an indexing telemetry report as Markdown')
+    parser.add_argument('report', nargs='?', help='JSON report (default: latest in books/.reports)')
+    parser.add_argument('-o', '--output', help=f'Markdown output (default: {MARKDOWN_REPORT})')
+    args = parser.parse_args()
+
+    path = Path(args.report) if args.report else latest_report()
+    if path is None:
+        print(f"📊 No reports in {REPORTS_DIR}")
+        return 1
+
+    with open(path, 'r') as f:
+        report = json.load(f)
+
+    output = Path(args.output) if args.output else MARKDOWN_REPORT
+    output.write_text(render_markdown(report), encoding='utf-8')
+    print(f"📊 {path.name} → {output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
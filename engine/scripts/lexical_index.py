@@ -0,0 +1,548 @@
+#!/usr/bin/env python3
+"""
+Per-topic BM25 inverted index (.lexical.bin)
+
+Dense retrieval misses exact names, jargon and quotes; this index finds
+them. The indexer feeds every chunk's text to a LexicalIndexWriter in the
+same pass that writes the chunk store, so postings are keyed by chunk
+store row (the same rows as .vectors.npy and the FAISS index).
+
+Tokens are lowercased word runs; joined forms ("CVE-2021-44228",
+"o'brien", "node.js") are indexed whole and as their parts, so an exact
+identifier scores above its pieces. No stemming: exact terms are the point.
+
+The writer keeps memory bounded: postings are spilled to disk as sorted
+runs every SPILL_POSTINGS and k-way merged into the file on close.
+
+File layout (little-endian, arrays 8-byte aligned, read memory-mapped;
+sections are found through the footer's offsets):
+
+    MAGIC
+    postings         row gaps per term, LEB128 varints (compressed)
+    tfs              uint8 term frequency per posting (capped at 255)
+    terms            sorted UTF-8 terms, concatenated
+    term_offsets     uint64[terms + 1]
+    posting_offsets  uint64[terms + 1]   byte range of each term's postings
+    tf_offsets       uint64[terms + 1]   entry range of each term's tfs (cumulative df)
+    doc_lengths      uint32 tokens per row
+    footer           JSON: rows, terms, avgdl, section offsets
+    footer length    uint64
+    MAGIC
+
+A query decodes only its terms' postings (vectorized varint decode) and
+sums BM25 weights with one bincount, a few ms even on large topics; very
+common terms (df above MAX_DF_FRACTION of rows) are skipped when rarer
+query terms exist.
+
+Usage:
+    python lexical_index.py build --all        # From existing chunk stores, no reindex
+    python lexical_index.py search TOPIC_ID "exact phrase or name"
+    python lexical_index.py stats
+"""
+
+import os
+import re
+import sys
+import json
+import math
+import mmap
+import time
+import heapq
+import shutil
+import struct
+import argparse
+from array import array
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from chunk_store import ChunkStore, CHUNK_STORE_NAME
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
+LEXICAL_NAME = ".lexical.bin"
+MAGIC = b'LIBLEX01'
+LEXICAL_VERSION = 1
+
+# BM25 parameters
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+# Terms in more than this fraction of rows are skipped if the query has rarer ones
+MAX_DF_FRACTION = 0.5
+
+# Writer: postings buffered before a sorted run is spilled to disk (about
+# 5 bytes each plus per-term overhead), and postings varint-encoded per
+# vectorized batch while merging (~50 bytes each of numpy temporaries)
+SPILL_POSTINGS = 2_000_000
+MERGE_BATCH = 250_000
+SPILL_BUFFER = 1 << 20
+RUN_HEADER = struct.Struct('<II')  # term bytes, postings
+
+# Word runs, optionally joined by ' - . (kept whole and split)
+TOKEN_RE = re.compile(r"[^\W_]+(?:['’\-.][^\W_]+)*")
+PART_RE = re.compile(r"[^\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased tokens; joined forms also yield their parts"""
+    tokens = []
+    for match in TOKEN_RE.finditer(text.lower()):
+        token = match.group()
+        tokens.append(token)
+        if not token.isalnum():
+            tokens.extend(PART_RE.findall(token))
+    return tokens
+
+
+def varint_sizes(values: np.ndarray) -> np.ndarray:
+    """LEB128 byte count of each value"""
+    sizes = np.ones(len(values), dtype=np.int64)
+    for bits in (7, 14, 21, 28):
+        sizes += values >= (1 << bits)
+    return sizes
+
+
+def encode_varints(values: np.ndarray) -> np.ndarray:
+    """LEB128 bytes of non-negative integers (< 2**35), vectorized"""
+    values = np.asarray(values, dtype=np.uint64)
+    sizes = varint_sizes(values)
+    ends = np.cumsum(sizes)
+    starts = ends - sizes
+    out = np.empty(int(ends[-1]) if len(ends) else 0, dtype=np.uint8)
+    for k in range(5):
+        more = sizes > k
+        if not more.any():
+            break
+        chunk = (values[more] >> np.uint64(7 * k)) & np.uint64(127)
+        continues = (sizes[more] > k + 1).astype(np.uint64) << np.uint64(7)
+        out[starts[more] + k] = (chunk | continues).astype(np.uint8)
+    return out
+
+
+def decode_varints(data: np.ndarray) -> np.ndarray:
+    """Integers of a LEB128 byte run (inverse of encode_varints)"""
+    if not len(data):
+        return np.zeros(0, dtype=np.int64)
+    ends = np.flatnonzero(data < 128)
+    starts = np.empty_like(ends)
+    starts[0] = 0
+    starts[1:] = ends[:-1] + 1
+    shifts = 7 * (np.arange(len(data), dtype=np.int64) - np.repeat(starts, ends - starts + 1))
+    parts = (data & 127).astype(np.int64) << shifts
+    return np.add.reduceat(parts, starts)
+
+
+class LexicalIndexWriter:
+    """
+    Streams chunk texts into a BM25 index, written on close().
+
+    Postings are buffered per term up to SPILL_POSTINGS, then spilled to a
+    temp file as a term-sorted run (doc lengths are streamed to their own
+    temp file); close() k-way merges the runs into the index, encoding
+    at most merge_batch postings at a time. Memory stays bounded by the
+    buffer whatever the topic size, like the chunk and vector stores
+    (plus 24 bytes of offsets per distinct term).
+    """
+
+    def __init__(self, path: Path, spill_postings: int = SPILL_POSTINGS, merge_batch: int = MERGE_BATCH):
+        self.path = Path(path)
+        self.rows = 0
+        self.spill_postings = spill_postings
+        self.merge_batch = merge_batch
+        self._tokens = 0
+        self._postings: Dict[str, tuple] = {}
+        self._buffered = 0
+        self._lengths = array('I')
+        self._runs: List[Path] = []
+        self._lengths_path = self.path.with_name(self.path.name + '.lengths')
+        self._lengths_file = open(self._lengths_path, 'wb')
+
+    def add(self, text: str) -> None:
+        """Index the next row's text"""
+        tokens = tokenize(text)
+        self._lengths.append(len(tokens))
+        self._tokens += len(tokens)
+        row = self.rows
+        counts = Counter(tokens)
+        for term, tf in counts.items():
+            entry = self._postings.get(term)
+            if entry is None:
+                entry = self._postings[term] = (array('I'), array('B'))
+            entry[0].append(row)
+            entry[1].append(min(tf, 255))
+        self.rows += 1
+        self._buffered += len(counts)
+        if self._buffered >= self.spill_postings:
+            self._spill()
+
+    def _spill(self) -> None:
+        """Write buffered postings as one term-sorted run, lengths appended to their file"""
+        self._lengths_file.write(np.frombuffer(self._lengths, dtype=np.uint32).astype('<u4').tobytes())
+        self._lengths = array('I')
+        if not self._postings:
+            return
+
+        run = self.path.with_name(f"{self.path.name}.run{len(self._runs)}")
+        self._runs.append(run)
+        with open(run, 'wb', buffering=SPILL_BUFFER) as f:
+            for encoded, term in sorted((term.encode('utf-8'), term) for term in self._postings):
+                rows, tfs = self._postings[term]
+                f.write(RUN_HEADER.pack(len(encoded), len(rows)))
+                f.write(encoded)
+                f.write(np.frombuffer(rows, dtype=np.uint32).astype('<u4').tobytes())
+                f.write(tfs.tobytes())
+        self._postings = {}
+        self._buffered = 0
+
+    def _write_array(self, f, values: np.ndarray) -> int:
+        position = self._align(f)
+        f.write(np.ascontiguousarray(values).astype(values.dtype.newbyteorder('<'), copy=False).tobytes())
+        return position
+
+    @staticmethod
+    def _align(f) -> int:
+        position = f.tell()
+        padding = -position % 8
+        if padding:
+            f.write(b'\0' * padding)
+            position += padding
+        return position
+
+    @staticmethod
+    def _copy(f, path: Path) -> None:
+        with open(path, 'rb') as src:
+            shutil.copyfileobj(src, f, SPILL_BUFFER)
+
+    def close(self) -> int:
+        """Merge the spilled runs into the index; returns the number of rows"""
+        self._spill()
+        self._lengths_file.close()
+
+        terms_path = self.path.with_name(self.path.name + '.terms')
+        tfs_path = self.path.with_name(self.path.name + '.tfs')
+        # Where each term starts (then the totals): term bytes, posting bytes, postings
+        offsets = (array('Q'), array('Q'), array('Q'))
+        written = [0, 0, 0]
+        try:
+            with open(self.path, 'wb') as f, open(terms_path, 'wb', buffering=SPILL_BUFFER) as terms_file, \
+                    open(tfs_path, 'wb', buffering=SPILL_BUFFER) as tfs_file:
+                f.write(MAGIC)
+                sections = {'postings': self._align(f)}
+                outputs = (f, terms_file, tfs_file)
+
+                # Runs hold consecutive row ranges, so a term's pieces arrive in row
+                # order; they are encoded in slices of merge_batch postings, however
+                # common the term
+                batch, batched = [], 0
+                term, last_row = None, 0
+                for run_term, _, rows, tfs in heapq.merge(*(_tagged_run(run, i) for i, run in enumerate(self._runs))):
+                    starts_term = run_term != term
+                    if starts_term:
+                        term, last_row = run_term, 0
+                    for start in range(0, len(rows), self.merge_batch):
+                        piece = rows[start:start + self.merge_batch]
+                        batch.append((term if starts_term and not start else None, piece,
+                                      tfs[start:start + self.merge_batch], last_row))
+                        last_row = int(piece[-1])
+                        batched += len(piece)
+                        if batched >= self.merge_batch:
+                            self._write_batch(batch, outputs, offsets, written)
+                            batch, batched = [], 0
+                self._write_batch(batch, outputs, offsets, written)
+                for column, total in zip(offsets, written):
+                    column.append(total)
+
+                terms_file.flush()
+                tfs_file.flush()
+                sections['tfs'] = self._align(f)
+                self._copy(f, tfs_path)
+                sections['terms'] = f.tell()
+                self._copy(f, terms_path)
+                for name, column in zip(('term_offsets', 'posting_offsets', 'tf_offsets'), offsets):
+                    sections[name] = self._write_array(f, np.frombuffer(column, dtype=np.uint64))
+                sections['doc_lengths'] = self._align(f)
+                self._copy(f, self._lengths_path)
+                footer = {
+                    'version': LEXICAL_VERSION,
+                    'rows': self.rows,
+                    'terms': len(offsets[0]) - 1,
+                    'avgdl': self._tokens / self.rows if self.rows else 0.0,
+                    'sections': sections
+                }
+                data = json.dumps(footer).encode('utf-8')
+                f.write(data)
+                f.write(struct.pack('<Q', len(data)))
+                f.write(MAGIC)
+                f.flush()
+                os.fsync(f.fileno())
+        finally:
+            terms_path.unlink(missing_ok=True)
+            tfs_path.unlink(missing_ok=True)
+            self._remove_temp()
+        return self.rows
+
+    @staticmethod
+    def _write_batch(batch, outputs, offsets, written) -> None:
+        """
+        Varint-encode a batch of posting slices in one vectorized pass
+
+        Slices are (term, rows, tfs, last_row): term set only on a term's
+        first slice, last_row the row before the slice (0 at a term start).
+        """
+        if not batch:
+            return
+        f, terms_file, tfs_file = outputs
+        sizes = np.array([len(rows) for _, rows, _, _ in batch], dtype=np.int64)
+        starts = np.cumsum(sizes) - sizes
+        rows = np.concatenate([rows for _, rows, _, _ in batch]).astype(np.int64)
+        # Row gaps, each slice continuing its term (first gap of a term = first row)
+        gaps = np.diff(rows, prepend=0)
+        gaps[starts] = rows[starts] - np.array([last_row for *_, last_row in batch], dtype=np.int64)
+        byte_sizes = varint_sizes(gaps)
+        byte_starts = np.cumsum(byte_sizes) - byte_sizes
+
+        for (term, _, _, _), start in zip(batch, starts.tolist()):
+            if term is not None:
+                offsets[0].append(written[0])
+                offsets[1].append(written[1] + int(byte_starts[start]))
+                offsets[2].append(written[2] + start)
+                terms_file.write(term)
+                written[0] += len(term)
+
+        f.write(encode_varints(gaps).tobytes())
+        tfs_file.write(b''.join(tfs.tobytes() for _, _, tfs, _ in batch))
+        written[1] += int(byte_sizes.sum())
+        written[2] += len(rows)
+
+    def _remove_temp(self) -> None:
+        for run in self._runs:
+            run.unlink(missing_ok=True)
+        self._runs = []
+        self._lengths_path.unlink(missing_ok=True)
+
+    def abort(self) -> None:
+        self._postings = {}
+        self._lengths_file.close()
+        self._remove_temp()
+        self.path.unlink(missing_ok=True)
+
+
+def _tagged_run(path: Path, position: int):
+    """(term, run position, rows, tfs) records of a spilled run, in term order"""
+    with open(path, 'rb', buffering=SPILL_BUFFER) as f:
+        while True:
+            header = f.read(RUN_HEADER.size)
+            if not header:
+                return
+            term_len, df = RUN_HEADER.unpack(header)
+            term = f.read(term_len)
+            rows = np.frombuffer(f.read(4 * df), dtype='<u4')
+            tfs = np.frombuffer(f.read(df), dtype=np.uint8)
+            yield term, position, rows, tfs
+
+
+class LexicalIndex:
+    """Read-only, memory-mapped BM25 index of one topic"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, 'rb') as f:
+            mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+        size = len(mm)
+        if size < 2 * len(MAGIC) + 8 or mm[:len(MAGIC)] != MAGIC or mm[-len(MAGIC):] != MAGIC:
+            mm.close()
+            raise ValueError(f"Not a lexical index (or truncated): {self.path}")
+
+        footer_end = size - len(MAGIC) - 8
+        (footer_len,) = struct.unpack('<Q', mm[footer_end:footer_end + 8])
+        footer = json.loads(mm[footer_end - footer_len:footer_end].decode('utf-8'))
+        if footer.get('version') != LEXICAL_VERSION:
+            mm.close()
+            raise ValueError(f"Unsupported lexical index version {footer.get('version')}: {self.path}")
+
+        self.rows = footer['rows']
+        self.terms = footer['terms']
+        self.avgdl = footer['avgdl'] or 1.0
+        sections = footer['sections']
+        buffer = np.frombuffer(mm, dtype=np.uint8)
+        self._term_offsets = np.frombuffer(mm, dtype='<u8', count=self.terms + 1, offset=sections['term_offsets'])
+        self._terms = buffer[sections['terms']:sections['terms'] + int(self._term_offsets[-1])]
+        self._posting_offsets = np.frombuffer(mm, dtype='<u8', count=self.terms + 1, offset=sections['posting_offsets'])
+        self._tf_offsets = np.frombuffer(mm, dtype='<u8', count=self.terms + 1, offset=sections['tf_offsets'])
+        self._postings = buffer[sections['postings']:sections['postings'] + int(self._posting_offsets[-1])]
+        self._tfs = buffer[sections['tfs']:sections['tfs'] + int(self._tf_offsets[-1])]
+        self._lengths = np.frombuffer(mm, dtype='<u4', count=self.rows, offset=sections['doc_lengths'])
+        self._mm = mm
+
+    def _term(self, i: int) -> bytes:
+        return self._terms[int(self._term_offsets[i]):int(self._term_offsets[i + 1])].tobytes()
+
+    def lookup(self, term: str) -> int:
+        """Term number (binary search over the sorted terms), -1 if absent"""
+        key = term.encode('utf-8')
+        low, high = 0, self.terms
+        while low < high:
+            mid = (low + high) // 2
+            if self._term(mid) < key:
+                low = mid + 1
+            else:
+                high = mid
+        return low if low < self.terms and self._term(low) == key else -1
+
+    def df(self, term_id: int) -> int:
+        return int(self._tf_offsets[term_id + 1] - self._tf_offsets[term_id])
+
+    def postings(self, term_id: int):
+        """(rows, tfs) of one term"""
+        data = self._postings[int(self._posting_offsets[term_id]):int(self._posting_offsets[term_id + 1])]
+        rows = np.cumsum(decode_varints(data))
+        tfs = self._tfs[int(self._tf_offsets[term_id]):int(self._tf_offsets[term_id + 1])]
+        return rows, tfs
+
+    def search(self, query: str, k: int, allowed: Optional[np.ndarray] = None):
+        """
+        BM25 top-k rows for a query
+
+        Args:
+            allowed: Packed little-endian row bitmap restricting the result
+                (see chunk_filters.py), optional
+
+        Returns:
+            (scores, rows) arrays, best first
+        """
+        term_ids = [i for i in (self.lookup(t) for t in set(tokenize(query))) if i >= 0]
+        if not term_ids or not self.rows:
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+        rare = [i for i in term_ids if self.df(i) <= self.rows * MAX_DF_FRACTION]
+        term_ids = rare or term_ids
+
+        all_rows, all_weights = [], []
+        for term_id in term_ids:
+            df = self.df(term_id)
+            idf = math.log(1 + (self.rows - df + 0.5) / (df + 0.5))
+            rows, tfs = self.postings(term_id)
+            tfs = tfs.astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self._lengths[rows] / self.avgdl)
+            all_rows.append(rows)
+            all_weights.append(idf * tfs * (BM25_K1 + 1) / (tfs + norm))
+        rows = np.concatenate(all_rows)
+        weights = np.concatenate(all_weights)
+
+        if allowed is not None:
+            keep = (allowed[rows >> 3] >> (rows & 7).astype(np.uint8)) & 1 == 1
+            rows, weights = rows[keep], weights[keep]
+        if not len(rows):
+            return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+        # Sum per row: sparse postings group by sort, dense ones by a full-size bincount
+        if len(rows) * 8 < self.rows:
+            rows, inverse = np.unique(rows, return_inverse=True)
+            scores = np.bincount(inverse, weights).astype(np.float32)
+        else:
+            scores = np.bincount(rows, weights, minlength=self.rows).astype(np.float32)
+            rows = np.flatnonzero(scores)
+            scores = scores[rows]
+
+        if len(scores) > k:
+            top = np.argpartition(-scores, k - 1)[:k]
+            scores, rows = scores[top], rows[top]
+        order = np.argsort(-scores, kind='stable')
+        return scores[order], rows[order]
+
+
+def build_topic(topic_dir: Path) -> int:
+    """
+    Write .lexical.bin from a topic's chunk store
+
+    Returns:
+        Number of rows indexed
+    """
+    store = ChunkStore(topic_dir / CHUNK_STORE_NAME)
+    path = topic_dir / LEXICAL_NAME
+    writer = LexicalIndexWriter(path.with_name(path.name + '.tmp'))
+    try:
+        for row in range(len(store)):
+            writer.add(store.text(row))
+        count = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        store.close()
+    os.replace(writer.path, path)
+    return count
+
+
+def _load_registry() -> List[Dict]:
+    with open(MAIN_METADATA, 'r') as f:
+        return json.load(f).get('topics', [])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-topic BM25 inverted indexes')
+    parser.add_argument('command', choices=['build', 'search', 'stats'])
+    parser.add_argument('args', nargs='*', help='build: topic IDs; search: TOPIC_ID QUERY')
+    parser.add_argument('--all', action='store_true', help='build: all topics in the library index')
+    parser.add_argument('--top-k', type=int, default=10, help='search: results (default: 10)')
+    args = parser.parse_args()
+
+    topics = _load_registry()
+
+    if args.command == 'stats':
+        count = size = terms = 0
+        for topic in topics:
+            path = LIBRARY_ROOT / topic['path'] / LEXICAL_NAME
+            if path.exists():
+                count += 1
+                size += path.stat().st_size
+                terms += LexicalIndex(path).terms
+        print(f"🔤 Lexical indexes: {count}/{len(topics)} topics, {terms} terms ({size / 1024 / 1024:.1f} MB)")
+        if count < len(topics):
+            print("   💡 Build missing ones: python lexical_index.py build --all")
+        return 0
+
+    if args.command == 'search':
+        if len(args.args) != 2:
+            parser.error('search takes TOPIC_ID QUERY')
+        topic = next((t for t in topics if t['id'] == args.args[0]), None)
+        if topic is None:
+            print(f"❌ Topic not found: {args.args[0]}")
+            return 1
+        topic_dir = LIBRARY_ROOT / topic['path']
+        index = LexicalIndex(topic_dir / LEXICAL_NAME)
+        store = ChunkStore(topic_dir / CHUNK_STORE_NAME)
+        started = time.perf_counter()
+        scores, rows = index.search(args.args[1], args.top_k)
+        print(f"🔤 {len(rows)} results in {(time.perf_counter() - started) * 1000:.2f} ms")
+        for score, row in zip(scores, rows):
+            print(f"   {score:6.2f}  {store.value('book_title', int(row))}: {store.text(int(row))[:100]!r}")
+        return 0
+
+    if args.args:
+        selected = [t for t in topics if t['id'] in args.args]
+    elif args.all:
+        selected = topics
+    else:
+        parser.error('give topic IDs or --all')
+
+    failed = 0
+    for topic in selected:
+        topic_dir = LIBRARY_ROOT / topic['path']
+        if not (topic_dir / CHUNK_STORE_NAME).exists():
+            print(f"   ⏭️  {topic['id']}: no chunk store (reindex or run chunk_store.py convert)")
+            continue
+        try:
+            started = time.perf_counter()
+            count = build_topic(topic_dir)
+            print(f"   ✓ {topic['id']}: {count} chunks in {time.perf_counter() - started:.1f}s")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {topic['id']}: {e}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Topic folder discovery: one listing per directory, parallel, mtime-cached
+
+A topic is any folder under books/ that directly contains a PDF/EPUB.
+Every directory is listed once with os.scandir (file/dir type comes from
+the listing, no extra stat), and top-level subtrees are walked on a thread
+pool, which hides per-request latency on NAS/network mounts.
+
+A directory's mtime changes only when entries are added, removed or
+renamed directly inside it, so each directory's listing summary (has
+books, subdirectory names) is cached by mtime. On the next run an
+unchanged directory costs a single stat instead of a listing.
+
+Cache stored in books/.cache/discovery.json
+
+Usage:
+    python library_discovery.py            # Print discovered topics + timing
+    python library_discovery.py --no-cache
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import List, Dict, Optional, Tuple
+
+from library_paths import LIBRARY_ROOT
+
+# Paths
+CACHE_PATH = LIBRARY_ROOT / ".cache" / "discovery.json"
+
+BOOK_EXTENSIONS = ('.epub', '.pdf')
+
+# Threads walking top-level subtrees (I/O bound)
+DEFAULT_THREADS = min(32, (os.cpu_count() or 1) * 4)
+
+CACHE_VERSION = 1
+
+
+def slugify(text: str) -> str:
+    """Convert text to lowercase slug."""
+    return re.sub(r'[^\w\s-]', '', text.lower()).strip().replace(' ', '_')
+
+
+def _skip(name: str) -> bool:
+    # Hidden files, system files and metadata
+    return name.startswith('.') or name == '__pycache__'
+
+
+class DirectoryScanner:
+    """Walks books/ once, reusing cached listings of unchanged directories"""
+
+    def __init__(self, root: Path = LIBRARY_ROOT, cache: Optional[Dict] = None):
+        self.root = Path(root)
+        self.old_cache = cache or {}
+        self.new_cache = {}
+        self.listed = 0
+        self.reused = 0
+
+    def _summary(self, rel_path: str, path: str) -> Tuple[bool, List[str]]:
+        """(has_books, sorted subdirectory names) of one directory"""
+        mtime_ns = os.stat(path).st_mtime_ns
+        cached = self.old_cache.get(rel_path)
+        if cached and cached['mtime_ns'] == mtime_ns:
+            self.reused += 1
+            self.new_cache[rel_path] = cached
+            return cached['has_books'], cached['dirs']
+
+        has_books = False
+        dirs = []
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if _skip(entry.name):
+                    continue
+                if entry.is_dir():
+                    dirs.append(entry.name)
+                elif not has_books and entry.name.lower().endswith(BOOK_EXTENSIONS) and entry.is_file():
+                    has_books = True
+        dirs.sort()
+
+        self.listed += 1
+        self.new_cache[rel_path] = {'mtime_ns': mtime_ns, 'has_books': has_books, 'dirs': dirs}
+        return has_books, dirs
+
+    def walk(self, rel_path: str) -> List[Dict]:
+        """Topics in the subtree at rel_path (pre-order, sorted like the old recursive scan)"""
+        topics = []
+        stack = [rel_path]
+        while stack:
+            current = stack.pop()
+            has_books, dirs = self._summary(current, str(self.root / current) if current else str(self.root))
+            if has_books and current:
+                topics.append({
+                    'id': slugify(current.replace('/', '_')),
+                    'path': current
+                })
+            prefix = f"{current}/" if current else ''
+            stack.extend(f"{prefix}{name}" for name in reversed(dirs))
+        return topics
+
+    def scan(self, threads: int = DEFAULT_THREADS) -> List[Dict]:
+        _, top_dirs = self._summary('', str(self.root))
+
+        if threads <= 1 or len(top_dirs) <= 1:
+            subtrees = [self.walk(name) for name in top_dirs]
+        else:
+            with ThreadPoolExecutor(max_workers=min(threads, len(top_dirs))) as pool:
+                subtrees = list(pool.map(self.walk, top_dirs))
+
+        return [topic for subtree in subtrees for topic in subtree]
+
+
+def load_cache(path: Path = CACHE_PATH) -> Dict:
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return data.get('dirs', {}) if data.get('version') == CACHE_VERSION else {}
+
+
+def save_cache(dirs: Dict, path: Path = CACHE_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'w') as f:
+        json.dump({'version': CACHE_VERSION, 'dirs': dirs}, f)
+    os.replace(tmp, path)
+
+
+def discover_topics(root: Path = LIBRARY_ROOT, threads: int = DEFAULT_THREADS,
+                    use_cache: bool = True) -> Tuple[List[Dict], DirectoryScanner]:
+    """
+    Find every topic folder under root
+
+    Returns:
+        (topics, scanner) - topics as [{'id', 'path'}], scanner holds listed/reused counts
+    """
+    scanner = DirectoryScanner(root, load_cache() if use_cache else None)
+    topics = scanner.scan(threads)
+
+    if use_cache and scanner.new_cache != scanner.old_cache:
+        try:
+            save_cache(scanner.new_cache)
+        except OSError as e:
+            print(f"   ⚠️  Discovery cache write failed: {e}")
+
+    return topics, scanner
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Discover topic folders under books/')
+    parser.add_argument('--threads', type=int, default=DEFAULT_THREADS, help=f'Walker threads (default: {DEFAULT_THREADS})')
+    parser.add_argument('--no-cache', action='store_true', help='List every directory (ignore books/.cache/discovery.json)')
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    topics, scanner = discover_topics(threads=args.threads, use_cache=not args.no_cache)
+    elapsed = (time.perf_counter() - started) * 1000
+
+    for topic in topics:
+        print(f"   {topic['path']}")
+    print(f"🔍 {len(topics)} topics in {elapsed:.1f} ms "
+          f"({scanner.listed} directories listed, {scanner.reused} unchanged)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
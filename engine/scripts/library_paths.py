@@ -0,0 +1,16 @@
+#!/usr/bin/env python3
+"""
+Library location shared by every engine script
+
+The library is the repo's books/ folder unless LIBRARIAN_BOOKS_DIR points
+the indexer, search and tools at another one (benchmarks, tests, a second
+library). Read once at import, so set it before starting the process.
+"""
+
+import os
+from pathlib import Path
+
+PROJECT_DIR = Path(__file__).parent.parent.parent  # engine/scripts/ -> engine/ -> project root
+
+LIBRARY_ROOT = Path(os.environ.get('LIBRARIAN_BOOKS_DIR') or PROJECT_DIR / "books")
+MAIN_METADATA = LIBRARY_ROOT / ".library-index.json"
@@ -0,0 +1,250 @@
+#!/usr/bin/env python3
+"""
+Library state manifest: what was indexed, file by file
+
+Smart mode used to open every topic's .topic-index.json and stat every
+book on each run. The manifest keeps one row per indexed book (path, size,
+mtime, inode, content digest, topic, indexed generation) in SQLite, is
+updated in one transaction per committed topic, and is diffed against a
+single os.scandir sweep of the topic folders - no JSON parsing, one stat
+per book.
+
+Changes are reported per file:
+    new       on disk, not in the manifest
+    modified  same path, different size/mtime
+    deleted   in the manifest, gone from disk
+    moved     deleted + new pair with the same inode (or same digest)
+
+Stored in books/.library-state.sqlite
+
+Usage:
+    python library_state.py stats          # Files/topics tracked, generation
+    python library_state.py diff           # What smart mode would reindex
+"""
+
+import os
+import sys
+import json
+import sqlite3
+import argparse
+from pathlib import Path
+from typing import List, Dict, Set, Tuple
+
+from text_cache import file_digest
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
+# Paths
+STATE_PATH = LIBRARY_ROOT / ".library-state.sqlite"
+
+BOOK_EXTENSIONS = ('.epub', '.pdf')
+
+
+def scan_topic(topic_dir: Path) -> Dict[str, os.stat_result]:
+    """Map filename -> stat for every PDF/EPUB directly in a topic folder (one scandir)"""
+    files = {}
+    try:
+        with os.scandir(topic_dir) as entries:
+            for entry in entries:
+                if entry.name.startswith('.') or not entry.name.endswith(BOOK_EXTENSIONS):
+                    continue
+                if entry.is_file():
+                    files[entry.name] = entry.stat()
+    except FileNotFoundError:
+        pass
+    return files
+
+
+class ChangeSet:
+    """Per-file differences between the filesystem and the manifest"""
+
+    def __init__(self):
+        self.new: List[str] = []
+        self.modified: List[str] = []
+        self.deleted: List[str] = []
+        self.moved: List[Tuple[str, str]] = []
+
+    def __bool__(self) -> bool:
+        return bool(self.new or self.modified or self.deleted or self.moved)
+
+    def topics(self) -> Set[str]:
+        """Topic paths that need reindexing"""
+        paths = self.new + self.modified + self.deleted + [p for pair in self.moved for p in pair]
+        return {path.rsplit('/', 1)[0] for path in paths}
+
+    def summary(self) -> str:
+        return (f"{len(self.new)} new, {len(self.modified)} modified, "
+                f"{len(self.deleted)} deleted, {len(self.moved)} moved")
+
+
+class LibraryState:
+    """SQLite manifest of indexed books, keyed by path relative to books/"""
+
+    def __init__(self, path: Path = STATE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Topics are recorded from the index writer thread
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.executescript("""
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                topic TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                dev INTEGER NOT NULL,
+                digest TEXT,
+                generation INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS files_topic ON files(topic);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL
+            );
+        """)
+        row = self.conn.execute("SELECT value FROM meta WHERE key = 'generation'").fetchone()
+        self.generation = int(row[0]) if row else 0
+
+    def begin_generation(self) -> int:
+        """Start a new indexing run; files recorded from now on carry its number"""
+        self.generation += 1
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('generation', ?)", (str(self.generation),)
+            )
+        return self.generation
+
+    def known_topics(self) -> Set[str]:
+        return {row[0] for row in self.conn.execute("SELECT DISTINCT topic FROM files")}
+
+    def diff(self, topic_paths: List[str], library_root: Path = LIBRARY_ROOT) -> ChangeSet:
+        """Compare the given topic folders on disk against the manifest"""
+        wanted = set(topic_paths)
+        stored = {
+            row[0]: row for row in self.conn.execute(
+                "SELECT path, topic, size, mtime_ns, inode, dev, digest FROM files"
+            ) if row[1] in wanted
+        }
+
+        current = {}
+        for topic in topic_paths:
+            for name, stat in scan_topic(library_root / topic).items():
+                current[f"{topic}/{name}"] = stat
+
+        changes = ChangeSet()
+        for path, stat in current.items():
+            row = stored.get(path)
+            if row is None:
+                changes.new.append(path)
+            elif (stat.st_size, stat.st_mtime_ns) != (row[2], row[3]):
+                changes.modified.append(path)
+
+        changes.deleted = [path for path in stored if path not in current]
+
+        # Pair deleted with new files: same inode (rename), else same content
+        if changes.deleted and changes.new:
+            by_inode = {(stored[p][5], stored[p][4], stored[p][2]): p for p in changes.deleted}
+            for path in list(changes.new):
+                stat = current[path]
+                old = by_inode.pop((stat.st_dev, stat.st_ino, stat.st_size), None)
+                if old is None:
+                    candidates = [p for p in by_inode.values() if stored[p][2] == stat.st_size and stored[p][6]]
+                    if candidates:
+                        digest = file_digest(library_root / path)
+                        old = next((p for p in candidates if stored[p][6] == digest), None)
+                        if old:
+                            by_inode = {k: v for k, v in by_inode.items() if v != old}
+                if old:
+                    changes.moved.append((old, path))
+                    changes.new.remove(path)
+                    changes.deleted.remove(old)
+
+        for paths in (changes.new, changes.modified, changes.deleted):
+            paths.sort()
+        return changes
+
+    def record_topic(self, topic: str, files: Dict[str, os.stat_result], library_root: Path = LIBRARY_ROOT,
+                     with_digests: bool = True) -> None:
+        """
+        Replace a topic's rows with its current files in one transaction
+
+        Digests are kept for files whose size/mtime/inode did not change and
+        computed for the rest (they were just read by extraction anyway).
+        """
+        previous = {
+            row[0]: row[1:] for row in self.conn.execute(
+                "SELECT path, size, mtime_ns, inode, digest FROM files WHERE topic = ?", (topic,)
+            )
+        }
+
+        rows = []
+        for name, stat in files.items():
+            path = f"{topic}/{name}"
+            old = previous.get(path)
+            if old and old[:3] == (stat.st_size, stat.st_mtime_ns, stat.st_ino) and old[3]:
+                digest = old[3]
+            elif with_digests:
+                digest = file_digest(library_root / path)
+            else:
+                digest = None
+            rows.append((path, topic, stat.st_size, stat.st_mtime_ns, stat.st_ino, stat.st_dev,
+                         digest, self.generation))
+
+        with self.conn:
+            self.conn.execute("DELETE FROM files WHERE topic = ?", (topic,))
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO files (path, topic, size, mtime_ns, inode, dev, digest, generation) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows
+            )
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+def print_changes(changes: ChangeSet, indent: str = '   ') -> None:
+    for label, icon, paths in (('new', '🆕', changes.new), ('modified', '✏️ ', changes.modified),
+                               ('deleted', '🗑️ ', changes.deleted)):
+        for path in paths:
+            print(f"{indent}{icon} {label}: {path}")
+    for old, new in changes.moved:
+        print(f"{indent}🔀 moved: {old} → {new}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect the library state manifest')
+    parser.add_argument('command', choices=['stats', 'diff'])
+    args = parser.parse_args()
+
+    if not STATE_PATH.exists():
+        print(f"📦 No library state at {STATE_PATH} (written by index_library.py)")
+        return 0
+
+    state = LibraryState()
+
+    if args.command == 'stats':
+        files, topics, size = state.conn.execute(
+            "SELECT COUNT(*), COUNT(DISTINCT topic), COALESCE(SUM(size), 0) FROM files"
+        ).fetchone()
+        print(f"📦 Library state: {STATE_PATH}")
+        print(f"   Generation: {state.generation}")
+        print(f"   Tracked: {files} books in {topics} topics ({size / 1024 / 1024:.1f} MB)")
+
+    elif args.command == 'diff':
+        with open(MAIN_METADATA, 'r') as f:
+            registry = json.load(f)
+        known = state.known_topics()
+        tracked = [t['path'] for t in registry.get('topics', []) if t['path'] in known]
+        changes = state.diff(tracked)
+        print(f"🔍 {changes.summary()} ({len(tracked)} tracked topics)")
+        print_changes(changes)
+        untracked = len(registry.get('topics', [])) - len(tracked)
+        if untracked:
+            print(f"   💡 {untracked} topics not in manifest yet")
+
+    state.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
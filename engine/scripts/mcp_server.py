@@ -57,14 +57,29 @@ def handle_request(request: dict) -> dict:
             "tools": [
                 {
                     "name": "query_library",
-                    "description": "Search personal library for relevant passages",
+                    "description": "Search personal library for relevant passages (whole library unless topic/topics given)",
                     "inputSchema": {
                         "type": "object",
                         "properties": {
                             "query": {"type": "string", "description": "Search query"},
                             "topic": {"type": "string", "description": "Optional topic filter"},
+                            "topics": {"type": "array", "items": {"type": "string"}, "description": "Optional topic IDs to search together"},
                             "book": {"type": "string", "description": "Optional book filter"},
-                            "k": {"type": "integer", "description": "Number of results", "default": 5}
+                            "k": {"type": "integer", "description": "Number of results", "default": 5},
+                            "min_score": {"type": "number", "description": "Optional minimum similarity (cosine, -1..1)"},
+                            "filters": {
+                                "type": "object",
+                                "description": "Optional metadata filters, applied inside the search",
+                                "properties": {
+                                    "author": {"type": "array", "items": {"type": "string"}, "description": "Any of these authors"},
+                                    "tags": {"type": "array", "items": {"type": "string"}, "description": "Books with any of these tags"},
+                                    "filetype": {"type": "string", "enum": ["pdf", "epub"]},
+                                    "chapter": {"type": "array", "items": {"type": "string"}, "description": "EPUB chapter IDs"},
+                                    "page": {"type": "array", "items": {"type": "integer"}, "description": "PDF page range [first, last]"}
+                                }
+                            },
+                            "route_top_n": {"type": "integer", "description": "Search only the N best-matching topics (0 = all)", "default": research.ROUTE_TOP_N},
+                            "hybrid": {"type": "boolean", "description": "Also match exact keywords (names, jargon, quotes) with BM25 and fuse the rankings", "default": False}
                         },
                         "required": ["query"]
                     }
@@ -97,8 +112,13 @@ def handle_request(request: dict) -> dict:
             results = research.query_library(
                 query=args['query'],
                 topic=args.get('topic'),
+                topics=args.get('topics'),
                 book=args.get('book'),
-                k=args.get('k', 5)
+                k=args.get('k', 5),
+                min_score=args.get('min_score'),
+                route_top_n=args.get('route_top_n', research.ROUTE_TOP_N) or None,
+                filters=args.get('filters'),
+                hybrid=bool(args.get('hybrid', False))
             )
             return {"content": [{"type": "text", "text": json.dumps(results, indent=2)}]}
 
@@ -7,172 +7,598 @@ import sys
 import json
 import argparse
 import pickle
+import heapq
+import itertools
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import faiss
-from sentence_transformers import SentenceTransformer
 import os
 
+from embedding_service import get_embedding_service
+from chunk_store import CHUNK_STORE_NAME, LEGACY_CHUNKS_NAME, ChunkStore, book_id_range, chunks_file, open_chunks
+from topic_vectors import (BOOK_SCAN_MAX, LEGACY_METRIC, VECTORS_NAME, apply_params, bitmap_parameters,
+                           load_vectors, range_parameters, search, search_rows, store_ids)
+from chunk_filters import (ChunkFilterIndex, add_filter_arguments, bitmap_from_rows, filters_from_args, matches,
+                           validate_filters)
+from topic_router import ROUTER_NAME, ROUTE_TOP_N, TopicRouter, load_signature
+from lexical_index import LEXICAL_NAME, LexicalIndex
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
 # Paths
 SCRIPT_DIR = Path(__file__).parent
-PROJECT_DIR = SCRIPT_DIR.parent.parent  # engine/scripts/ -> engine/ -> project root
-BOOKS_DIR = PROJECT_DIR / "books"
+BOOKS_DIR = LIBRARY_ROOT
 MODELS_DIR = SCRIPT_DIR.parent / "models"  # engine/models/
-METADATA_FILE = BOOKS_DIR / ".library-index.json"
+METADATA_FILE = MAIN_METADATA
+
+# Federated search: topic shards are searched in parallel threads (FAISS
+# releases the GIL during search and index reads)
+SEARCH_WORKERS = int(os.environ.get('LIBRARIAN_SEARCH_WORKERS') or min(32, (os.cpu_count() or 1) + 4))
+
+# Files whose size/mtime identify a loaded topic; any change means it was reindexed
+TOPIC_FILES = ('.faiss.index', CHUNK_STORE_NAME, LEGACY_CHUNKS_NAME, VECTORS_NAME, LEXICAL_NAME, '.topic-index.json')
+
+# Hybrid search: the library-wide best max(k * HYBRID_DEPTH, HYBRID_MIN_DEPTH) vector
+# and BM25 candidates are fused by reciprocal rank, 1 / (HYBRID_RRF_K + rank)
+HYBRID_RRF_K = 60
+HYBRID_DEPTH = 4
+HYBRID_MIN_DEPTH = 20
 
 # Set model cache to local engine/models/ directory
 os.environ['SENTENCE_TRANSFORMERS_HOME'] = str(MODELS_DIR)
 
-# Load local embedding model (384-dim)
-EMBEDDING_MODEL = SentenceTransformer('BAAI/bge-small-en-v1.5')
+# Local embedding model (384-dim) comes from the process-wide embedding
+# service, loaded on first query (backend: LIBRARIAN_EMBED_BACKEND, default torch)
+
+# Loaded state reused across queries (the MCP server keeps it warm):
+# (signature, value) pairs, dropped when the underlying files change
+_metadata_cache = None
+_topic_cache = {}
+_topic_locks = {}
+_cache_lock = threading.Lock()
+_router_cache = None
+_search_pool = None
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+        return (stat.st_size, stat.st_mtime_ns)
+    except OSError:
+        return None
 
 def load_metadata():
+    """Library metadata, re-read only when .library-index.json changes"""
+    global _metadata_cache
+    signature = _file_signature(METADATA_FILE)
+    cached = _metadata_cache
+    if cached and signature and cached[0] == signature:
+        return cached[1]
     with open(METADATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+        metadata = json.load(f)
+    _metadata_cache = (signature, metadata)
+    return metadata
 
-def load_topic(topic_id):
+def load_topic(topic_id, topic_path=None):
     """Load FAISS index + chunks for a topic (v2.0 structure)."""
     # Get topic path from library-index.json
-    metadata = load_metadata()
-    topic_path = None
-    for topic in metadata['topics']:
-        if topic['id'] == topic_id:
-            topic_path = topic.get('path')  # v2.0 uses 'path' not 'folder_path'
-            break
+    if topic_path is None:
+        metadata = load_metadata()
+        for topic in metadata['topics']:
+            if topic['id'] == topic_id:
+                topic_path = topic.get('path')  # v2.0 uses 'path' not 'folder_path'
+                break
     if not topic_path:
         return None
 
     topic_dir = BOOKS_DIR / topic_path
 
     faiss_file = topic_dir / ".faiss.index"
-    chunks_file_json = topic_dir / ".chunks.json"
+    chunks_path = chunks_file(topic_dir)
     topic_index_file = topic_dir / ".topic-index.json"
 
-    if not faiss_file.exists() or not chunks_file_json.exists():
+    if not faiss_file.exists() or chunks_path is None:
         return None
 
     # Load FAISS index
     index = faiss.read_index(str(faiss_file))
 
-    # Load chunks
-    with open(chunks_file_json, 'r', encoding='utf-8') as f:
-        chunks = json.load(f)
+    # Chunks: memory-mapped store (.chunks.bin), or legacy .chunks.json parsed whole
+    chunks = open_chunks(chunks_path)
+    rows_aligned = check_index(index, chunks)
+
+    # ID-mapped indexes return stable chunk IDs, not row numbers
+    if isinstance(chunks, ChunkStore):
+        row_of = chunks.row_of
+    elif chunks and 'chunk_id' in chunks[0]:
+        id_to_row = {chunk['chunk_id']: row for row, chunk in enumerate(chunks)}
+        row_of = lambda chunk_id: id_to_row.get(chunk_id, -1)
+    else:
+        row_of = lambda row: row
 
     # Load topic-index.json for book metadata
     book_metadata = {}
+    books = []
+    book_ranges = None
+    metric = LEGACY_METRIC
     if topic_index_file.exists():
         with open(topic_index_file, 'r', encoding='utf-8') as f:
             topic_meta = json.load(f)
-            for book in topic_meta.get('books', []):
+            books = topic_meta.get('books', [])
+            for book in books:
                 book_metadata[book['id']] = book
 
+        # Book filename → chunk ID ranges (indexes with stable chunk IDs only)
+        if topic_meta.get('index_format'):
+            book_ranges = {}
+            for book in topic_meta.get('books', []):
+                if book.get('index_key') is not None:
+                    book_ranges.setdefault(book['filename'], []).append(book_id_range(book['index_key']))
+
+        # Search parameters of the index family (HNSW efSearch, IVF nprobe)
+        apply_params(index, topic_meta.get('index_params', {}))
+        metric = topic_meta.get('index_metric', LEGACY_METRIC)
+
+    # Baseline topics have no index keys, but their store has no chunk IDs
+    # either (IDs are row numbers): ranges are each book's runs of rows
+    if book_ranges is None and isinstance(chunks, ChunkStore) and chunks.chunk_ids is None:
+        book_ranges = _row_book_ranges(chunks, book_metadata)
+
+    # Stored vectors (memory-mapped), scanned directly for book-scoped queries
+    vectors = None
+    vectors_file = topic_dir / VECTORS_NAME
+    if isinstance(chunks, ChunkStore) and vectors_file.exists():
+        vectors = load_vectors(vectors_file)
+        if len(vectors) != len(chunks):
+            vectors = None
+
+    # BM25 index over the same rows (hybrid search), unless stale
+    lexical = None
+    lexical_file = topic_dir / LEXICAL_NAME
+    if lexical_file.exists():
+        lexical = LexicalIndex(lexical_file)
+        if lexical.rows != len(chunks):
+            lexical = None
+
     return {
         'index': index,
         'chunks': chunks,
+        'row_of': row_of,
+        'metric': metric,
         'book_metadata': book_metadata,
+        'book_ranges': book_ranges,
+        'vectors': vectors,
+        'lexical': lexical,
+        'rows_aligned': rows_aligned,
+        'books': books,
         'topic_path': topic_path
     }
 
+def _row_book_ranges(chunks, book_metadata):
+    """
+    Book filename → row ranges of a chunk store without chunk IDs, one per
+    run of consecutive rows of the book
+
+    Returns:
+        {filename: [(start, end), ...]}, or None without a book_id column
+    """
+    if 'book_id' not in chunks.fields or chunks.column_values('book_id') is None:
+        return None
+    codes = chunks.column('book_id')
+    values = chunks.column_values('book_id')
+    bounds = [0, *(np.flatnonzero(codes[1:] != codes[:-1]) + 1).tolist(), len(codes)]
+    book_ranges = {}
+    for start, end in zip(bounds, bounds[1:]):
+        if start == end:
+            continue
+        book_id = values[codes[start]]
+        filename = book_metadata.get(book_id, {}).get('filename') or chunks[start].get('filename')
+        if filename:
+            book_ranges.setdefault(filename, []).append((start, end))
+    return book_ranges
+
+def check_index(index, chunks):
+    """
+    Make sure a topic's FAISS index and chunks come from the same index run
+
+    The indexer replaces each file atomically but one after the other, the
+    chunk store last; an interrupted run can leave a new index next to the
+    old chunks, whose IDs would map results to the wrong chunks.
+
+    Returns:
+        Whether FAISS rows are chunk store rows (same order; for an index
+        without IDs, a store without chunk IDs)
+
+    Raises:
+        ValueError: index and chunks disagree (reindex the topic)
+    """
+    if index.ntotal != len(chunks):
+        raise ValueError(f"index has {index.ntotal} vectors but {len(chunks)} chunks "
+                         f"(interrupted index write?), reindex the topic")
+    if not isinstance(chunks, ChunkStore):
+        return False
+    if not isinstance(index, faiss.IndexIDMap):
+        return chunks.chunk_ids is None
+
+    ids = faiss.vector_to_array(index.id_map)
+    expected = store_ids(chunks)
+    if np.array_equal(ids, expected):
+        return True
+    if not np.array_equal(np.sort(ids), np.sort(expected)):
+        raise ValueError("index chunk IDs do not match the chunk store "
+                         "(interrupted index write?), reindex the topic")
+    return False
+
+def get_topic(topic):
+    """
+    load_topic with reuse: a topic stays loaded until its index files change
+
+    Safe to call from search threads; each topic is loaded at most once at a time.
+
+    Args:
+        topic: Topic entry from .library-index.json ({'id', 'path'})
+
+    Returns:
+        load_topic() result, or None if the topic has no index
+    """
+    topic_id = topic['id']
+    topic_dir = BOOKS_DIR / topic['path']
+    signature = tuple(_file_signature(topic_dir / name) for name in TOPIC_FILES)
+
+    cached = _topic_cache.get(topic_id)
+    if cached and cached[0] == signature:
+        return cached[1]
+
+    with _cache_lock:
+        lock = _topic_locks.setdefault(topic_id, threading.Lock())
+    with lock:
+        cached = _topic_cache.get(topic_id)
+        if cached and cached[0] == signature:
+            return cached[1]
+        topic_data = load_topic(topic_id, topic['path'])
+        if topic_data is None:
+            _topic_cache.pop(topic_id, None)
+        else:
+            _topic_cache[topic_id] = (signature, topic_data)
+        return topic_data
+
+def get_router(topics):
+    """
+    TopicRouter over the given topics' .router.npy signatures, rebuilt only
+    when one of them changes
+
+    Returns:
+        TopicRouter (positions match the topics list)
+    """
+    global _router_cache
+    paths = [BOOKS_DIR / t['path'] / ROUTER_NAME for t in topics]
+    signature = (tuple(t['id'] for t in topics), tuple(_file_signature(path) for path in paths))
+    cached = _router_cache
+    if cached and cached[0] == signature:
+        return cached[1]
+    router = TopicRouter([t['id'] for t in topics],
+                         [load_signature(path) if stamp else None for path, stamp in zip(paths, signature[1])])
+    _router_cache = (signature, router)
+    return router
+
+def _pool():
+    global _search_pool
+    with _cache_lock:
+        if _search_pool is None:
+            _search_pool = ThreadPoolExecutor(max_workers=SEARCH_WORKERS, thread_name_prefix='librarian-search')
+        return _search_pool
+
+def _filter_index(topic_data):
+    """Metadata filter index of a loaded topic, built on first filtered query"""
+    if 'filter_index' not in topic_data:
+        topic_data['filter_index'] = ChunkFilterIndex(topic_data['chunks'], topic_data['books'])
+    return topic_data['filter_index']
+
+def _scope_bitmap(topic_data, ranges=None, filters=None):
+    """Packed row bitmap of a book's chunks and/or the chunks matching filters"""
+    chunks = topic_data['chunks']
+    bits = _filter_index(topic_data).bitmap(filters) if filters else None
+    if ranges:
+        book_rows = [chunks.id_rows(start, end) for start, end in ranges]
+        if None in book_rows:
+            raise ValueError("chunk IDs not in store order, reindex the topic to filter by book")
+        in_book = bitmap_from_rows(
+            np.concatenate([np.arange(first, end, dtype=np.int64) for first, end in book_rows]), len(chunks))
+        bits = in_book if bits is None else bits & in_book
+    return bits
+
+def _search_scoped(topic_data, query_embedding, k, min_score, ranges=None, filters=None):
+    """
+    Search restricted to chunk ID ranges (a book) and/or metadata filters
+
+    A book's chunks are a contiguous run of chunk store rows and filters
+    compile to a row bitmap (see chunk_filters.py). With stored vectors a
+    scope of up to BOOK_SCAN_MAX rows is scanned exactly, cost proportional
+    to the scope; bigger scopes, or topics without vectors, search the
+    topic index through an ID selector.
+
+    Returns:
+        (scores, rows) best first
+    """
+    chunks = topic_data['chunks']
+    vectors = topic_data['vectors']
+    index = topic_data['index']
+    metric = topic_data['metric']
+
+    book_rows = [chunks.id_rows(start, end) for start, end in ranges] if ranges else None
+    if not filters:
+        if (vectors is not None and None not in book_rows
+                and sum(end - first for first, end in book_rows) <= BOOK_SCAN_MAX):
+            return search_rows(vectors, book_rows, query_embedding, k, metric, min_score)
+        scores, ids = search(index, query_embedding, k, metric, min_score, params=range_parameters(index, ranges))
+        row_of = topic_data['row_of']
+        return scores, [row_of(int(chunk_id)) for chunk_id in ids]
+
+    filter_index = _filter_index(topic_data)
+    bits = _scope_bitmap(topic_data, ranges, filters)
+    rows = filter_index.rows(bits)
+
+    if not len(rows):
+        return [], []
+    if vectors is not None and len(rows) <= BOOK_SCAN_MAX:
+        return search_rows(vectors, rows, query_embedding, k, metric, min_score)
+    if not topic_data['rows_aligned']:
+        raise ValueError("index rows do not match the chunk store, run topic_vectors.py rebuild-index")
+    # Inner index (or a legacy index without IDs): its labels are chunk
+    # store rows, selected straight from the bitmap
+    inner = index.index if isinstance(index, faiss.IndexIDMap) else index
+    return search(inner, query_embedding, k, metric, min_score,
+                  params=bitmap_parameters(inner, bits, len(chunks)))
+
+def _scoped_in_search(topic_data, book=None, filters=None):
+    """
+    Whether a topic's search can be restricted to book/filters itself:
+    filters need a chunk store (row bitmaps), a book also its chunk ID ranges
+    """
+    if not isinstance(topic_data['chunks'], ChunkStore):
+        return False
+    return not book or topic_data['book_ranges'] is not None
+
+def _search_vectors(topic_data, query_embedding, k, min_score, book=None, filters=None):
+    """Vector top-k of one loaded topic as (scores, rows), book/filters applied when possible"""
+    if (book or filters) and _scoped_in_search(topic_data, book, filters):
+        book_ranges = topic_data['book_ranges']
+        if book and book not in book_ranges:
+            return [], []
+        return _search_scoped(topic_data, query_embedding, k, min_score,
+                              book_ranges[book] if book else None, filters)
+
+    # Legacy topics (.chunks.json): filters applied to the results, book in query_library
+    scores, ids = search(topic_data['index'], query_embedding, k, topic_data['metric'], min_score)
+    row_of = topic_data['row_of']
+    rows = [row_of(int(chunk_id)) for chunk_id in ids]
+    if filters:
+        book_tags = {book_id: b.get('tags', []) for book_id, b in topic_data['book_metadata'].items()}
+        kept = [(s, r) for s, r in zip(scores, rows)
+                if 0 <= r < len(topic_data['chunks']) and matches(topic_data['chunks'][r], filters, book_tags)]
+        scores, rows = [s for s, _ in kept], [r for _, r in kept]
+    return scores, rows
+
+def _search_lexical(topic_data, query_text, k, book=None, filters=None):
+    """BM25 top-k of one loaded topic as (scores, rows), in the same scope as the vector search"""
+    ranges = topic_data['book_ranges'][book] if book else None
+    allowed = _scope_bitmap(topic_data, ranges, filters) if book or filters else None
+    return topic_data['lexical'].search(query_text, k, allowed)
+
+def _search_shard(topic, query_embedding, k, min_score, book=None, filters=None, query_text=None):
+    """
+    Top-k of one topic as (score, topic_id, chunk_row, topic_data), best first
+
+    With query_text, returns (vector hits, BM25 hits) instead; the BM25
+    list is empty for topics without a usable lexical index.
+    """
+    vector_hits, lexical_hits = [], []
+    try:
+        topic_data = get_topic(topic)
+        if topic_data:
+            total = len(topic_data['chunks'])
+            scores, rows = _search_vectors(topic_data, query_embedding, k, min_score, book, filters)
+            vector_hits = [(float(score), topic['id'], int(row), topic_data)
+                           for score, row in zip(scores, rows) if 0 <= row < total]
+
+            if (query_text and topic_data['lexical'] is not None
+                    and (not (book or filters) or _scoped_in_search(topic_data, book, filters))
+                    and (not book or book in topic_data['book_ranges'])):
+                scores, rows = _search_lexical(topic_data, query_text, k, book, filters)
+                lexical_hits = [(float(score), topic['id'], int(row), topic_data) for score, row in zip(scores, rows)]
+    except Exception as e:
+        # One broken topic must not fail a library-wide query
+        print(f"⚠️  Skipping topic {topic['id']}: {e}", file=sys.stderr)
+        vector_hits, lexical_hits = [], []
+
+    return (vector_hits, lexical_hits) if query_text else vector_hits
+
+def _fuse(vector_hits, lexical_hits, query_embedding, k):
+    """
+    Reciprocal rank fusion of the global vector and BM25 rankings
+
+    min_score only cut vector candidates, so exact-term matches are kept.
+
+    Returns:
+        List of (fused score, topic_id, chunk_row, topic_data, similarity);
+        similarity is recomputed from stored vectors for BM25-only hits
+        (None without them)
+    """
+    fused, similarity, found = {}, {}, {}
+    for score, topic_id, row, topic_data in vector_hits:
+        similarity[(topic_id, row)] = score
+    for ranked in (vector_hits, lexical_hits):
+        for rank, (_, topic_id, row, topic_data) in enumerate(ranked, start=1):
+            key = (topic_id, row)
+            fused[key] = fused.get(key, 0.0) + 1.0 / (HYBRID_RRF_K + rank)
+            found[key] = topic_data
+    top = heapq.nlargest(k, fused.items(), key=lambda item: item[1])
+
+    missing = {}
+    for (topic_id, row), _ in top:
+        if (topic_id, row) not in similarity and found[(topic_id, row)]['vectors'] is not None:
+            missing.setdefault(topic_id, []).append(row)
+    for topic_id, rows in missing.items():
+        topic_data = found[(topic_id, rows[0])]
+        scores, rows = search_rows(topic_data['vectors'], np.array(sorted(rows), dtype=np.int64),
+                                   query_embedding, len(rows), topic_data['metric'])
+        similarity.update(((topic_id, int(row)), float(score)) for score, row in zip(scores, rows))
+
+    return [(score, topic_id, row, found[(topic_id, row)], similarity.get((topic_id, row)))
+            for (topic_id, row), score in top]
+
+def search_topics(query_embedding, topics, k=5, min_score=None, book=None, filters=None, query_text=None):
+    """
+    Federated search: global top-k over any set of topic indexes
+
+    Every topic (shard) is searched for its own top-k in the thread pool,
+    loading its index on first use; the sorted per-shard lists are then
+    heap-merged, so only k hits are ever materialized. Scores are comparable
+    across topics with the same metric (migrate legacy L2 topics to cosine
+    with topic_vectors.py migrate).
+
+    With book and/or filters (normalized, see chunk_filters.validate_filters)
+    every shard is restricted to the matching chunks inside the search (see
+    _search_scoped), so k results come back when k chunks match.
+
+    With query_text the search is hybrid: every shard also returns its BM25
+    top candidates (topics with a lexical index, see lexical_index.py), both
+    lists are merged library-wide to max(k * HYBRID_DEPTH, HYBRID_MIN_DEPTH)
+    and fused by reciprocal rank (see _fuse), so one topic's strong exact
+    match outranks another's weak one.
+
+    Returns:
+        List of (score, topic_id, chunk_row, topic_data, similarity), best
+        first; score is the fused score in hybrid mode, else the similarity
+    """
+    depth = max(k * HYBRID_DEPTH, HYBRID_MIN_DEPTH) if query_text else k
+
+    def search_shard(topic):
+        return _search_shard(topic, query_embedding, depth, min_score, book, filters, query_text)
+
+    if len(topics) == 1:
+        shards = [search_shard(topics[0])]
+    else:
+        shards = list(_pool().map(search_shard, topics))
+
+    def merged(lists):
+        return list(itertools.islice(heapq.merge(*lists, key=lambda hit: -hit[0]), depth))
+
+    if query_text:
+        return _fuse(merged(v for v, _ in shards), merged(l for _, l in shards), query_embedding, k)
+    return [hit + (hit[0],) for hit in merged(shards)]
+
 def get_embedding(text):
     """Get local embedding for text."""
-    return EMBEDDING_MODEL.encode(text, convert_to_numpy=True).astype(np.float32)
+    return get_embedding_service().embed_query(text)
 
-def query_library(query, topic=None, book=None, k=5):
+def query_library(query, topic=None, book=None, k=5, min_score=None, topics=None,
+                  route_top_n=ROUTE_TOP_N, route_margin=None, filters=None, hybrid=False):
     """Query the library and return top-k results.
 
+    Without topic/topics the whole library is searched (federated across
+    every topic index, see search_topics). When more topics are selected
+    than route_top_n, only the ones whose routing signature best matches
+    the query are searched (see topic_router.py).
+
     Args:
         query: Search query string
         topic: Filter by topic ID (optional)
         book: Filter by book filename (optional)
         k: Number of results to return
+        min_score: Only return results scoring at least this (cosine
+            similarity for cosine indexes), cut inside the search (optional)
+        topics: Search these topic IDs together (optional)
+        route_top_n: Search at most this many routed topics (None = all)
+        route_margin: Only search topics within this routing score of the best (optional)
+        filters: Structured filters, e.g. {'author': 'Jane Doe', 'tags': ['history'],
+            'filetype': 'pdf', 'page': [10, 40], 'chapter': 'ch03'} (optional,
+            see chunk_filters.py), applied inside the search
+        hybrid: Fuse vector and BM25 keyword results (exact names, jargon,
+            quotes); results then carry the fused 'score' next to 'similarity'
     """
+    filters = validate_filters(filters)
     metadata = load_metadata()
 
-    # Find topic
-    topic_id = None
+    # Find topics
     if topic:
+        selected = []
         for t in metadata['topics']:
             # v2.0: topics only have 'id' and 'path', no 'label'
             if t['id'] == topic or topic.lower() in t['id'].lower():
-                topic_id = t['id']
-                break
-
-    if not topic_id:
-        # Default to first topic with data
-        for t in metadata['topics']:
-            topic_dir = BOOKS_DIR / t['id']
-            if (topic_dir / ".faiss.index").exists():
-                topic_id = t['id']
+                selected = [t]
                 break
+    elif topics:
+        wanted = set(topics)
+        selected = [t for t in metadata['topics'] if t['id'] in wanted]
+    else:
+        selected = metadata['topics']
 
-    if not topic_id:
+    if not selected:
         return []
 
-    # Load topic data
-    topic_data = load_topic(topic_id)
-    if not topic_data:
-        return []
-
-    # Get embedding and search
+    # Get embedding once and search every selected topic
+    # (scores: cosine similarity, or 1 - L2 distance on legacy indexes)
     query_embedding = get_embedding(query)
-    distances, indices = topic_data['index'].search(
-        query_embedding.reshape(1, -1),
-        k
-    )
-
-    # Use book metadata from topic-index.json (v2.0)
-    book_metadata = topic_data.get('book_metadata', {})
-    topic_path = topic_data.get('topic_path', topic_id)
+    # A book filter already pins the topics holding that book, no routing needed
+    if not book and len(selected) > 1 and (route_margin is not None or
+                                           (route_top_n is not None and len(selected) > route_top_n)):
+        router = get_router(selected)
+        selected = [selected[p] for p in router.route(query_embedding, route_top_n, route_margin)]
+    hits = search_topics(query_embedding, selected, k, min_score, book, filters, query if hybrid else None)
 
     # Format results with filename and relative path
     results = []
-    for idx, dist in zip(indices[0], distances[0]):
-        if idx < len(topic_data['chunks']):
-            chunk = topic_data['chunks'][idx]
-            book_id = chunk.get('book_id')
-
-            # Get book info from topic-index.json (v2.0)
-            book_info = book_metadata.get(book_id, {})
-            filename = book_info.get('filename', chunk.get('filename', ''))
-
-            # Compute relative path from workspace root to book file
-            rel_path = os.path.join('../librarian/books', topic_path, filename) if filename and topic_path else ''
-
-            # Extract page/paragraph (chunks v2.0)
-            page = chunk.get('page')  # PDF page number or None
-            chapter = chunk.get('chapter')  # EPUB chapter or None
-            paragraph = chunk.get('paragraph')  # Paragraph number
-            filetype = chunk.get('filetype', 'unknown')
-
-            # Build location string
-            location = None
-            if filetype == 'pdf' and page:
-                if paragraph:
-                    location = f"p.{page}, ¶{paragraph}"
-                else:
-                    location = f"p.{page}"
-            elif filetype == 'epub' and chapter:
-                if paragraph:
-                    location = f"{chapter}, ¶{paragraph}"
-                else:
-                    location = chapter
-
-            results.append({
-                'text': chunk.get('chunk_full', ''),
-                'book_title': chunk.get('book_title', ''),
-                'topic': topic_id,
-                'similarity': float(1 - dist),  # Convert distance to similarity
-                'filename': filename,
-                'folder_path': topic_path,  # Use topic path from v2.0
-                'relative_path': rel_path,
-                'location': location,  # NEW: page/paragraph
-                'page': page,
-                'chapter': chapter,
-                'paragraph': paragraph,
-                'filetype': filetype
-            })
-
-    # Filter by book if specified
+    for score, topic_id, row, topic_data, similarity in hits:
+        chunk = topic_data['chunks'][row]
+        book_id = chunk.get('book_id')
+
+        # Get book info from topic-index.json (v2.0)
+        book_info = topic_data.get('book_metadata', {}).get(book_id, {})
+        filename = book_info.get('filename', chunk.get('filename', ''))
+        topic_path = topic_data.get('topic_path', topic_id)
+
+        # Compute relative path from workspace root to book file
+        rel_path = os.path.join('../librarian/books', topic_path, filename) if filename and topic_path else ''
+
+        # Extract page/paragraph (chunks v2.0)
+        page = chunk.get('page')  # PDF page number or None
+        chapter = chunk.get('chapter')  # EPUB chapter or None
+        paragraph = chunk.get('paragraph')  # Paragraph number
+        filetype = chunk.get('filetype', 'unknown')
+
+        # Build location string
+        location = None
+        if filetype == 'pdf' and page:
+            if paragraph:
+                location = f"p.{page}, ¶{paragraph}"
+            else:
+                location = f"p.{page}"
+        elif filetype == 'epub' and chapter:
+            if paragraph:
+                location = f"{chapter}, ¶{paragraph}"
+            else:
+                location = chapter
+
+        result = {
+            'text': chunk.get('chunk_full', ''),
+            'book_title': chunk.get('book_title', ''),
+            'topic': topic_id,
+            'similarity': similarity,
+            'filename': filename,
+            'folder_path': topic_path,  # Use topic path from v2.0
+            'relative_path': rel_path,
+            'location': location,  # NEW: page/paragraph
+            'page': page,
+            'chapter': chapter,
+            'paragraph': paragraph,
+            'filetype': filetype
+        }
+        if hybrid:
+            result['score'] = score
+        results.append(result)
+
+    # Book filter on legacy topics (others were restricted inside the search)
     if book:
         results = [r for r in results if r['filename'] == book]
 
@@ -182,8 +608,15 @@ def main():
     parser = argparse.ArgumentParser()
     parser.add_argument('query', help='Search query')
     parser.add_argument('--topic', help='Filter by topic ID')
+    parser.add_argument('--topics', nargs='+', help='Search several topic IDs together (default: whole library)')
     parser.add_argument('--book', help='Filter by book filename (e.g. "Book.pdf")')
     parser.add_argument('--top-k', type=int, default=5, help='Number of results')
+    add_filter_arguments(parser)
+    parser.add_argument('--route-top-n', type=int, default=ROUTE_TOP_N,
+                        help=f'Search only the N topics best matching the query (default: {ROUTE_TOP_N}, 0 = all)')
+    parser.add_argument('--route-margin', type=float, help='Search only topics within this routing score of the best')
+    parser.add_argument('--min-score', type=float, help='Minimum similarity (cosine for cosine indexes)')
+    parser.add_argument('--hybrid', action='store_true', help='Fuse vector and BM25 keyword search (exact terms)')
 
     args = parser.parse_args()
 
@@ -191,8 +624,14 @@ def main():
         results = query_library(
             query=args.query,
             topic=args.topic,
+            topics=args.topics,
             book=args.book,
-            k=args.top_k
+            k=args.top_k,
+            min_score=args.min_score,
+            route_top_n=args.route_top_n or None,
+            route_margin=args.route_margin,
+            filters=filters_from_args(args),
+            hybrid=args.hybrid
         )
         print(json.dumps({'results': results}, ensure_ascii=False, indent=2))
     except Exception as e:
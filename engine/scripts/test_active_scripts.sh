@@ -69,6 +69,11 @@ for script in engine/scripts/index_library.py engine/scripts/research.py engine/
 done
 echo ""
 
+# Test 7: engine unit tests (throwaway libraries via LIBRARIAN_BOOKS_DIR)
+echo "7️⃣ Running engine unit tests..."
+python3.11 -m pytest engine/tests -q && echo "✅ Unit tests pass" || { echo "❌ Unit tests failed"; exit 1; }
+echo ""
+
 echo "✅ All active script tests passed!"
 echo ""
 echo "Run this before every commit to ensure indexing works."
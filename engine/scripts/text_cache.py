@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Content-addressed cache of extracted book text
+
+Parsing PDFs/EPUBs is the slowest part of indexing, and the text of a book
+only changes when its bytes change. Entries are keyed by the file's SHA-256
+digest plus the extractor version, so renamed/moved/duplicated books hit the
+cache and upgrading the extractor invalidates everything at once.
+
+Stored next to the library in books/.cache/text/ (one gzipped JSON per book).
+Least-recently-used entries are evicted once the cache exceeds its size cap.
+
+Usage:
+    python text_cache.py stats             # Entry count, size, cap
+    python text_cache.py list              # Entries, most recently used first
+    python text_cache.py evict --max-mb 500
+    python text_cache.py clear
+"""
+
+import os
+import sys
+import gzip
+import json
+import time
+import hashlib
+import argparse
+from pathlib import Path
+from typing import List, Dict, Optional
+
+from library_paths import LIBRARY_ROOT
+
+# Paths
+CACHE_DIR = LIBRARY_ROOT / ".cache" / "text"
+
+# Size cap (override with LIBRARIAN_TEXT_CACHE_MB)
+DEFAULT_MAX_BYTES = int(os.environ.get('LIBRARIAN_TEXT_CACHE_MB', 2048)) * 1024 * 1024
+
+ENTRY_SUFFIX = '.json.gz'
+
+
+def file_digest(path: Path, block_size: int = 1024 * 1024) -> str:
+    """SHA-256 of file contents (streamed, constant memory)"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_key(path: Path, extractor_version: str) -> str:
+    """Cache key: file digest + extractor version"""
+    combined = f"{file_digest(path)}:{extractor_version}"
+    return hashlib.sha256(combined.encode()).hexdigest()
+
+
+def _entry_path(key: str) -> Path:
+    return CACHE_DIR / f"{key}{ENTRY_SUFFIX}"
+
+
+def get(key: str) -> Optional[List[Dict]]:
+    """
+    Load cached pages for a key
+
+    Returns:
+        List of {'text', 'metadata'} dicts, or None on miss
+    """
+    entry = _entry_path(key)
+    try:
+        with gzip.open(entry, 'rt', encoding='utf-8') as f:
+            data = json.load(f)
+    except (FileNotFoundError, OSError, ValueError):
+        return None
+
+    # Touch for LRU eviction
+    try:
+        os.utime(entry)
+    except OSError:
+        pass
+
+    return data.get('pages')
+
+
+def put(key: str, pages: List[Dict], source: str = '') -> None:
+    """Store extracted pages atomically (safe with concurrent workers)"""
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    entry = _entry_path(key)
+    tmp = entry.with_name(f"{entry.name}.{os.getpid()}.tmp")
+
+    with gzip.open(tmp, 'wt', encoding='utf-8', compresslevel=3) as f:
+        json.dump({
+            'source': source,
+            'created_at': time.time(),
+            'pages': pages
+        }, f, ensure_ascii=False, default=str)
+
+    os.replace(tmp, entry)
+
+
+def _entries() -> List[os.DirEntry]:
+    if not CACHE_DIR.exists():
+        return []
+    return [e for e in os.scandir(CACHE_DIR) if e.name.endswith(ENTRY_SUFFIX)]
+
+
+def stats() -> Dict:
+    """Entry count and total size in bytes"""
+    entries = _entries()
+    return {
+        'path': str(CACHE_DIR),
+        'entries': len(entries),
+        'bytes': sum(e.stat().st_size for e in entries),
+        'max_bytes': DEFAULT_MAX_BYTES
+    }
+
+
+def evict(max_bytes: int = DEFAULT_MAX_BYTES) -> int:
+    """
+    Remove least-recently-used entries until the cache fits max_bytes
+
+    Returns:
+        Number of entries removed
+    """
+    entries = sorted(_entries(), key=lambda e: e.stat().st_mtime)
+    total = sum(e.stat().st_size for e in entries)
+    removed = 0
+
+    for entry in entries:
+        if total <= max_bytes:
+            break
+        size = entry.stat().st_size
+        try:
+            os.remove(entry.path)
+        except FileNotFoundError:
+            pass
+        total -= size
+        removed += 1
+
+    return removed
+
+
+def clear() -> int:
+    """Remove every entry, returns count removed"""
+    entries = _entries()
+    for entry in entries:
+        os.remove(entry.path)
+    return len(entries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Inspect the extracted-text cache')
+    parser.add_argument('command', choices=['stats', 'list', 'evict', 'clear'])
+    parser.add_argument('--max-mb', type=int, help='Size cap for evict (default: LIBRARIAN_TEXT_CACHE_MB or 2048)')
+    args = parser.parse_args()
+
+    if args.command == 'stats':
+        info = stats()
+        print(f"📦 Text cache: {info['path']}")
+        print(f"   Entries: {info['entries']}")
+        print(f"   Size: {info['bytes'] / 1024 / 1024:.1f} MB / {info['max_bytes'] / 1024 / 1024:.0f} MB")
+
+    elif args.command == 'list':
+        for entry in sorted(_entries(), key=lambda e: e.stat().st_mtime, reverse=True):
+            try:
+                with gzip.open(entry.path, 'rt', encoding='utf-8') as f:
+                    data = json.load(f)
+            except (OSError, ValueError):
+                print(f"   ⚠️  {entry.name}: unreadable")
+                continue
+            last_used = time.strftime('%Y-%m-%d %H:%M', time.localtime(entry.stat().st_mtime))
+            print(f"   {last_used}  {entry.stat().st_size / 1024:8.0f} KB  "
+                  f"{len(data.get('pages', [])):5d} pages  {data.get('source', '?')}")
+
+    elif args.command == 'evict':
+        max_bytes = args.max_mb * 1024 * 1024 if args.max_mb is not None else DEFAULT_MAX_BYTES
+        removed = evict(max_bytes)
+        print(f"🧹 Evicted {removed} entries")
+
+    elif args.command == 'clear':
+        removed = clear()
+        print(f"🧹 Removed {removed} entries")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,295 @@
+#!/usr/bin/env python3
+"""
+Topic routing signatures: prune federated search to the relevant topics
+
+Every topic gets a small spherical k-means codebook of its stored vectors
+(.router.npy: up to ROUTER_CENTROIDS unit-length centroids), written by the
+indexer next to .vectors.npy. A query is scored against all codebooks at
+once (one matrix product over ~8 rows per topic) and a topic's routing
+score is its best centroid's cosine similarity. research.py then searches
+only the best-scoring topics:
+
+    top_n     at most this many topics (default ROUTE_TOP_N)
+    margin    and only topics scoring within margin of the best one
+
+Topics without a signature (indexed before routing, or another model's
+dimension) are always searched, so routing never hides them.
+
+Use `report` to pick N: it runs queries through the full federated search
+and the routed one and prints recall@k against shards searched per query.
+
+Usage:
+    python topic_router.py build --all                # Signatures from stored vectors
+    python topic_router.py report --top-n 1 2 4 8 16  # Recall vs shards searched
+    python topic_router.py report --queries-file queries.txt --margin 0.05 0.1
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+from topic_vectors import VECTORS_NAME, load_vectors, training_sample
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
+ROUTER_NAME = ".router.npy"
+
+# Codebook size per topic; small topics get fewer (at least ROUTER_POINTS_PER_CENTROID vectors each)
+ROUTER_CENTROIDS = 8
+ROUTER_POINTS_PER_CENTROID = 40
+
+# k-means runs on an evenly spaced sample of the stored vectors
+ROUTER_SAMPLE = 20_000
+ROUTER_NITER = 20
+ROUTER_SEED = 1234
+
+# Default routing: search the best 8 topics (only when more are selected)
+ROUTE_TOP_N = 8
+
+
+def _normalized(vectors: np.ndarray) -> np.ndarray:
+    vectors = np.array(vectors, dtype=np.float32, copy=True, ndmin=2)
+    vectors /= np.clip(np.linalg.norm(vectors, axis=1, keepdims=True), 1e-12, None)
+    return vectors
+
+
+def build_signature(vectors: np.ndarray, centroids: int = ROUTER_CENTROIDS) -> np.ndarray:
+    """
+    Spherical k-means codebook of a topic's vectors
+
+    Returns:
+        (n, dim) float32 unit-length centroids, n <= centroids
+    """
+    import faiss
+
+    sample = _normalized(training_sample(vectors, ROUTER_SAMPLE))
+    n = max(1, min(centroids, len(sample) // ROUTER_POINTS_PER_CENTROID))
+    if n == 1:
+        return _normalized(sample.mean(axis=0))
+
+    kmeans = faiss.Kmeans(sample.shape[1], n, niter=ROUTER_NITER, spherical=True,
+                          seed=ROUTER_SEED, verbose=False)
+    kmeans.train(sample)
+    return _normalized(kmeans.centroids)
+
+
+def write_signature(signature: np.ndarray, path: Path) -> None:
+    tmp = path.with_name(path.name + '.tmp')
+    with open(tmp, 'wb') as f:
+        np.save(f, np.ascontiguousarray(signature, dtype=np.float32))
+    os.replace(tmp, path)
+
+
+def load_signature(path: Path) -> Optional[np.ndarray]:
+    try:
+        return np.load(path)
+    except (OSError, ValueError):
+        return None
+
+
+def build_topic(topic_dir: Path, centroids: int = ROUTER_CENTROIDS) -> int:
+    """
+    Write .router.npy for a topic from its stored vectors
+
+    Returns:
+        Number of centroids
+    """
+    signature = build_signature(load_vectors(topic_dir / VECTORS_NAME), centroids)
+    write_signature(signature, topic_dir / ROUTER_NAME)
+    return len(signature)
+
+
+class TopicRouter:
+    """
+    All topics' codebooks stacked into one matrix
+
+    Centroids of a topic are contiguous rows, so per-topic best scores are a
+    single maximum.reduceat over the query's similarities.
+    """
+
+    def __init__(self, topic_ids: Sequence[str], signatures: Sequence[Optional[np.ndarray]]):
+        self.topic_ids = list(topic_ids)
+        # One dimension per router: the most common one (the library's model)
+        dims = Counter(s.shape[1] for s in signatures if s is not None)
+        self.dim = dims.most_common(1)[0][0] if dims else 0
+
+        routed, rows, starts = [], [], []
+        for position, signature in enumerate(signatures):
+            if signature is None or signature.shape[1] != self.dim:
+                continue
+            routed.append(position)
+            starts.append(sum(len(r) for r in rows))
+            rows.append(signature)
+
+        self.routed = np.array(routed, dtype=np.int64)
+        self.unrouted = sorted(set(range(len(self.topic_ids))) - set(routed))
+        self.starts = np.array(starts, dtype=np.int64)
+        self.centroids = np.vstack(rows).astype(np.float32) if rows else np.zeros((0, self.dim), np.float32)
+
+    def scores(self, query: np.ndarray) -> np.ndarray:
+        """Routing score (best centroid cosine) of every routed topic, in self.routed order"""
+        if not len(self.routed):
+            return np.zeros(0, dtype=np.float32)
+        query = _normalized(query.reshape(-1))[0]
+        return np.maximum.reduceat(self.centroids @ query, self.starts)
+
+    def route(self, query: np.ndarray, top_n: Optional[int] = ROUTE_TOP_N,
+              margin: Optional[float] = None) -> List[int]:
+        """
+        Topics worth searching for a query
+
+        Args:
+            top_n: Keep at most this many routed topics (None = no cap)
+            margin: Keep only routed topics within this of the best score
+
+        Returns:
+            Positions into topic_ids: chosen routed topics best first, then
+            every topic without a usable signature
+        """
+        if len(query.reshape(-1)) != self.dim:
+            return list(range(len(self.topic_ids)))
+
+        scores = self.scores(query)
+        order = np.argsort(-scores, kind='stable')
+        if margin is not None and len(order):
+            order = order[scores[order] >= scores[order[0]] - margin]
+        if top_n is not None:
+            order = order[:max(1, top_n)]
+        return [int(p) for p in self.routed[order]] + self.unrouted
+
+
+def _load_registry() -> List[Dict]:
+    with open(MAIN_METADATA, 'r') as f:
+        return json.load(f).get('topics', [])
+
+
+def _sample_queries(topics: List[Dict], count: int, seed: int) -> List[str]:
+    """Chunk texts drawn evenly from all topics (a stand-in for real queries)"""
+    from chunk_store import chunks_file, open_chunks
+
+    rng = random.Random(seed)
+    pools = []
+    for topic in topics:
+        path = chunks_file(LIBRARY_ROOT / topic['path'])
+        if path is not None:
+            chunks = open_chunks(path)
+            if len(chunks):
+                pools.append(chunks)
+    queries = []
+    while pools and len(queries) < count:
+        chunks = pools[len(queries) % len(pools)]
+        text = chunks[rng.randrange(len(chunks))].get('chunk_full', '')
+        queries.append(' '.join(text.split()[:30]))
+    return queries
+
+
+def report(queries: List[str], k: int, top_ns: Sequence[Optional[int]], margins: Sequence[Optional[float]]) -> List[Dict]:
+    """
+    Recall of routed search against the full federated search
+
+    Returns:
+        One row per setting: {'top_n', 'margin', 'recall', 'shards', 'ms'}
+    """
+    import research
+
+    topics = research.load_metadata()['topics']
+    embeddings = [research.get_embedding(q) for q in queries]
+    router = research.get_router(topics)
+
+    truth = []
+    started = time.perf_counter()
+    for embedding in embeddings:
+        truth.append({(hit[1], hit[2]) for hit in research.search_topics(embedding, topics, k)})
+    rows = [{'top_n': None, 'margin': None, 'recall': 1.0, 'shards': float(len(topics)),
+             'ms': (time.perf_counter() - started) * 1000 / max(1, len(embeddings))}]
+
+    for top_n, margin in [(n, None) for n in top_ns] + [(None, m) for m in margins]:
+        found = expected = shards = 0
+        started = time.perf_counter()
+        for embedding, relevant in zip(embeddings, truth):
+            chosen = [topics[p] for p in router.route(embedding, top_n, margin)]
+            hits = research.search_topics(embedding, chosen, k)
+            found += len(relevant & {(hit[1], hit[2]) for hit in hits})
+            expected += len(relevant)
+            shards += len(chosen)
+        rows.append({'top_n': top_n, 'margin': margin,
+                     'recall': found / expected if expected else 1.0,
+                     'shards': shards / max(1, len(embeddings)),
+                     'ms': (time.perf_counter() - started) * 1000 / max(1, len(embeddings))})
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Topic routing signatures for federated search')
+    parser.add_argument('command', choices=['build', 'report'])
+    parser.add_argument('topics', nargs='*', help='build: topic IDs')
+    parser.add_argument('--all', action='store_true', help='build: all topics in the library index')
+    parser.add_argument('--centroids', type=int, default=ROUTER_CENTROIDS,
+                        help=f'build: codebook size per topic (default: {ROUTER_CENTROIDS})')
+    parser.add_argument('--top-n', type=int, nargs='*', default=[1, 2, 4, 8, 16],
+                        help='report: top-N settings to compare (default: 1 2 4 8 16)')
+    parser.add_argument('--margin', type=float, nargs='*', default=[],
+                        help='report: margin settings to compare')
+    parser.add_argument('--queries', type=int, default=200, help='report: sampled chunk queries (default: 200)')
+    parser.add_argument('--queries-file', help='report: real queries, one per line')
+    parser.add_argument('--k', type=int, default=10, help='report: recall@k (default: 10)')
+    parser.add_argument('--seed', type=int, default=1, help='report: query sample seed (default: 1)')
+    args = parser.parse_args()
+
+    topics = _load_registry()
+
+    if args.command == 'build':
+        if args.topics:
+            selected = [t for t in topics if t['id'] in args.topics]
+        elif args.all:
+            selected = topics
+        else:
+            parser.error('give topic IDs or --all')
+
+        failed = 0
+        for topic in selected:
+            topic_dir = LIBRARY_ROOT / topic['path']
+            if not (topic_dir / VECTORS_NAME).exists():
+                print(f"   ⏭️  {topic['id']}: no stored vectors (python topic_vectors.py export {topic['id']})")
+                continue
+            try:
+                count = build_topic(topic_dir, args.centroids)
+                print(f"   ✓ {topic['id']}: {count} centroids")
+            except Exception as e:
+                failed += 1
+                print(f"   ❌ {topic['id']}: {e}")
+        return 1 if failed else 0
+
+    if args.queries_file:
+        with open(args.queries_file, 'r', encoding='utf-8') as f:
+            queries = [line.strip() for line in f if line.strip()]
+    else:
+        queries = _sample_queries(topics, args.queries, args.seed)
+    if not queries:
+        print("❌ No queries (library has no chunks?)")
+        return 1
+
+    routed = sum(1 for t in topics if (LIBRARY_ROOT / t['path'] / ROUTER_NAME).exists())
+    print(f"🧭 {len(queries)} queries, recall@{args.k}, {routed}/{len(topics)} topics with signatures\n")
+    print(f"{'Setting':<16} {'Recall':>8} {'Shards':>8} {'ms/query':>9}")
+    print('-' * 44)
+    for row in report(queries, args.k, args.top_n, args.margin):
+        if row['top_n'] is not None:
+            setting = f"top-n {row['top_n']}"
+        elif row['margin'] is not None:
+            setting = f"margin {row['margin']:g}"
+        else:
+            setting = 'all topics'
+        print(f"{setting:<16} {row['recall']:>8.1%} {row['shards']:>8.1f} {row['ms']:>9.2f}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
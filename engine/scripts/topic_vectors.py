@@ -0,0 +1,704 @@
+#!/usr/bin/env python3
+"""
+Raw topic embeddings (.vectors.npy) and model-free FAISS rebuilds
+
+The indexer keeps every topic's embedding matrix next to its FAISS index:
+row i is the vector of chunk store row i (same chunk_id), stored as a
+plain .npy (float32, or float16 to halve disk) that loads memory-mapped.
+The FAISS index is built from that file, so switching index type, metric
+or quantization is a rebuild from stored vectors - seconds, no model.
+
+Index variants are FAISS factory strings ('Flat', 'HNSW32', 'IVF1024,PQ48',
+...) wrapped in IndexIDMap2 so search still returns chunk IDs. By default
+the family is picked from the topic's size and a memory budget:
+
+    flat      up to FLAT_MAX_VECTORS (exact, a brute-force scan is still fast)
+    hnsw      up to HNSW_MAX_VECTORS if graph + vectors fit the budget
+    ivfpq     beyond that: IVF lists over PQ codes (dim/8 bytes per vector),
+              trained on an evenly spaced sample of the stored vectors
+
+Metrics: cosine (default for new indexes) builds an inner-product index
+over L2-normalized copies of the stored vectors, so search scores are true
+cosine similarities in [-1, 1] and a min_score threshold means the same
+thing on every topic. ip is raw inner product, l2 the legacy squared
+distance. Stored vectors are kept unnormalized either way.
+
+The variant in use and its build/search parameters (efSearch, nprobe...)
+are recorded in .topic-index.json (index_family, index_factory,
+index_metric, index_params); research.py applies them when loading.
+
+Usage:
+    python topic_vectors.py rebuild-index --all                 # Size-aware choice
+    python topic_vectors.py rebuild-index --all --index hnsw
+    python topic_vectors.py rebuild-index TOPIC_ID --factory Flat --metric ip   # Pinned variant
+    python topic_vectors.py migrate --all            # Existing topics → cosine, same family (baseline ones too)
+    python topic_vectors.py export --all --float16   # Vectors from existing flat indexes
+    python topic_vectors.py stats
+"""
+
+import os
+import sys
+import json
+import time
+import math
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from chunk_store import ChunkStore, CHUNK_STORE_NAME, LEGACY_CHUNKS_NAME, convert_json
+from library_paths import LIBRARY_ROOT, MAIN_METADATA
+
+VECTORS_NAME = ".vectors.npy"
+VECTOR_DTYPES = ('float32', 'float16')
+
+DEFAULT_FACTORY = 'Flat'
+METRICS = ('cosine', 'ip', 'l2')
+DEFAULT_METRIC = 'cosine'
+
+# Metric of indexes built before metrics were recorded
+LEGACY_METRIC = 'l2'
+
+# Index families (auto = choose from vector count and memory budget)
+INDEX_FAMILIES = ('auto', 'flat', 'hnsw', 'ivfpq')
+
+# Size thresholds of the automatic choice
+FLAT_MAX_VECTORS = 50_000
+HNSW_MAX_VECTORS = 1_000_000
+IVFPQ_MIN_VECTORS = 20_000
+
+# Memory a single topic index may take (see --index-mem-mb)
+DEFAULT_INDEX_MEMORY_MB = 2048
+
+# HNSW graph degree and beam widths
+HNSW_M = 32
+HNSW_EF_CONSTRUCTION = 80
+HNSW_EF_SEARCH = 64
+
+# IVF-PQ: training points per list, sample cap, lists probed per query
+IVF_TRAIN_PER_LIST = 64
+IVF_TRAIN_MAX = 200_000
+IVF_NPROBE_MIN = 16
+
+# IndexIDMap2 keeps an id array plus an id → row hash map
+ID_MAP_BYTES = 8 + 16
+
+# Rows converted/added to FAISS per step (bounds float32 copies of float16 data)
+BUILD_BLOCK = 65536
+
+# Book/filter-scoped search scans the matching stored rows exactly up to
+# this many, bigger scopes search the topic index through an ID selector
+BOOK_SCAN_MAX = 200_000
+
+# .npy header size reserved while streaming (v1.0 header, 64-byte aligned)
+NPY_HEADER_BYTES = 128
+
+
+def _npy_header(count: int, dim: int, dtype: str) -> bytes:
+    descr = np.dtype(dtype).newbyteorder('<').str
+    text = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({count}, {dim}), }}"
+    text = text.ljust(NPY_HEADER_BYTES - 10 - 1) + '\n'
+    header = b'\x93NUMPY\x01\x00' + len(text).to_bytes(2, 'little') + text.encode('latin1')
+    if len(header) != NPY_HEADER_BYTES:
+        raise ValueError(f"Vector shape ({count}, {dim}) does not fit the .npy header")
+    return header
+
+
+class VectorWriter:
+    """
+    Streams embedding rows into a .npy file (shape written on close).
+
+    Rows go straight to disk in the target dtype, so nothing proportional
+    to the topic stays in memory.
+    """
+
+    def __init__(self, path: Path, dtype: str = 'float32'):
+        if dtype not in VECTOR_DTYPES:
+            raise ValueError(f"Unsupported vector dtype: {dtype}")
+        self.path = Path(path)
+        self.dtype = np.dtype(dtype).newbyteorder('<')
+        self.count = 0
+        self.dim = None
+        self._file = open(self.path, 'wb')
+        self._file.write(b'\0' * NPY_HEADER_BYTES)
+
+    def append(self, embeddings: np.ndarray) -> None:
+        embeddings = np.asarray(embeddings)
+        if embeddings.ndim != 2 or not len(embeddings):
+            return
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+        elif embeddings.shape[1] != self.dim:
+            raise ValueError(f"Vector dimension {embeddings.shape[1]} != {self.dim}")
+        self._file.write(np.ascontiguousarray(embeddings, dtype=self.dtype).tobytes())
+        self.count += len(embeddings)
+
+    def close(self) -> int:
+        """Write the header; returns the number of rows"""
+        self._file.seek(0)
+        self._file.write(_npy_header(self.count, self.dim or 0, self.dtype.name))
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._file.close()
+        return self.count
+
+    def abort(self) -> None:
+        if not self._file.closed:
+            self._file.close()
+        self.path.unlink(missing_ok=True)
+
+
+def load_vectors(path: Path) -> np.ndarray:
+    """Memory-mapped (count, dim) vector matrix"""
+    return np.load(path, mmap_mode='r')
+
+
+def reconstruct(index, chunk_ids: np.ndarray) -> np.ndarray:
+    """Vectors of the given chunk IDs from an ID-mapped index (exact for flat indexes)"""
+    ids = np.ascontiguousarray(chunk_ids, dtype=np.int64)
+    if not len(ids):
+        return np.zeros((0, index.d), dtype=np.float32)
+    return index.reconstruct_batch(ids)
+
+
+def _pq_subquantizers(dim: int) -> int:
+    """PQ code bytes per vector: about dim/8, must divide dim"""
+    m = max(1, dim // 8)
+    while dim % m:
+        m -= 1
+    return m
+
+
+def index_spec(family: str, count: int, dim: int, metric: str = DEFAULT_METRIC) -> Dict:
+    """
+    Factory string and build/search parameters of an index family for count vectors
+
+    Returns:
+        {'family', 'factory', 'metric', 'params'}
+    """
+    if family == 'flat':
+        return {'family': 'flat', 'factory': 'Flat', 'metric': metric, 'params': {}}
+    if family == 'hnsw':
+        return {'family': 'hnsw', 'factory': f"HNSW{HNSW_M}", 'metric': metric,
+                'params': {'efConstruction': HNSW_EF_CONSTRUCTION, 'efSearch': HNSW_EF_SEARCH}}
+    if family == 'ivfpq':
+        # ~4 * sqrt(n) lists (power of two), but enough points to train each
+        nlist = 1 << max(4, round(math.log2(max(1.0, 4 * math.sqrt(count)))))
+        while nlist > 16 and count < nlist * 39:
+            nlist //= 2
+        m = _pq_subquantizers(dim)
+        return {'family': 'ivfpq', 'factory': f"IVF{nlist},PQ{m}", 'metric': metric,
+                'params': {'nprobe': min(nlist, max(IVF_NPROBE_MIN, nlist // 32)),
+                           'train_size': min(count, max(nlist * IVF_TRAIN_PER_LIST, 256 * 39), IVF_TRAIN_MAX)}}
+    raise ValueError(f"Unknown index family: {family} (expected one of {', '.join(INDEX_FAMILIES)})")
+
+
+def index_bytes(spec: Dict, count: int, dim: int) -> int:
+    """Approximate in-memory (and on-disk) size of an index"""
+    family = spec['family']
+    if family == 'hnsw':
+        per_vector = dim * 4 + HNSW_M * 2 * 4
+    elif family == 'ivfpq':
+        per_vector = _pq_subquantizers(dim) + 8
+    else:
+        per_vector = dim * 4
+    return count * (per_vector + ID_MAP_BYTES)
+
+
+def choose_index(count: int, dim: int, metric: str = DEFAULT_METRIC,
+                 memory_budget: int = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024) -> Dict:
+    """Pick flat / HNSW / IVF-PQ for a topic of count vectors within memory_budget bytes"""
+    flat = index_spec('flat', count, dim, metric)
+    if count <= FLAT_MAX_VECTORS and index_bytes(flat, count, dim) <= memory_budget:
+        return flat
+    hnsw = index_spec('hnsw', count, dim, metric)
+    if count <= HNSW_MAX_VECTORS and index_bytes(hnsw, count, dim) <= memory_budget:
+        return hnsw
+    if count >= IVFPQ_MIN_VECTORS:
+        return index_spec('ivfpq', count, dim, metric)
+    # Too few vectors to train PQ codes, and small anyway
+    return flat
+
+
+def pinned_spec(factory: str, metric: str = DEFAULT_METRIC) -> Dict:
+    """Spec of an explicitly requested factory string (kept across reindexing)"""
+    name = factory.upper()
+    if name.startswith('HNSW'):
+        family, params = 'hnsw', {'efSearch': HNSW_EF_SEARCH}
+    elif name.startswith('IVF'):
+        family, params = ('ivfpq' if 'PQ' in name else 'ivf'), {'nprobe': IVF_NPROBE_MIN}
+    elif name == 'FLAT':
+        family, params = 'flat', {}
+    else:
+        family, params = 'custom', {}
+    return {'family': family, 'factory': factory, 'metric': metric, 'params': params, 'pinned': True}
+
+
+def resolve_spec(index: Union[str, Dict], count: int, dim: int, metric: str = DEFAULT_METRIC,
+                 memory_budget: int = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024) -> Dict:
+    """Spec for an index choice: a pinned spec, 'auto' or a family name"""
+    if isinstance(index, dict):
+        return index
+    if index == 'auto':
+        return choose_index(count, dim, metric, memory_budget)
+    return index_spec(index, count, dim, metric)
+
+
+def apply_params(index, params: Dict) -> None:
+    """Set HNSW/IVF build and search parameters on an (ID-mapped) index"""
+    import faiss
+
+    inner = faiss.downcast_index(index.index) if hasattr(index, 'id_map') else index
+    if hasattr(inner, 'hnsw'):
+        if 'efConstruction' in params:
+            inner.hnsw.efConstruction = params['efConstruction']
+        if 'efSearch' in params:
+            inner.hnsw.efSearch = params['efSearch']
+    if 'nprobe' in params:
+        ivf = faiss.try_extract_index_ivf(inner)
+        if ivf is not None:
+            ivf.nprobe = params['nprobe']
+
+
+def topic_spec(topic_meta: Dict) -> Optional[Dict]:
+    """Index spec recorded in a topic's metadata (None if never recorded)"""
+    if 'index_factory' not in topic_meta:
+        return None
+    return {
+        'family': topic_meta.get('index_family', 'flat' if topic_meta['index_factory'] == 'Flat' else 'custom'),
+        'factory': topic_meta['index_factory'],
+        'metric': topic_meta.get('index_metric', LEGACY_METRIC),
+        'params': topic_meta.get('index_params', {}),
+        'pinned': topic_meta.get('index_pinned', False)
+    }
+
+
+def spec_metadata(spec: Dict) -> Dict:
+    """.topic-index.json fields recording an index spec"""
+    return {
+        'index_family': spec['family'],
+        'index_factory': spec['factory'],
+        'index_metric': spec['metric'],
+        'index_params': spec['params'],
+        'index_pinned': spec.get('pinned', False)
+    }
+
+
+def _metric(metric: str):
+    import faiss
+
+    if metric not in METRICS:
+        raise ValueError(f"Unknown metric: {metric} (expected one of {', '.join(METRICS)})")
+    return faiss.METRIC_L2 if metric == 'l2' else faiss.METRIC_INNER_PRODUCT
+
+
+def prepare_vectors(vectors: np.ndarray, metric: str) -> np.ndarray:
+    """float32 copy of vectors as the index expects them (unit length for cosine)"""
+    vectors = np.array(vectors, dtype=np.float32, copy=True, ndmin=2)
+    if metric == 'cosine':
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        vectors /= np.clip(norms, 1e-12, None)
+    return vectors
+
+
+def to_scores(distances: np.ndarray, metric: str) -> np.ndarray:
+    """
+    FAISS result values → similarity scores (higher is better)
+
+    cosine/ip indexes already return similarities; legacy l2 indexes keep
+    the historical 1 - distance.
+    """
+    return 1 - distances if metric == 'l2' else distances
+
+
+def score_threshold(min_score: float, metric: str) -> float:
+    """range_search radius matching a minimum score (inverse of to_scores)"""
+    return 1 - min_score if metric == 'l2' else min_score
+
+
+def search(index, query: np.ndarray, k: int, metric: str, min_score: Optional[float] = None,
+           params=None):
+    """
+    Top-k search of one query, optionally cut at min_score inside FAISS
+
+    With min_score the index is range-searched (only hits at or above the
+    threshold come back, however large k is), else a plain k-NN search.
+
+    Returns:
+        (scores, ids) arrays, best first
+    """
+    query = prepare_vectors(query.reshape(1, -1), metric)
+
+    if min_score is not None:
+        try:
+            limits, distances, ids = index.range_search(query, score_threshold(min_score, metric), params=params)
+        except RuntimeError:
+            # Index family without range search: k-NN then cut
+            pass
+        else:
+            distances, ids = distances[:limits[1]], ids[:limits[1]]
+            order = np.argsort(distances if metric == 'l2' else -distances, kind='stable')[:k]
+            return to_scores(distances[order], metric), ids[order]
+
+    distances, ids = index.search(query, k, params=params)
+    scores, ids = to_scores(distances[0], metric), ids[0]
+    keep = ids >= 0
+    if min_score is not None:
+        keep &= scores >= min_score
+    return scores[keep], ids[keep]
+
+
+def _row_blocks(rows, block: int):
+    """Row number arrays of at most block rows from (first, end) pairs or a row array"""
+    if isinstance(rows, np.ndarray):
+        for start in range(0, len(rows), block):
+            yield rows[start:start + block]
+        return
+    for first, end in rows:
+        for start in range(first, end, block):
+            yield np.arange(start, min(end, start + block), dtype=np.int64)
+
+
+def search_rows(vectors: np.ndarray, rows, query: np.ndarray, k: int, metric: str,
+                min_score: Optional[float] = None):
+    """
+    Exact search over some rows of stored vectors (one book, a filter's matches)
+
+    Cost is proportional to the rows scanned, not the topic, and results
+    are exact whatever the topic's index family.
+
+    Args:
+        rows: (first_row, end_row) pairs, or an ascending array of row numbers
+
+    Returns:
+        (scores, rows) arrays, best first
+    """
+    query = prepare_vectors(query.reshape(1, -1), metric)[0]
+    scores, found = [], []
+    for block_rows in _row_blocks(rows, BUILD_BLOCK):
+        if not len(block_rows):
+            continue
+        first, last = int(block_rows[0]), int(block_rows[-1]) + 1
+        # Contiguous runs slice the memory map, scattered rows gather
+        raw = vectors[first:last] if last - first == len(block_rows) else vectors[block_rows]
+        block = prepare_vectors(raw, metric)
+        if metric == 'l2':
+            scores.append(1 - ((block - query) ** 2).sum(axis=1))
+        else:
+            scores.append(block @ query)
+        found.append(block_rows)
+    if not scores:
+        return np.zeros(0, dtype=np.float32), np.zeros(0, dtype=np.int64)
+
+    scores, found = np.concatenate(scores), np.concatenate(found)
+    if min_score is not None:
+        keep = scores >= min_score
+        scores, found = scores[keep], found[keep]
+    if len(scores) > k:
+        top = np.argpartition(-scores, k - 1)[:k]
+        scores, found = scores[top], found[top]
+    order = np.argsort(-scores, kind='stable')
+    return scores[order], found[order]
+
+
+def selector_parameters(index, sel, referenced: Sequence = ()):
+    """
+    SearchParameters applying an IDSelector, keeping the index's own
+    efSearch / nprobe (pass the IndexIDMap2 to select chunk IDs, its inner
+    index to select rows)
+
+    Args:
+        referenced: Objects the selector points into (kept alive with the parameters)
+    """
+    import faiss
+
+    inner = faiss.downcast_index(index.index) if isinstance(index, faiss.IndexIDMap) else index
+    ivf = faiss.try_extract_index_ivf(inner)
+    if isinstance(inner, faiss.IndexHNSW):
+        params = faiss.SearchParametersHNSW(sel=sel, efSearch=inner.hnsw.efSearch)
+    elif ivf is not None:
+        params = faiss.SearchParametersIVF(sel=sel, nprobe=ivf.nprobe)
+    else:
+        params = faiss.SearchParameters(sel=sel)
+    # The parameters only hold raw pointers
+    params.referenced = [sel, *referenced]
+    return params
+
+
+def range_parameters(index, ranges: Iterable):
+    """
+    SearchParameters restricting a search to chunk ID ranges
+
+    Args:
+        ranges: [start, end) chunk ID pairs (see chunk_store.book_id_range)
+    """
+    import faiss
+
+    selectors = [faiss.IDSelectorRange(int(start), int(end)) for start, end in ranges]
+    sel = selectors[0]
+    for other in selectors[1:]:
+        sel = faiss.IDSelectorOr(sel, other)
+    return selector_parameters(index, sel, selectors)
+
+
+def bitmap_parameters(index, bits: np.ndarray, count: int):
+    """
+    SearchParameters restricting a search of an inner (row-numbered) index
+    to the rows set in a packed little-endian bitmap
+    """
+    import faiss
+
+    bits = np.ascontiguousarray(bits, dtype=np.uint8)
+    return selector_parameters(index, faiss.IDSelectorBitmap(count, faiss.swig_ptr(bits)), [bits])
+
+
+def training_sample(vectors: np.ndarray, size: int) -> np.ndarray:
+    """Evenly spaced rows (reads only those rows of a memory-mapped matrix)"""
+    count = len(vectors)
+    if size >= count:
+        return np.ascontiguousarray(vectors, dtype=np.float32)
+    rows = np.linspace(0, count - 1, size).astype(np.int64)
+    return np.ascontiguousarray(vectors[rows], dtype=np.float32)
+
+
+def build_index(vectors: np.ndarray, chunk_ids: np.ndarray, spec: Dict, block: int = BUILD_BLOCK):
+    """
+    Build an IndexIDMap2 for an index spec (see index_spec) from stored vectors
+
+    Args:
+        vectors: (count, dim) float32/float16 rows, may be memory-mapped
+        chunk_ids: int64 chunk ID of every row
+        spec: {'factory', 'metric', 'params'} - factory is any FAISS
+              index_factory string ('Flat', 'HNSW32', 'IVF1024,PQ48', ...)
+    """
+    import faiss
+
+    count, dim = vectors.shape
+    params = spec.get('params', {})
+    inner = faiss.index_factory(dim, spec['factory'], _metric(spec['metric']))
+    if not inner.is_trained:
+        inner.train(prepare_vectors(training_sample(vectors, params.get('train_size', count)), spec['metric']))
+    index = faiss.IndexIDMap2(inner)
+    apply_params(index, params)
+
+    chunk_ids = np.asarray(chunk_ids, dtype=np.int64)
+    for start in range(0, count, block):
+        rows = prepare_vectors(vectors[start:start + block], spec['metric'])
+        index.add_with_ids(rows, np.ascontiguousarray(chunk_ids[start:start + block]))
+    return index
+
+
+def write_index_atomic(index, path: Path) -> None:
+    import faiss
+
+    tmp = path.with_name(path.name + '.tmp')
+    faiss.write_index(index, str(tmp))
+    os.replace(tmp, path)
+
+
+def _load_registry() -> List[Dict]:
+    with open(MAIN_METADATA, 'r') as f:
+        return json.load(f).get('topics', [])
+
+
+def _read_topic_meta(topic_dir: Path) -> Dict:
+    try:
+        with open(topic_dir / ".topic-index.json", 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _update_topic_meta(topic_dir: Path, fields: Dict) -> None:
+    """
+    Record fields in .topic-index.json, creating a minimal one if the topic
+    has none: search reads the index metric from it (missing = legacy L2)
+    """
+    meta_path = topic_dir / ".topic-index.json"
+    if meta_path.exists():
+        topic_meta = _read_topic_meta(topic_dir)
+    else:
+        topic_meta = {"schema_version": "2.0", "books": []}
+    topic_meta.update(fields)
+    with open(meta_path, 'w') as f:
+        json.dump(topic_meta, f, indent=2)
+
+
+def store_ids(store: ChunkStore) -> np.ndarray:
+    """
+    FAISS IDs of a topic's chunks in row order
+
+    Stores converted from a legacy .chunks.json have no chunk ID column;
+    their index used sequential row numbers as IDs.
+    """
+    if store.chunk_ids is None:
+        return np.arange(len(store), dtype=np.int64)
+    return np.asarray(store.chunk_ids, dtype=np.int64)
+
+
+def rebuild_topic(topic_dir: Path, index: Union[str, Dict] = 'auto', metric: str = DEFAULT_METRIC,
+                  memory_budget: int = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024) -> Dict:
+    """
+    Rebuild one topic's .faiss.index from its stored vectors
+
+    Args:
+        index: 'auto', a family name, or a pinned spec (see pinned_spec)
+
+    Returns:
+        {'chunks', 'seconds', 'spec'}
+    """
+    store = ChunkStore(topic_dir / CHUNK_STORE_NAME)
+    try:
+        vectors = load_vectors(topic_dir / VECTORS_NAME)
+        if len(vectors) != len(store):
+            raise ValueError(f"{VECTORS_NAME} has {len(vectors)} rows, chunk store {len(store)}")
+        spec = resolve_spec(index, len(vectors), vectors.shape[1], metric, memory_budget)
+        started = time.perf_counter()
+        write_index_atomic(build_index(vectors, store_ids(store), spec), topic_dir / ".faiss.index")
+        seconds = time.perf_counter() - started
+        chunks = len(store)
+    finally:
+        store.close()
+
+    _update_topic_meta(topic_dir, spec_metadata(spec))
+    return {'chunks': chunks, 'seconds': seconds, 'spec': spec}
+
+
+def export_topic(topic_dir: Path, dtype: str = 'float32') -> int:
+    """
+    Write .vectors.npy for a topic indexed before vectors were stored,
+    reconstructing rows from its (flat) FAISS index
+
+    Returns:
+        Number of vectors written
+    """
+    import faiss
+
+    index = faiss.read_index(str(topic_dir / ".faiss.index"))
+    store = ChunkStore(topic_dir / CHUNK_STORE_NAME)
+    path = topic_dir / VECTORS_NAME
+    writer = VectorWriter(path.with_name(path.name + '.tmp'), dtype)
+    try:
+        ids = store_ids(store)
+        for start in range(0, len(ids), BUILD_BLOCK):
+            writer.append(reconstruct(index, ids[start:start + BUILD_BLOCK]))
+        count = writer.close()
+    except BaseException:
+        writer.abort()
+        raise
+    finally:
+        store.close()
+    os.replace(writer.path, path)
+    return count
+
+
+def migrate_topic(topic_dir: Path, metric: str = DEFAULT_METRIC,
+                  memory_budget: int = DEFAULT_INDEX_MEMORY_MB * 1024 * 1024) -> Dict:
+    """
+    Switch a topic's index to another metric from its stored vectors,
+    keeping its family (or pinned factory). A baseline topic is brought
+    along first: its .chunks.json converted to a chunk store, its vectors
+    exported from the existing flat index.
+
+    Returns:
+        rebuild_topic result plus 'converted' (legacy chunks converted) and
+        'exported' (vectors recovered, 0 if already stored)
+    """
+    converted = 0
+    json_path = topic_dir / LEGACY_CHUNKS_NAME
+    if not (topic_dir / CHUNK_STORE_NAME).exists() and json_path.exists():
+        converted = convert_json(json_path)
+        json_path.unlink()
+
+    exported = 0
+    if not (topic_dir / VECTORS_NAME).exists():
+        exported = export_topic(topic_dir)
+
+    recorded = topic_spec(_read_topic_meta(topic_dir))
+    if recorded and recorded['pinned']:
+        index = dict(recorded, metric=metric)
+    elif recorded and recorded['family'] in INDEX_FAMILIES:
+        index = recorded['family']
+    else:
+        index = 'auto'
+
+    result = rebuild_topic(topic_dir, index, metric, memory_budget)
+    result['converted'] = converted
+    result['exported'] = exported
+    return result
+
+
+def _selected(topics: List[Dict], ids: Iterable[str], all_topics: bool, parser) -> List[Dict]:
+    ids = list(ids)
+    if ids:
+        return [t for t in topics if t['id'] in ids]
+    if not all_topics:
+        parser.error('give topic IDs or --all')
+    return topics
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Stored topic vectors: rebuild FAISS indexes without the model')
+    parser.add_argument('command', choices=['rebuild-index', 'migrate', 'export', 'stats'])
+    parser.add_argument('topics', nargs='*', help='Topic IDs')
+    parser.add_argument('--all', action='store_true', help='All topics in the library index')
+    parser.add_argument('--index', choices=INDEX_FAMILIES, default='auto',
+                        help='Index family, auto = by size and memory budget (default: auto)')
+    parser.add_argument('--factory',
+                        help='Exact FAISS index_factory string, e.g. HNSW32 or IVF1024,PQ48 (pinned for later reindexing)')
+    parser.add_argument('--metric', choices=METRICS,
+                        help=f'Metric (default: rebuild-index keeps the recorded one, migrate/new topics use {DEFAULT_METRIC})')
+    parser.add_argument('--index-mem-mb', type=int, default=DEFAULT_INDEX_MEMORY_MB,
+                        help=f'Memory budget per topic index for --index auto (default: {DEFAULT_INDEX_MEMORY_MB})')
+    parser.add_argument('--float16', action='store_true', help='export: store vectors as float16')
+    args = parser.parse_args()
+
+    topics = _load_registry()
+
+    if args.command == 'stats':
+        count = size = 0
+        for topic in topics:
+            path = LIBRARY_ROOT / topic['path'] / VECTORS_NAME
+            if path.exists():
+                count += 1
+                size += path.stat().st_size
+        print(f"📐 Stored vectors: {count}/{len(topics)} topics ({size / 1024 / 1024:.1f} MB)")
+        if count < len(topics):
+            print("   💡 Topics without vectors: python topic_vectors.py export --all (flat indexes only)")
+        return 0
+
+    failed = 0
+    for topic in _selected(topics, args.topics, args.all, parser):
+        topic_dir = LIBRARY_ROOT / topic['path']
+        legacy = args.command == 'migrate' and (topic_dir / LEGACY_CHUNKS_NAME).exists()
+        if not (topic_dir / CHUNK_STORE_NAME).exists() and not legacy:
+            print(f"   ⏭️  {topic['id']}: no chunk store (reindex or run chunk_store.py convert)")
+            continue
+        try:
+            if args.command == 'rebuild-index':
+                recorded = topic_spec(_read_topic_meta(topic_dir))
+                metric = args.metric or (recorded['metric'] if recorded else DEFAULT_METRIC)
+                index = pinned_spec(args.factory, metric) if args.factory else args.index
+                result = rebuild_topic(topic_dir, index, metric, args.index_mem_mb * 1024 * 1024)
+                spec = result['spec']
+                print(f"   ✓ {topic['id']}: {result['chunks']} vectors → {spec['family']} "
+                      f"({spec['factory']}, {spec['metric']}) in {result['seconds']:.1f}s")
+            elif args.command == 'migrate':
+                result = migrate_topic(topic_dir, args.metric or DEFAULT_METRIC, args.index_mem_mb * 1024 * 1024)
+                spec = result['spec']
+                converted = f", {result['converted']} chunks converted from .chunks.json" if result['converted'] else ''
+                exported = f", {result['exported']} vectors recovered from old index" if result['exported'] else ''
+                print(f"   ✓ {topic['id']}: {spec['family']} ({spec['factory']}) → {spec['metric']}{converted}{exported}")
+            else:
+                count = export_topic(topic_dir, 'float16' if args.float16 else 'float32')
+                print(f"   ✓ {topic['id']}: {count} vectors exported")
+        except Exception as e:
+            failed += 1
+            print(f"   ❌ {topic['id']}: {e}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
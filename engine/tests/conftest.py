@@ -0,0 +1,52 @@
+"""
+Engine unit tests: scripts are flat modules in engine/scripts
+
+Run from the project root:
+    python -m pytest engine/tests -q
+"""
+
+import json
+import sys
+from pathlib import Path
+
+import faiss
+import numpy as np
+import pytest
+
+SCRIPTS_DIR = Path(__file__).parent.parent / "scripts"
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+from chunk_store import convert_json  # noqa: E402
+
+DIM = 16
+COUNT = 50
+
+
+@pytest.fixture
+def baseline_topic(tmp_path):
+    """Baseline topic: .chunks.json without chunk IDs, sequential IndexFlatL2"""
+    topic_dir = tmp_path / 'legacy'
+    topic_dir.mkdir()
+    vectors = np.random.default_rng(0).standard_normal((COUNT, DIM)).astype(np.float32)
+    # Two books, one after the other: b1 by Ann, b2 by Bob
+    chunks = [{'chunk_full': f'chunk {i}', 'book_id': f'b{1 + i * 2 // COUNT}', 'book_title': 'Book',
+               'book_author': 'Ann' if i * 2 < COUNT else 'Bob', 'topic_id': 'legacy', 'topic_label': 'Legacy',
+               'chunk_index': i} for i in range(COUNT)]
+    with open(topic_dir / '.chunks.json', 'w') as f:
+        json.dump(chunks, f)
+    with open(topic_dir / '.topic-index.json', 'w') as f:
+        json.dump({'books': [{'id': 'b1', 'filename': 'b1.pdf'}, {'id': 'b2', 'filename': 'b2.pdf'}]}, f)
+    index = faiss.IndexFlatL2(DIM)
+    index.add(vectors)
+    faiss.write_index(index, str(topic_dir / '.faiss.index'))
+    with open(tmp_path / '.library-index.json', 'w') as f:
+        json.dump({'topics': [{'id': 'legacy', 'path': 'legacy'}]}, f)
+    return topic_dir, vectors
+
+
+@pytest.fixture
+def legacy_topic(baseline_topic):
+    """Baseline topic converted to a chunk store (chunk_store.py convert)"""
+    topic_dir, _ = baseline_topic
+    convert_json(topic_dir / '.chunks.json')
+    return baseline_topic
@@ -0,0 +1,72 @@
+import math
+import random
+from collections import Counter
+
+import numpy as np
+import pytest
+
+from lexical_index import BM25_B, BM25_K1, LexicalIndex, LexicalIndexWriter, tokenize
+
+VOCABULARY = [f'w{i}' for i in range(400)] + ['CVE-2021-44228', "o'brien", 'café', '日本']
+
+
+@pytest.fixture(scope='module')
+def texts():
+    rng = random.Random(7)
+    return [' '.join(rng.choice(VOCABULARY[:20]) if rng.random() < 0.5 else rng.choice(VOCABULARY)
+                     for _ in range(rng.randrange(0, 40))) for _ in range(600)]
+
+
+def _build(path, texts, spill_postings, merge_batch=10 ** 9):
+    writer = LexicalIndexWriter(path, spill_postings=spill_postings, merge_batch=merge_batch)
+    for text in texts:
+        writer.add(text)
+    assert writer.close() == len(texts)
+    return LexicalIndex(path)
+
+
+def _bm25(texts, query):
+    docs = [Counter(tokenize(t)) for t in texts]
+    lengths = [sum(d.values()) for d in docs]
+    avgdl = sum(lengths) / len(docs)
+    scores = np.zeros(len(docs))
+    for term in set(tokenize(query)):
+        df = sum(1 for d in docs if term in d)
+        if not df:
+            continue
+        idf = math.log(1 + (len(docs) - df + 0.5) / (df + 0.5))
+        for row, d in enumerate(docs):
+            tf = d.get(term, 0)
+            if tf:
+                scores[row] += idf * tf * (BM25_K1 + 1) / (tf + BM25_K1 * (1 - BM25_B + BM25_B * lengths[row] / avgdl))
+    return scores
+
+
+@pytest.mark.parametrize('spill_postings, merge_batch', [(10 ** 9, 10 ** 9), (500, 10 ** 9), (1, 7), (500, 1)])
+def test_spilled_runs_merge_to_the_same_index(tmp_path, texts, spill_postings, merge_batch):
+    whole = _build(tmp_path / 'whole.bin', texts, 10 ** 9)
+    index = _build(tmp_path / 'index.bin', texts, spill_postings, merge_batch)
+    assert index.terms == whole.terms
+    for term_id in range(index.terms):
+        for a, b in zip(index.postings(term_id), whole.postings(term_id)):
+            np.testing.assert_array_equal(a, b)
+    # Runs and other temp files are gone
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['index.bin', 'whole.bin']
+
+
+@pytest.mark.parametrize('query', ['w1 w3 w250', 'cve-2021-44228', "O'Brien café", '日本'])
+def test_scores_match_brute_force(tmp_path, texts, query):
+    index = _build(tmp_path / 'index.bin', texts, 300, 40)
+    expected = _bm25(texts, query)
+    scores, rows = index.search(query, 10)
+    assert len(rows) == min(10, np.count_nonzero(expected))
+    np.testing.assert_allclose(scores, expected[rows], rtol=1e-5)
+    assert scores[-1] >= np.sort(expected)[::-1][len(rows) - 1] - 1e-5
+
+
+def test_abort_leaves_nothing(tmp_path, texts):
+    writer = LexicalIndexWriter(tmp_path / 'index.bin', spill_postings=50)
+    for text in texts[:100]:
+        writer.add(text)
+    writer.abort()
+    assert list(tmp_path.iterdir()) == []
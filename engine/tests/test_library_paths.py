@@ -0,0 +1,24 @@
+import os
+import subprocess
+import sys
+
+from conftest import SCRIPTS_DIR
+
+
+def _resolve(module, env):
+    code = f"import {module}; print({module}.LIBRARY_ROOT); print({module}.MAIN_METADATA)"
+    out = subprocess.run([sys.executable, '-c', code], cwd=SCRIPTS_DIR, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    return out.split('\n')[:2]
+
+
+def test_override_reaches_every_module(tmp_path):
+    env = dict(os.environ, LIBRARIAN_BOOKS_DIR=str(tmp_path))
+    for module in ('library_paths', 'chunk_store', 'library_state', 'topic_vectors', 'lexical_index'):
+        assert _resolve(module, env) == [str(tmp_path), str(tmp_path / '.library-index.json')]
+
+
+def test_default_is_repo_books(tmp_path):
+    env = {k: v for k, v in os.environ.items() if k != 'LIBRARIAN_BOOKS_DIR'}
+    root, _ = _resolve('library_paths', env)
+    assert root == str(SCRIPTS_DIR.parent.parent / 'books')
@@ -0,0 +1,93 @@
+import faiss
+import numpy as np
+import pytest
+
+from conftest import COUNT, DIM
+from topic_vectors import migrate_topic
+
+
+@pytest.fixture
+def research_topic(legacy_topic, monkeypatch):
+    import research
+
+    topic_dir, vectors = legacy_topic
+    migrate_topic(topic_dir, 'cosine')
+    monkeypatch.setattr(research, 'BOOKS_DIR', topic_dir.parent)
+    return research, topic_dir, vectors
+
+
+def _write_index(topic_dir, vectors, ids):
+    index = faiss.IndexIDMap2(faiss.IndexFlatIP(DIM))
+    index.add_with_ids(vectors, np.asarray(ids, dtype=np.int64))
+    faiss.write_index(index, str(topic_dir / '.faiss.index'))
+
+
+def test_consistent_topic_loads(research_topic):
+    research, _, _ = research_topic
+    topic_data = research.load_topic('legacy', 'legacy')
+    assert topic_data['rows_aligned']
+
+
+def test_index_from_another_run_is_refused(research_topic):
+    # Interrupted commit: new index (fresh chunk IDs) next to the old chunk store
+    research, topic_dir, vectors = research_topic
+    _write_index(topic_dir, vectors, np.arange(COUNT) + (1 << 20))
+    with pytest.raises(ValueError, match='reindex the topic'):
+        research.load_topic('legacy', 'legacy')
+
+
+def test_index_size_mismatch_is_refused(research_topic):
+    research, topic_dir, vectors = research_topic
+    _write_index(topic_dir, vectors[:-5], np.arange(COUNT - 5))
+    with pytest.raises(ValueError, match=f'{COUNT - 5} vectors but {COUNT} chunks'):
+        research.load_topic('legacy', 'legacy')
+
+
+def test_refused_topic_is_skipped_by_search(research_topic, capsys):
+    research, topic_dir, vectors = research_topic
+    _write_index(topic_dir, vectors, np.arange(COUNT) + (1 << 20))
+    topic = {'id': 'legacy', 'path': 'legacy'}
+    assert research.search_topics(vectors[0], [topic], k=3) == []
+    assert 'Skipping topic legacy' in capsys.readouterr().err
+
+
+def test_filters_apply_inside_search_on_migrated_topic(research_topic):
+    # No index_format (baseline topic): filters still select rows before top-k
+    research, _, vectors = research_topic
+    topic = {'id': 'legacy', 'path': 'legacy'}
+    hits = research.search_topics(vectors[0], [topic], k=3, filters={'author': ['Bob']})
+    assert len(hits) == 3
+    assert all(topic_data['chunks'][row]['book_author'] == 'Bob' for _, _, row, topic_data, _ in hits)
+
+
+def test_filters_apply_inside_search_without_stored_vectors(research_topic):
+    # Bitmap selector over the aligned index instead of the stored vectors
+    research, topic_dir, vectors = research_topic
+    (topic_dir / '.vectors.npy').unlink()
+    topic = {'id': 'legacy', 'path': 'legacy'}
+    hits = research.search_topics(vectors[0], [topic], k=3, filters={'author': ['Bob']})
+    assert len(hits) == 3
+    assert all(row >= COUNT // 2 for _, _, row, _, _ in hits)
+
+
+def test_book_restricted_inside_search_on_migrated_topic(research_topic):
+    research, _, vectors = research_topic
+    topic_data = research.load_topic('legacy', 'legacy')
+    assert topic_data['book_ranges'] == {'b1.pdf': [(0, COUNT // 2)], 'b2.pdf': [(COUNT // 2, COUNT)]}
+
+    topic = {'id': 'legacy', 'path': 'legacy'}
+    hits = research.search_topics(vectors[0], [topic], k=3, book='b2.pdf')
+    assert len(hits) == 3
+    assert all(row >= COUNT // 2 for _, _, row, _, _ in hits)
+
+
+def test_book_restricted_through_index_selector(research_topic):
+    # Without stored vectors the ID range selector runs on the sequential IDs
+    research, topic_dir, vectors = research_topic
+    (topic_dir / '.vectors.npy').unlink()
+    topic = {'id': 'legacy', 'path': 'legacy'}
+    hits = research.search_topics(vectors[0], [topic], k=3, book='b2.pdf', filters={'author': ['Bob']})
+    assert len(hits) == 3
+    hits = research.search_topics(vectors[0], [topic], k=3, book='b2.pdf')
+    assert len(hits) == 3
+    assert all(row >= COUNT // 2 for _, _, row, _, _ in hits)
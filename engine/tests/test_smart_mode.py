@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+
+import pytest
+
+from conftest import SCRIPTS_DIR
+
+pytest.importorskip('llama_index.core')
+pytest.importorskip('fitz')
+
+sys.path.insert(0, str(SCRIPTS_DIR.parent / "benchmarks"))
+from synth_library import write_pdf  # noqa: E402
+
+
+def _index(library, *args):
+    env = dict(os.environ, LIBRARIAN_BOOKS_DIR=str(library), LIBRARIAN_EMBED_BACKEND='stub')
+    out = subprocess.run([sys.executable, 'index_library.py', '--backend', 'stub', '--workers', '1',
+                          '--no-text-cache', '--no-embed-cache', *args],
+                         cwd=SCRIPTS_DIR, env=env, capture_output=True, text=True, timeout=600)
+    return out.stdout + out.stderr
+
+
+def test_smart_mode_retries_failed_book(tmp_path):
+    topic_dir = tmp_path / 'history'
+    topic_dir.mkdir()
+    write_pdf(topic_dir / 'good.pdf', 'Good Book', [['A readable page about rivers and cities.'] * 4])
+    (topic_dir / 'broken.pdf').write_bytes(b'not a pdf at all')
+
+    first = _index(tmp_path, '--all')
+    assert 'broken.pdf' in first and 'book(s) failed' in first
+
+    # Unchanged broken book: reported as new and extracted again, good book kept
+    second = _index(tmp_path)
+    assert 'No changes detected' not in second
+    assert 'Streaming 1 books' in second
+    assert 'broken.pdf' in second and 'book(s) failed' in second
@@ -0,0 +1,85 @@
+import json
+import os
+import subprocess
+import sys
+
+import faiss
+import numpy as np
+import pytest
+
+from chunk_store import CHUNK_STORE_NAME, ChunkStore
+from conftest import COUNT, SCRIPTS_DIR
+from topic_vectors import VECTORS_NAME, export_topic, load_vectors, migrate_topic, rebuild_topic, search
+
+
+def test_converted_store_has_no_ids(legacy_topic):
+    topic_dir, _ = legacy_topic
+    store = ChunkStore(topic_dir / CHUNK_STORE_NAME)
+    try:
+        assert store.chunk_ids is None
+    finally:
+        store.close()
+
+
+def test_export_legacy_topic(legacy_topic):
+    topic_dir, vectors = legacy_topic
+    assert export_topic(topic_dir) == COUNT
+    np.testing.assert_array_equal(np.asarray(load_vectors(topic_dir / VECTORS_NAME)), vectors)
+
+
+def test_rebuild_legacy_topic(legacy_topic):
+    topic_dir, vectors = legacy_topic
+    export_topic(topic_dir)
+    result = rebuild_topic(topic_dir, 'flat', 'l2')
+    assert result['chunks'] == COUNT
+
+    # Sequential IDs, as the baseline index used: row n is still chunk n
+    index = faiss.read_index(str(topic_dir / '.faiss.index'))
+    _, ids = index.search(vectors[[7, 31]], 1)
+    assert ids[:, 0].tolist() == [7, 31]
+    with open(topic_dir / '.topic-index.json') as f:
+        assert json.load(f)['index_family'] == 'flat'
+
+
+def test_migrate_legacy_topic_to_cosine(legacy_topic):
+    topic_dir, _ = legacy_topic
+    result = migrate_topic(topic_dir, 'cosine')
+    assert result['exported'] == COUNT
+    assert result['spec']['metric'] == 'cosine'
+    with open(topic_dir / '.topic-index.json') as f:
+        assert json.load(f)['index_metric'] == 'cosine'
+
+
+def test_migrate_records_metric_without_topic_metadata(legacy_topic, monkeypatch):
+    import research
+
+    topic_dir, vectors = legacy_topic
+    (topic_dir / '.topic-index.json').unlink()
+    migrate_topic(topic_dir, 'cosine')
+
+    monkeypatch.setattr(research, 'BOOKS_DIR', topic_dir.parent)
+    topic_data = research.load_topic('legacy', 'legacy')
+    assert topic_data['metric'] == 'cosine'
+    scores, _ = search(topic_data['index'], vectors[7], 1, topic_data['metric'])
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+
+def test_migrate_cli_on_baseline_library(baseline_topic, monkeypatch):
+    import research
+
+    topic_dir, vectors = baseline_topic
+    env = dict(os.environ, LIBRARIAN_BOOKS_DIR=str(topic_dir.parent))
+    out = subprocess.run([sys.executable, 'topic_vectors.py', 'migrate', '--all'], cwd=SCRIPTS_DIR, env=env,
+                         capture_output=True, text=True)
+    assert out.returncode == 0, out.stdout + out.stderr
+    assert f'{COUNT} chunks converted' in out.stdout and f'{COUNT} vectors recovered' in out.stdout
+    assert not (topic_dir / '.chunks.json').exists()
+
+    # Searched the way research.py loads it: true cosine scores, same chunks
+    monkeypatch.setattr(research, 'BOOKS_DIR', topic_dir.parent)
+    topic_data = research.load_topic('legacy', 'legacy')
+    assert topic_data['metric'] == 'cosine'
+    scores, ids = search(topic_data['index'], vectors[12] * 3, 1, topic_data['metric'])
+    row = topic_data['row_of'](int(ids[0]))
+    assert row == 12
+    assert scores[0] == pytest.approx(1.0, abs=1e-5)
+    assert topic_data['chunks'][row]['chunk_full'] == 'chunk 12'